@@ -27,6 +27,13 @@ def _strip_command(s: str) -> str:
     return s
 
 
+# the same as ticks_to_formatted_time of the save parser, which is not imported because importing facmgr.server
+# starts loading the whole manager (the gRPC servicer, the daemon), while the bot only depends on the protobuf
+def _format_ticks(ticks: int) -> str:
+    second = ticks // 60
+    return f"{second // 3600}:{second % 3600 // 60}:{second % 60}"
+
+
 def _format_status(status: ManagerStat):
     replies = [
         REPLIES["done"]["running" if status.running else "not_running"],
@@ -280,44 +287,31 @@ class FactorioHandler:
 
     @check_manager
     async def saves_list(self, _, message: Message):
-        names = await self.manager.get_all_save_name()
-        infos = await asyncio.gather(*[self.manager.get_stat_by_name(name) for name in names])
-        time_order = sorted(range(len(infos)), key=lambda x: infos[x].get('ticks', [-1, -1, -1])[2])
-        result = [f"{names[i]}: {infos[i].get('play_time', 'unknown')}" for i in time_order]
+        saves = (await self.manager.query_saves('play_time')).saves
+        result = [f"{save.name}: {_format_ticks(save.play_ticks) if save.HasField('play_ticks') else 'unknown'}"
+                  for save in saves]
         await message.reply(REPLIES["done"]["savelist"].format('\n'.join(result)))
 
     async def push_update(self, client: Client, chat_id):
-        offset = None
-        info_pattern = re.compile(r"(?P<datetime>\d\d\d\d-\d\d-\d\d \d\d:\d\d:\d\d)"
-                                  r" \[(?P<type>[A-Z]+)] (?P<message>.*)")
-        while True:
+        async for _, events in self.manager.subscribe_game_events():
             message_buffer = []
-            last_offset, messages = await self.manager.get_message(offset)
-            for message in messages:
-                message = message.rstrip(b'\r\n').decode(errors='replace')
-                if (match := info_pattern.fullmatch(message)) is None:
-                    continue
-                tp, msg = match.group("type"), match.group("message")
-                if tp == "CHAT":
-                    name, body = re.fullmatch(r"(.+?): (.*)", msg).groups()
-                    if name == "<server>":  # ignore outgoing messages
+            for event in events:
+                if event.kind == "CHAT":
+                    if event.player == "<server>":  # ignore outgoing messages
                         continue
                     else:
-                        message_buffer.append(REPLIES["game"]["chat"].format(name, body))
-                elif tp == "JOIN":
-                    name = re.fullmatch(r"(.+?) joined the game", msg).group(1)
-                    message_buffer.append(REPLIES["game"]["join"].format(name))
-                elif tp == "LEAVE":
-                    name = re.fullmatch(r"(.+?) left the game", msg).group(1)
-                    message_buffer.append(REPLIES["game"]["leave"].format(name))
+                        message_buffer.append(REPLIES["game"]["chat"].format(event.player, event.body))
+                elif event.kind == "JOIN":
+                    message_buffer.append(REPLIES["game"]["join"].format(event.player))
+                elif event.kind == "LEAVE":
+                    message_buffer.append(REPLIES["game"]["leave"].format(event.player))
                 else:
-                    message_buffer.append(message)
+                    message_buffer.append(f"{event.timestamp} [{event.kind}] {event.body}")
                 await client.send_message(
                     chat_id, text=''.join(message_buffer)[:4000],
                     reply_to_message_id=config.config.get("topic_id")
                 )
                 await asyncio.sleep(3)  # simple throttling for 20/min
-            offset = last_offset + 1
 
     async def send_output_admin(self, client: Client):
         admin_id = config.config['admin_id']
@@ -1,16 +1,23 @@
+import asyncio
+import logging
 from contextlib import asynccontextmanager
-from typing import Sequence, TypedDict, Optional, Literal, AsyncIterator
+from typing import Sequence, TypedDict, Optional, Literal, AsyncIterator, Callable
 import json
 
 import grpc
 from google.protobuf.empty_pb2 import Empty
 from ..protobuf.facmgr_pb2 import (
     Ping, SaveName, SaveNameList, ServerOptions, SaveStat as SaveStatPB2, Status as StatusPB2,
-    Command, UpdateInquiry, GameUpdates, ManagerStat, OutputStreams, UploadTelegramInfo, TelegramClient
+    Command, UpdateInquiry, GameUpdates, ManagerStat, OutputStreams, UploadTelegramInfo, TelegramClient,
+    SaveQuery, SaveQueryResult, SaveSummary, EventInquiry, GameEvents, GameEvent, OverflowPolicy, CommandOutput,
+    ResourceStats, ResourcePoint
 )
 from ..protobuf.facmgr_pb2_grpc import ServerManagerStub
 
 
+type OverflowPolicyName = Literal['default', 'drop-oldest', 'coalesce', 'disconnect']
+
+
 class SaveStat(TypedDict):
     version: str
     scenario: str
@@ -28,6 +35,11 @@ class Status(TypedDict):
 
 
 class ServerManagerClient:
+    # the stream is reopened after these errors, e.g. the manager is restarted
+    _RESUMABLE_CODES = {grpc.StatusCode.UNAVAILABLE, grpc.StatusCode.CANCELLED}
+    RECONNECT_DELAY = 1.
+    RECONNECT_MAX_DELAY = 30.
+
     def __init__(self, address):
         self.address = address
 
@@ -36,6 +48,34 @@ class ServerManagerClient:
         async with grpc.aio.insecure_channel(self.address) as channel:
             yield ServerManagerStub(channel)
 
+    async def _subscribe(self, method: Callable[[ServerManagerStub], Callable], request_factory, from_offset):
+        """
+        Read a stream of batches over one long-lived channel, and reconnect with backoff if the connection is lost.
+        It resumes from the offset after the last batch consumed by the caller, so nothing is lost or repeated.
+        """
+        delay = self.RECONNECT_DELAY
+        while True:
+            try:
+                async with self._channel_stub() as stub:
+                    async for batch in method(stub)(request_factory(from_offset)):
+                        delay = self.RECONNECT_DELAY
+                        if batch.lagged:  # the server closes the stream, resume from the first one missed
+                            logging.warning(f"subscription to {self.address} is closed for lagging behind, "
+                                            f"resuming from {batch.latest_offset + 1}")
+                            from_offset = batch.latest_offset + 1
+                            continue
+                        if batch.dropped:
+                            logging.warning(f"{batch.dropped} items are dropped by {self.address} for lagging behind")
+                        yield batch
+                        from_offset = batch.latest_offset + 1  # acknowledged once the caller asks for the next one
+            except grpc.aio.AioRpcError as e:
+                if e.code() not in self._RESUMABLE_CODES:
+                    raise
+                logging.warning(f"subscription to {self.address} is lost, reconnecting in {delay}s. "
+                                f"{type(e).__name__}: {e.code().name}")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.RECONNECT_MAX_DELAY)
+
     async def get_manager_status(self, verbose=False) -> ManagerStat:
         async with self._channel_stub() as stub:
             return await stub.GetManagerStatus(Ping(verbose=verbose))
@@ -50,6 +90,20 @@ class ServerManagerClient:
             save_stat: SaveStatPB2 = await stub.GetStatByName(SaveName(name=save_name))
             return json.loads(save_stat.stat_json)
 
+    async def query_saves(self, sort_by: Literal['play_time', 'mtime', 'name', 'version'] = 'play_time',
+                          descending=False, *, version: str = None, scenario: str = None, mod_name: str = None,
+                          offset=0, limit=0) -> SaveQueryResult:
+        async with self._channel_stub() as stub:
+            return await stub.QuerySaves(SaveQuery(
+                sort_by=SaveQuery.SortKey.Value(sort_by.upper()), descending=descending,
+                version=version, scenario=scenario, mod_name=mod_name, offset=offset, limit=limit
+            ))
+
+    async def scan_saves(self) -> AsyncIterator[SaveSummary]:
+        async with self._channel_stub() as stub:
+            async for summary in stub.ScanSaves(Empty()):
+                yield summary
+
     async def start_server_by_name(self, save_name: str, extra_args: Sequence[str] = None) -> Status:
         async with self._channel_stub() as stub:
             server_options = ServerOptions(save_name=SaveName(name=save_name))
@@ -77,16 +131,60 @@ class ServerManagerClient:
             status: StatusPB2 = await stub.InGameCommand(Command(cmd=cmd))
             return {"code": status.code, "message": status.message}
 
-    async def get_message(self, from_offset=None) -> tuple[int, Sequence[bytes]]:
+    async def capture_command(self, cmd: str, timeout: float = None) -> tuple[Status, Sequence[bytes]]:
+        """run the command and get the lines of its output"""
+        async with self._channel_stub() as stub:
+            output: CommandOutput = await stub.CaptureCommand(Command(cmd=cmd, timeout=timeout))
+            return {"code": output.status.code, "message": output.status.message}, output.lines
+
+    async def get_message(self, from_offset=None, max_batch=None) -> tuple[int, Sequence[bytes]]:
         async with self._channel_stub() as stub:
-            update: GameUpdates = await stub.WaitForUpdates(UpdateInquiry(from_offset=from_offset))
+            update: GameUpdates = await stub.WaitForUpdates(UpdateInquiry(from_offset=from_offset, max_batch=max_batch))
             return update.latest_offset, update.updates
 
+    async def subscribe_updates(self, from_offset=None, max_batch=None, overflow: OverflowPolicyName = 'default'
+                                ) -> AsyncIterator[tuple[int, Sequence[bytes]]]:
+        """
+        Keep yielding the new messages from the offset, like calling get_message in a loop.
+        The overflow policy decides what the server does if the caller is too slow to read them.
+        """
+        policy = OverflowPolicy.Value(overflow.upper().replace('-', '_'))
+        async for update in self._subscribe(
+                lambda stub: stub.SubscribeUpdates,
+                lambda offset: UpdateInquiry(from_offset=offset, max_batch=max_batch, overflow=policy), from_offset):
+            yield update.latest_offset, update.updates
+
+    async def get_game_events(self, from_offset=None, kinds: Sequence[str] = (),
+                              max_batch=None) -> tuple[int, Sequence[GameEvent]]:
+        """wait for the game events parsed by the server, only the kinds (all if empty) are returned"""
+        async with self._channel_stub() as stub:
+            result: GameEvents = await stub.GetGameEvents(EventInquiry(from_offset=from_offset, kinds=kinds,
+                                                                       max_batch=max_batch))
+            return result.latest_offset, result.events
+
+    async def subscribe_game_events(self, from_offset=None, kinds: Sequence[str] = (), max_batch=None,
+                                    overflow: OverflowPolicyName = 'default'
+                                    ) -> AsyncIterator[tuple[int, Sequence[GameEvent]]]:
+        """keep yielding the new game events from the offset, like calling get_game_events in a loop"""
+        policy = OverflowPolicy.Value(overflow.upper().replace('-', '_'))
+        async for result in self._subscribe(
+                lambda stub: stub.SubscribeGameEvents,
+                lambda offset: EventInquiry(from_offset=offset, kinds=kinds, max_batch=max_batch, overflow=policy),
+                from_offset):
+            yield result.latest_offset, result.events
+
     async def get_output_streams(self) -> dict[Literal['stdout', 'stderr'], bytes]:
         async with self._channel_stub() as stub:
             streams: OutputStreams = await stub.GetOutputStreams(Empty())
             return {'stdout': streams.stdout, 'stderr': streams.stderr}
 
+    async def get_resource_stats(self) -> tuple[Status, dict[str, Sequence[ResourcePoint]]]:
+        """the resource usage of the server in the windows by name (minute, hour and day)"""
+        async with self._channel_stub() as stub:
+            stats: ResourceStats = await stub.GetResourceStats(Empty())
+            return ({"code": stats.status.code, "message": stats.status.message},
+                    {window.name: window.points for window in stats.windows})
+
     async def upload_to_telegram(self, save_name: str, session_string: str,
                                  chat_id: int, reply_id: Optional[int] = None) -> AsyncIterator[Status]:
         async with self._channel_stub() as stub:
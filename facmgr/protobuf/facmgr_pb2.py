@@ -25,39 +25,73 @@ _sym_db = _symbol_database.Default()
 from google.protobuf import empty_pb2 as google_dot_protobuf_dot_empty__pb2
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x1c\x66\x61\x63mgr/protobuf/facmgr.proto\x12\x0f\x66\x61\x63torio_server\x1a\x1bgoogle/protobuf/empty.proto\"\x17\n\x04Ping\x12\x0f\n\x07verbose\x18\x01 \x01(\x08\"\xa2\x01\n\x0bManagerStat\x12\x0f\n\x07welcome\x18\x01 \x01(\t\x12\x0f\n\x07running\x18\x02 \x01(\x08\x12\x19\n\x0cgame_version\x18\x03 \x01(\tH\x00\x88\x01\x01\x12\x34\n\x0c\x63urrent_save\x18\x04 \x01(\x0b\x32\x19.factorio_server.SaveNameH\x01\x88\x01\x01\x42\x0f\n\r_game_versionB\x0f\n\r_current_save\"<\n\x0cSaveNameList\x12,\n\tsave_name\x18\x01 \x03(\x0b\x32\x19.factorio_server.SaveName\"\x18\n\x08SaveName\x12\x0c\n\x04name\x18\x01 \x01(\t\"\x1d\n\x08SaveStat\x12\x11\n\tstat_json\x18\x01 \x01(\t\"d\n\rServerOptions\x12\x31\n\tsave_name\x18\x01 \x01(\x0b\x32\x19.factorio_server.SaveNameH\x00\x88\x01\x01\x12\x12\n\nextra_args\x18\x02 \x03(\tB\x0c\n\n_save_name\"\'\n\x06Status\x12\x0c\n\x04\x63ode\x18\x01 \x01(\x05\x12\x0f\n\x07message\x18\x02 \x01(\t\"\x16\n\x07\x43ommand\x12\x0b\n\x03\x63md\x18\x01 \x01(\t\"9\n\rUpdateInquiry\x12\x18\n\x0b\x66rom_offset\x18\x01 \x01(\x05H\x00\x88\x01\x01\x42\x0e\n\x0c_from_offset\"5\n\x0bGameUpdates\x12\x15\n\rlatest_offset\x18\x01 \x01(\x05\x12\x0f\n\x07updates\x18\x02 \x03(\x0c\"/\n\rOutputStreams\x12\x0e\n\x06stdout\x18\x01 \x01(\x0c\x12\x0e\n\x06stderr\x18\x02 \x01(\x0c\"]\n\x0eTelegramClient\x12\x16\n\x0esession_string\x18\x01 \x01(\t\x12\x0f\n\x07\x63hat_id\x18\x02 \x01(\x03\x12\x15\n\x08reply_id\x18\x03 \x01(\x03H\x00\x88\x01\x01\x42\x0b\n\t_reply_id\"s\n\x12UploadTelegramInfo\x12,\n\tsave_name\x18\x01 \x01(\x0b\x32\x19.factorio_server.SaveName\x12/\n\x06\x63lient\x18\x02 \x01(\x0b\x32\x1f.factorio_server.TelegramClient2\xf3\x05\n\rServerManager\x12G\n\x10GetManagerStatus\x12\x15.factorio_server.Ping\x1a\x1c.factorio_server.ManagerStat\x12G\n\x0eGetAllSaveName\x12\x16.google.protobuf.Empty\x1a\x1d.factorio_server.SaveNameList\x12\x45\n\rGetStatByName\x12\x19.factorio_server.SaveName\x1a\x19.factorio_server.SaveStat\x12=\n\nStopServer\x12\x16.google.protobuf.Empty\x1a\x17.factorio_server.Status\x12L\n\x11StartServerByName\x12\x1e.factorio_server.ServerOptions\x1a\x17.factorio_server.Status\x12H\n\rRestartServer\x12\x1e.factorio_server.ServerOptions\x1a\x17.factorio_server.Status\x12\x42\n\rInGameCommand\x12\x18.factorio_server.Command\x1a\x17.factorio_server.Status\x12N\n\x0eWaitForUpdates\x12\x1e.factorio_server.UpdateInquiry\x1a\x1c.factorio_server.GameUpdates\x12J\n\x10GetOutputStreams\x12\x16.google.protobuf.Empty\x1a\x1e.factorio_server.OutputStreams\x12R\n\x10UploadToTelegram\x12#.factorio_server.UploadTelegramInfo\x1a\x17.factorio_server.Status0\x01\x62\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x1c\x66\x61\x63mgr/protobuf/facmgr.proto\x12\x0f\x66\x61\x63torio_server\x1a\x1bgoogle/protobuf/empty.proto\"\x17\n\x04Ping\x12\x0f\n\x07verbose\x18\x01 \x01(\x08\"\xa3\x03\n\x0bManagerStat\x12\x0f\n\x07welcome\x18\x01 \x01(\t\x12\x0f\n\x07running\x18\x02 \x01(\x08\x12\x19\n\x0cgame_version\x18\x03 \x01(\tH\x00\x88\x01\x01\x12\x34\n\x0c\x63urrent_save\x18\x04 \x01(\x0b\x32\x19.factorio_server.SaveNameH\x01\x88\x01\x01\x12/\n\x0bsaves_cache\x18\x05 \x01(\x0b\x32\x1a.factorio_server.CacheStat\x12\x31\n\x0coutput_stats\x18\x06 \x03(\x0b\x32\x1b.factorio_server.OutputStat\x12\x34\n\x0bsubscribers\x18\x07 \x03(\x0b\x32\x1f.factorio_server.SubscriberStat\x12.\n\x08\x63ommands\x18\x08 \x01(\x0b\x32\x1c.factorio_server.CommandStat\x12,\n\x04rcon\x18\t \x01(\x0b\x32\x19.factorio_server.RconStatH\x02\x88\x01\x01\x42\x0f\n\r_game_versionB\x0f\n\r_current_saveB\x07\n\x05_rcon\"\\\n\tCacheStat\x12\x0c\n\x04hits\x18\x01 \x01(\x04\x12\x0e\n\x06misses\x18\x02 \x01(\x04\x12\x11\n\tevictions\x18\x03 \x01(\x04\x12\x0f\n\x07\x65ntries\x18\x04 \x01(\r\x12\r\n\x05\x62ytes\x18\x05 \x01(\x04\"h\n\nOutputStat\x12\x0e\n\x06stream\x18\x01 \x01(\t\x12\r\n\x05lines\x18\x02 \x01(\x04\x12\r\n\x05\x62ytes\x18\x03 \x01(\x04\x12\x15\n\rlines_per_sec\x18\x04 \x01(\x01\x12\x15\n\rbytes_per_sec\x18\x05 \x01(\x01\"\x94\x01\n\x0b\x43ommandStat\x12\x0f\n\x07pending\x18\x01 \x01(\r\x12\x15\n\rpending_bytes\x18\x02 \x01(\x04\x12\x10\n\x08\x63ommands\x18\x03 \x01(\x04\x12\x0e\n\x06writes\x18\x04 \x01(\x04\x12\x10\n\x08rejected\x18\x05 \x01(\x04\x12\x14\n\x0cmean_latency\x18\x06 \x01(\x01\x12\x13\n\x0bmax_latency\x18\x07 \x01(\x01\"h\n\x08RconStat\x12\x13\n\x0b\x63onnections\x18\x01 \x01(\r\x12\x0f\n\x07pending\x18\x02 \x01(\r\x12\x10\n\x08\x63ommands\x18\x03 \x01(\x04\x12\x0e\n\x06\x65rrors\x18\x04 \x01(\x04\x12\x14\n\x0cmean_latency\x18\x05 \x01(\x01\"\x7f\n\x0eSubscriberStat\x12\x0e\n\x06stream\x18\x01 \x01(\t\x12\x0c\n\x04name\x18\x02 \x01(\t\x12\x0e\n\x06policy\x18\x03 \x01(\t\x12\x0e\n\x06queued\x18\x04 \x01(\x04\x12\x0b\n\x03lag\x18\x05 \x01(\x04\x12\x0f\n\x07\x64ropped\x18\x06 \x01(\x04\x12\x11\n\tdelivered\x18\x07 \x01(\x04\"<\n\x0cSaveNameList\x12,\n\tsave_name\x18\x01 \x03(\x0b\x32\x19.factorio_server.SaveName\"\x18\n\x08SaveName\x12\x0c\n\x04name\x18\x01 \x01(\t\"\x1d\n\x08SaveStat\x12\x11\n\tstat_json\x18\x01 \x01(\t\"\x99\x02\n\tSaveQuery\x12\x33\n\x07sort_by\x18\x01 \x01(\x0e\x32\".factorio_server.SaveQuery.SortKey\x12\x12\n\ndescending\x18\x02 \x01(\x08\x12\x14\n\x07version\x18\x03 \x01(\tH\x00\x88\x01\x01\x12\x15\n\x08scenario\x18\x04 \x01(\tH\x01\x88\x01\x01\x12\x15\n\x08mod_name\x18\x05 \x01(\tH\x02\x88\x01\x01\x12\x0e\n\x06offset\x18\x06 \x01(\r\x12\r\n\x05limit\x18\x07 \x01(\r\":\n\x07SortKey\x12\r\n\tPLAY_TIME\x10\x00\x12\t\n\x05MTIME\x10\x01\x12\x08\n\x04NAME\x10\x02\x12\x0b\n\x07VERSION\x10\x03\x42\n\n\x08_versionB\x0b\n\t_scenarioB\x0b\n\t_mod_name\"\xae\x01\n\x0bSaveSummary\x12\x0c\n\x04name\x18\x01 \x01(\t\x12\x0f\n\x07version\x18\x02 \x01(\t\x12\x10\n\x08scenario\x18\x03 \x01(\t\x12\x17\n\nplay_ticks\x18\x04 \x01(\x04H\x00\x88\x01\x01\x12\x13\n\x0btotal_ticks\x18\x05 \x01(\x04\x12\x10\n\x08mtime_ns\x18\x06 \x01(\x03\x12\x0c\n\x04size\x18\x07 \x01(\x04\x12\x11\n\tmod_count\x18\x08 \x01(\rB\r\n\x0b_play_ticks\"M\n\x0fSaveQueryResult\x12\r\n\x05total\x18\x01 \x01(\r\x12+\n\x05saves\x18\x02 \x03(\x0b\x32\x1c.factorio_server.SaveSummary\"d\n\rServerOptions\x12\x31\n\tsave_name\x18\x01 \x01(\x0b\x32\x19.factorio_server.SaveNameH\x00\x88\x01\x01\x12\x12\n\nextra_args\x18\x02 \x03(\tB\x0c\n\n_save_name\"\'\n\x06Status\x12\x0c\n\x04\x63ode\x18\x01 \x01(\x05\x12\x0f\n\x07message\x18\x02 \x01(\t\"8\n\x07\x43ommand\x12\x0b\n\x03\x63md\x18\x01 \x01(\t\x12\x14\n\x07timeout\x18\x02 \x01(\x01H\x00\x88\x01\x01\x42\n\n\x08_timeout\"G\n\rCommandOutput\x12\'\n\x06status\x18\x01 \x01(\x0b\x32\x17.factorio_server.Status\x12\r\n\x05lines\x18\x02 \x03(\x0c\"\x92\x01\n\rUpdateInquiry\x12\x18\n\x0b\x66rom_offset\x18\x01 \x01(\x03H\x00\x88\x01\x01\x12\x16\n\tmax_batch\x18\x02 \x01(\x05H\x01\x88\x01\x01\x12\x31\n\x08overflow\x18\x03 \x01(\x0e\x32\x1f.factorio_server.OverflowPolicyB\x0e\n\x0c_from_offsetB\x0c\n\n_max_batch\"V\n\x0bGameUpdates\x12\x15\n\rlatest_offset\x18\x01 \x01(\x03\x12\x0f\n\x07updates\x18\x02 \x03(\x0c\x12\x0f\n\x07\x64ropped\x18\x03 \x01(\x04\x12\x0e\n\x06lagged\x18\x04 \x01(\x08\"\xa0\x01\n\x0c\x45ventInquiry\x12\x18\n\x0b\x66rom_offset\x18\x01 \x01(\x03H\x00\x88\x01\x01\x12\r\n\x05kinds\x18\x02 \x03(\t\x12\x16\n\tmax_batch\x18\x03 \x01(\x05H\x01\x88\x01\x01\x12\x31\n\x08overflow\x18\x04 \x01(\x0e\x32\x1f.factorio_server.OverflowPolicyB\x0e\n\x0c_from_offsetB\x0c\n\n_max_batch\"Z\n\tGameEvent\x12\x0e\n\x06offset\x18\x01 \x01(\x03\x12\x11\n\ttimestamp\x18\x02 \x01(\t\x12\x0c\n\x04kind\x18\x03 \x01(\t\x12\x0e\n\x06player\x18\x04 \x01(\t\x12\x0c\n\x04\x62ody\x18\x05 \x01(\t\"p\n\nGameEvents\x12\x15\n\rlatest_offset\x18\x01 \x01(\x03\x12*\n\x06\x65vents\x18\x02 \x03(\x0b\x32\x1a.factorio_server.GameEvent\x12\x0f\n\x07\x64ropped\x18\x03 \x01(\x04\x12\x0e\n\x06lagged\x18\x04 \x01(\x08\"/\n\rOutputStreams\x12\x0e\n\x06stdout\x18\x01 \x01(\x0c\x12\x0e\n\x06stderr\x18\x02 \x01(\x0c\"\x9a\x01\n\rResourcePoint\x12\x0c\n\x04time\x18\x01 \x01(\x01\x12\x13\n\x0b\x63pu_percent\x18\x02 \x01(\x01\x12\x0b\n\x03rss\x18\x03 \x01(\x04\x12\x1a\n\x12read_bytes_per_sec\x18\x04 \x01(\x01\x12\x1b\n\x13write_bytes_per_sec\x18\x05 \x01(\x01\x12\x0f\n\x07threads\x18\x06 \x01(\r\x12\x0f\n\x07samples\x18\x07 \x01(\r\"N\n\x0eResourceWindow\x12\x0c\n\x04name\x18\x01 \x01(\t\x12.\n\x06points\x18\x02 \x03(\x0b\x32\x1e.factorio_server.ResourcePoint\"|\n\rResourceStats\x12\'\n\x06status\x18\x01 \x01(\x0b\x32\x17.factorio_server.Status\x12\x10\n\x08interval\x18\x02 \x01(\x01\x12\x30\n\x07windows\x18\x03 \x03(\x0b\x32\x1f.factorio_server.ResourceWindow\"]\n\x0eTelegramClient\x12\x16\n\x0esession_string\x18\x01 \x01(\t\x12\x0f\n\x07\x63hat_id\x18\x02 \x01(\x03\x12\x15\n\x08reply_id\x18\x03 \x01(\x03H\x00\x88\x01\x01\x42\x0b\n\t_reply_id\"s\n\x12UploadTelegramInfo\x12,\n\tsave_name\x18\x01 \x01(\x0b\x32\x19.factorio_server.SaveName\x12/\n\x06\x63lient\x18\x02 \x01(\x0b\x32\x1f.factorio_server.TelegramClient*L\n\x0eOverflowPolicy\x12\x0b\n\x07\x44\x45\x46\x41ULT\x10\x00\x12\x0f\n\x0b\x44ROP_OLDEST\x10\x01\x12\x0c\n\x08\x43OALESCE\x10\x02\x12\x0e\n\nDISCONNECT\x10\x03\x32\x92\n\n\rServerManager\x12G\n\x10GetManagerStatus\x12\x15.factorio_server.Ping\x1a\x1c.factorio_server.ManagerStat\x12G\n\x0eGetAllSaveName\x12\x16.google.protobuf.Empty\x1a\x1d.factorio_server.SaveNameList\x12\x45\n\rGetStatByName\x12\x19.factorio_server.SaveName\x1a\x19.factorio_server.SaveStat\x12J\n\nQuerySaves\x12\x1a.factorio_server.SaveQuery\x1a .factorio_server.SaveQueryResult\x12\x43\n\tScanSaves\x12\x16.google.protobuf.Empty\x1a\x1c.factorio_server.SaveSummary0\x01\x12=\n\nStopServer\x12\x16.google.protobuf.Empty\x1a\x17.factorio_server.Status\x12L\n\x11StartServerByName\x12\x1e.factorio_server.ServerOptions\x1a\x17.factorio_server.Status\x12H\n\rRestartServer\x12\x1e.factorio_server.ServerOptions\x1a\x17.factorio_server.Status\x12\x42\n\rInGameCommand\x12\x18.factorio_server.Command\x1a\x17.factorio_server.Status\x12J\n\x0e\x43\x61ptureCommand\x12\x18.factorio_server.Command\x1a\x1e.factorio_server.CommandOutput\x12N\n\x0eWaitForUpdates\x12\x1e.factorio_server.UpdateInquiry\x1a\x1c.factorio_server.GameUpdates\x12K\n\rGetGameEvents\x12\x1d.factorio_server.EventInquiry\x1a\x1b.factorio_server.GameEvents\x12R\n\x10SubscribeUpdates\x12\x1e.factorio_server.UpdateInquiry\x1a\x1c.factorio_server.GameUpdates0\x01\x12S\n\x13SubscribeGameEvents\x12\x1d.factorio_server.EventInquiry\x1a\x1b.factorio_server.GameEvents0\x01\x12J\n\x10GetOutputStreams\x12\x16.google.protobuf.Empty\x1a\x1e.factorio_server.OutputStreams\x12J\n\x10GetResourceStats\x12\x16.google.protobuf.Empty\x1a\x1e.factorio_server.ResourceStats\x12R\n\x10UploadToTelegram\x12#.factorio_server.UploadTelegramInfo\x1a\x17.factorio_server.Status0\x01\x62\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
 _builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'facmgr.protobuf.facmgr_pb2', _globals)
 if not _descriptor._USE_C_DESCRIPTORS:
   DESCRIPTOR._loaded_options = None
+  _globals['_OVERFLOWPOLICY']._serialized_start=3274
+  _globals['_OVERFLOWPOLICY']._serialized_end=3350
   _globals['_PING']._serialized_start=78
   _globals['_PING']._serialized_end=101
   _globals['_MANAGERSTAT']._serialized_start=104
-  _globals['_MANAGERSTAT']._serialized_end=266
-  _globals['_SAVENAMELIST']._serialized_start=268
-  _globals['_SAVENAMELIST']._serialized_end=328
-  _globals['_SAVENAME']._serialized_start=330
-  _globals['_SAVENAME']._serialized_end=354
-  _globals['_SAVESTAT']._serialized_start=356
-  _globals['_SAVESTAT']._serialized_end=385
-  _globals['_SERVEROPTIONS']._serialized_start=387
-  _globals['_SERVEROPTIONS']._serialized_end=487
-  _globals['_STATUS']._serialized_start=489
-  _globals['_STATUS']._serialized_end=528
-  _globals['_COMMAND']._serialized_start=530
-  _globals['_COMMAND']._serialized_end=552
-  _globals['_UPDATEINQUIRY']._serialized_start=554
-  _globals['_UPDATEINQUIRY']._serialized_end=611
-  _globals['_GAMEUPDATES']._serialized_start=613
-  _globals['_GAMEUPDATES']._serialized_end=666
-  _globals['_OUTPUTSTREAMS']._serialized_start=668
-  _globals['_OUTPUTSTREAMS']._serialized_end=715
-  _globals['_TELEGRAMCLIENT']._serialized_start=717
-  _globals['_TELEGRAMCLIENT']._serialized_end=810
-  _globals['_UPLOADTELEGRAMINFO']._serialized_start=812
-  _globals['_UPLOADTELEGRAMINFO']._serialized_end=927
-  _globals['_SERVERMANAGER']._serialized_start=930
-  _globals['_SERVERMANAGER']._serialized_end=1685
+  _globals['_MANAGERSTAT']._serialized_end=523
+  _globals['_CACHESTAT']._serialized_start=525
+  _globals['_CACHESTAT']._serialized_end=617
+  _globals['_OUTPUTSTAT']._serialized_start=619
+  _globals['_OUTPUTSTAT']._serialized_end=723
+  _globals['_COMMANDSTAT']._serialized_start=726
+  _globals['_COMMANDSTAT']._serialized_end=874
+  _globals['_RCONSTAT']._serialized_start=876
+  _globals['_RCONSTAT']._serialized_end=980
+  _globals['_SUBSCRIBERSTAT']._serialized_start=982
+  _globals['_SUBSCRIBERSTAT']._serialized_end=1109
+  _globals['_SAVENAMELIST']._serialized_start=1111
+  _globals['_SAVENAMELIST']._serialized_end=1171
+  _globals['_SAVENAME']._serialized_start=1173
+  _globals['_SAVENAME']._serialized_end=1197
+  _globals['_SAVESTAT']._serialized_start=1199
+  _globals['_SAVESTAT']._serialized_end=1228
+  _globals['_SAVEQUERY']._serialized_start=1231
+  _globals['_SAVEQUERY']._serialized_end=1512
+  _globals['_SAVEQUERY_SORTKEY']._serialized_start=1416
+  _globals['_SAVEQUERY_SORTKEY']._serialized_end=1474
+  _globals['_SAVESUMMARY']._serialized_start=1515
+  _globals['_SAVESUMMARY']._serialized_end=1689
+  _globals['_SAVEQUERYRESULT']._serialized_start=1691
+  _globals['_SAVEQUERYRESULT']._serialized_end=1768
+  _globals['_SERVEROPTIONS']._serialized_start=1770
+  _globals['_SERVEROPTIONS']._serialized_end=1870
+  _globals['_STATUS']._serialized_start=1872
+  _globals['_STATUS']._serialized_end=1911
+  _globals['_COMMAND']._serialized_start=1913
+  _globals['_COMMAND']._serialized_end=1969
+  _globals['_COMMANDOUTPUT']._serialized_start=1971
+  _globals['_COMMANDOUTPUT']._serialized_end=2042
+  _globals['_UPDATEINQUIRY']._serialized_start=2045
+  _globals['_UPDATEINQUIRY']._serialized_end=2191
+  _globals['_GAMEUPDATES']._serialized_start=2193
+  _globals['_GAMEUPDATES']._serialized_end=2279
+  _globals['_EVENTINQUIRY']._serialized_start=2282
+  _globals['_EVENTINQUIRY']._serialized_end=2442
+  _globals['_GAMEEVENT']._serialized_start=2444
+  _globals['_GAMEEVENT']._serialized_end=2534
+  _globals['_GAMEEVENTS']._serialized_start=2536
+  _globals['_GAMEEVENTS']._serialized_end=2648
+  _globals['_OUTPUTSTREAMS']._serialized_start=2650
+  _globals['_OUTPUTSTREAMS']._serialized_end=2697
+  _globals['_RESOURCEPOINT']._serialized_start=2700
+  _globals['_RESOURCEPOINT']._serialized_end=2854
+  _globals['_RESOURCEWINDOW']._serialized_start=2856
+  _globals['_RESOURCEWINDOW']._serialized_end=2934
+  _globals['_RESOURCESTATS']._serialized_start=2936
+  _globals['_RESOURCESTATS']._serialized_end=3060
+  _globals['_TELEGRAMCLIENT']._serialized_start=3062
+  _globals['_TELEGRAMCLIENT']._serialized_end=3155
+  _globals['_UPLOADTELEGRAMINFO']._serialized_start=3157
+  _globals['_UPLOADTELEGRAMINFO']._serialized_end=3272
+  _globals['_SERVERMANAGER']._serialized_start=3353
+  _globals['_SERVERMANAGER']._serialized_end=4651
 # @@protoc_insertion_point(module_scope)
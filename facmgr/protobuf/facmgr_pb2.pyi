@@ -1,5 +1,6 @@
 from google.protobuf import empty_pb2 as _empty_pb2
 from google.protobuf.internal import containers as _containers
+from google.protobuf.internal import enum_type_wrapper as _enum_type_wrapper
 from google.protobuf import descriptor as _descriptor
 from google.protobuf import message as _message
 from collections.abc import Iterable as _Iterable, Mapping as _Mapping
@@ -7,6 +8,17 @@ from typing import ClassVar as _ClassVar, Optional as _Optional, Union as _Union
 
 DESCRIPTOR: _descriptor.FileDescriptor
 
+class OverflowPolicy(int, metaclass=_enum_type_wrapper.EnumTypeWrapper):
+    __slots__ = ()
+    DEFAULT: _ClassVar[OverflowPolicy]
+    DROP_OLDEST: _ClassVar[OverflowPolicy]
+    COALESCE: _ClassVar[OverflowPolicy]
+    DISCONNECT: _ClassVar[OverflowPolicy]
+DEFAULT: OverflowPolicy
+DROP_OLDEST: OverflowPolicy
+COALESCE: OverflowPolicy
+DISCONNECT: OverflowPolicy
+
 class Ping(_message.Message):
     __slots__ = ("verbose",)
     VERBOSE_FIELD_NUMBER: _ClassVar[int]
@@ -14,16 +26,104 @@ class Ping(_message.Message):
     def __init__(self, verbose: bool = ...) -> None: ...
 
 class ManagerStat(_message.Message):
-    __slots__ = ("welcome", "running", "game_version", "current_save")
+    __slots__ = ("welcome", "running", "game_version", "current_save", "saves_cache", "output_stats", "subscribers", "commands", "rcon")
     WELCOME_FIELD_NUMBER: _ClassVar[int]
     RUNNING_FIELD_NUMBER: _ClassVar[int]
     GAME_VERSION_FIELD_NUMBER: _ClassVar[int]
     CURRENT_SAVE_FIELD_NUMBER: _ClassVar[int]
+    SAVES_CACHE_FIELD_NUMBER: _ClassVar[int]
+    OUTPUT_STATS_FIELD_NUMBER: _ClassVar[int]
+    SUBSCRIBERS_FIELD_NUMBER: _ClassVar[int]
+    COMMANDS_FIELD_NUMBER: _ClassVar[int]
+    RCON_FIELD_NUMBER: _ClassVar[int]
     welcome: str
     running: bool
     game_version: str
     current_save: SaveName
-    def __init__(self, welcome: _Optional[str] = ..., running: bool = ..., game_version: _Optional[str] = ..., current_save: _Optional[_Union[SaveName, _Mapping]] = ...) -> None: ...
+    saves_cache: CacheStat
+    output_stats: _containers.RepeatedCompositeFieldContainer[OutputStat]
+    subscribers: _containers.RepeatedCompositeFieldContainer[SubscriberStat]
+    commands: CommandStat
+    rcon: RconStat
+    def __init__(self, welcome: _Optional[str] = ..., running: bool = ..., game_version: _Optional[str] = ..., current_save: _Optional[_Union[SaveName, _Mapping]] = ..., saves_cache: _Optional[_Union[CacheStat, _Mapping]] = ..., output_stats: _Optional[_Iterable[_Union[OutputStat, _Mapping]]] = ..., subscribers: _Optional[_Iterable[_Union[SubscriberStat, _Mapping]]] = ..., commands: _Optional[_Union[CommandStat, _Mapping]] = ..., rcon: _Optional[_Union[RconStat, _Mapping]] = ...) -> None: ...
+
+class CacheStat(_message.Message):
+    __slots__ = ("hits", "misses", "evictions", "entries", "bytes")
+    HITS_FIELD_NUMBER: _ClassVar[int]
+    MISSES_FIELD_NUMBER: _ClassVar[int]
+    EVICTIONS_FIELD_NUMBER: _ClassVar[int]
+    ENTRIES_FIELD_NUMBER: _ClassVar[int]
+    BYTES_FIELD_NUMBER: _ClassVar[int]
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    bytes: int
+    def __init__(self, hits: _Optional[int] = ..., misses: _Optional[int] = ..., evictions: _Optional[int] = ..., entries: _Optional[int] = ..., bytes: _Optional[int] = ...) -> None: ...
+
+class OutputStat(_message.Message):
+    __slots__ = ("stream", "lines", "bytes", "lines_per_sec", "bytes_per_sec")
+    STREAM_FIELD_NUMBER: _ClassVar[int]
+    LINES_FIELD_NUMBER: _ClassVar[int]
+    BYTES_FIELD_NUMBER: _ClassVar[int]
+    LINES_PER_SEC_FIELD_NUMBER: _ClassVar[int]
+    BYTES_PER_SEC_FIELD_NUMBER: _ClassVar[int]
+    stream: str
+    lines: int
+    bytes: int
+    lines_per_sec: float
+    bytes_per_sec: float
+    def __init__(self, stream: _Optional[str] = ..., lines: _Optional[int] = ..., bytes: _Optional[int] = ..., lines_per_sec: _Optional[float] = ..., bytes_per_sec: _Optional[float] = ...) -> None: ...
+
+class CommandStat(_message.Message):
+    __slots__ = ("pending", "pending_bytes", "commands", "writes", "rejected", "mean_latency", "max_latency")
+    PENDING_FIELD_NUMBER: _ClassVar[int]
+    PENDING_BYTES_FIELD_NUMBER: _ClassVar[int]
+    COMMANDS_FIELD_NUMBER: _ClassVar[int]
+    WRITES_FIELD_NUMBER: _ClassVar[int]
+    REJECTED_FIELD_NUMBER: _ClassVar[int]
+    MEAN_LATENCY_FIELD_NUMBER: _ClassVar[int]
+    MAX_LATENCY_FIELD_NUMBER: _ClassVar[int]
+    pending: int
+    pending_bytes: int
+    commands: int
+    writes: int
+    rejected: int
+    mean_latency: float
+    max_latency: float
+    def __init__(self, pending: _Optional[int] = ..., pending_bytes: _Optional[int] = ..., commands: _Optional[int] = ..., writes: _Optional[int] = ..., rejected: _Optional[int] = ..., mean_latency: _Optional[float] = ..., max_latency: _Optional[float] = ...) -> None: ...
+
+class RconStat(_message.Message):
+    __slots__ = ("connections", "pending", "commands", "errors", "mean_latency")
+    CONNECTIONS_FIELD_NUMBER: _ClassVar[int]
+    PENDING_FIELD_NUMBER: _ClassVar[int]
+    COMMANDS_FIELD_NUMBER: _ClassVar[int]
+    ERRORS_FIELD_NUMBER: _ClassVar[int]
+    MEAN_LATENCY_FIELD_NUMBER: _ClassVar[int]
+    connections: int
+    pending: int
+    commands: int
+    errors: int
+    mean_latency: float
+    def __init__(self, connections: _Optional[int] = ..., pending: _Optional[int] = ..., commands: _Optional[int] = ..., errors: _Optional[int] = ..., mean_latency: _Optional[float] = ...) -> None: ...
+
+class SubscriberStat(_message.Message):
+    __slots__ = ("stream", "name", "policy", "queued", "lag", "dropped", "delivered")
+    STREAM_FIELD_NUMBER: _ClassVar[int]
+    NAME_FIELD_NUMBER: _ClassVar[int]
+    POLICY_FIELD_NUMBER: _ClassVar[int]
+    QUEUED_FIELD_NUMBER: _ClassVar[int]
+    LAG_FIELD_NUMBER: _ClassVar[int]
+    DROPPED_FIELD_NUMBER: _ClassVar[int]
+    DELIVERED_FIELD_NUMBER: _ClassVar[int]
+    stream: str
+    name: str
+    policy: str
+    queued: int
+    lag: int
+    dropped: int
+    delivered: int
+    def __init__(self, stream: _Optional[str] = ..., name: _Optional[str] = ..., policy: _Optional[str] = ..., queued: _Optional[int] = ..., lag: _Optional[int] = ..., dropped: _Optional[int] = ..., delivered: _Optional[int] = ...) -> None: ...
 
 class SaveNameList(_message.Message):
     __slots__ = ("save_name",)
@@ -43,6 +143,62 @@ class SaveStat(_message.Message):
     stat_json: str
     def __init__(self, stat_json: _Optional[str] = ...) -> None: ...
 
+class SaveQuery(_message.Message):
+    __slots__ = ("sort_by", "descending", "version", "scenario", "mod_name", "offset", "limit")
+    class SortKey(int, metaclass=_enum_type_wrapper.EnumTypeWrapper):
+        __slots__ = ()
+        PLAY_TIME: _ClassVar[SaveQuery.SortKey]
+        MTIME: _ClassVar[SaveQuery.SortKey]
+        NAME: _ClassVar[SaveQuery.SortKey]
+        VERSION: _ClassVar[SaveQuery.SortKey]
+    PLAY_TIME: SaveQuery.SortKey
+    MTIME: SaveQuery.SortKey
+    NAME: SaveQuery.SortKey
+    VERSION: SaveQuery.SortKey
+    SORT_BY_FIELD_NUMBER: _ClassVar[int]
+    DESCENDING_FIELD_NUMBER: _ClassVar[int]
+    VERSION_FIELD_NUMBER: _ClassVar[int]
+    SCENARIO_FIELD_NUMBER: _ClassVar[int]
+    MOD_NAME_FIELD_NUMBER: _ClassVar[int]
+    OFFSET_FIELD_NUMBER: _ClassVar[int]
+    LIMIT_FIELD_NUMBER: _ClassVar[int]
+    sort_by: SaveQuery.SortKey
+    descending: bool
+    version: str
+    scenario: str
+    mod_name: str
+    offset: int
+    limit: int
+    def __init__(self, sort_by: _Optional[_Union[SaveQuery.SortKey, str]] = ..., descending: bool = ..., version: _Optional[str] = ..., scenario: _Optional[str] = ..., mod_name: _Optional[str] = ..., offset: _Optional[int] = ..., limit: _Optional[int] = ...) -> None: ...
+
+class SaveSummary(_message.Message):
+    __slots__ = ("name", "version", "scenario", "play_ticks", "total_ticks", "mtime_ns", "size", "mod_count")
+    NAME_FIELD_NUMBER: _ClassVar[int]
+    VERSION_FIELD_NUMBER: _ClassVar[int]
+    SCENARIO_FIELD_NUMBER: _ClassVar[int]
+    PLAY_TICKS_FIELD_NUMBER: _ClassVar[int]
+    TOTAL_TICKS_FIELD_NUMBER: _ClassVar[int]
+    MTIME_NS_FIELD_NUMBER: _ClassVar[int]
+    SIZE_FIELD_NUMBER: _ClassVar[int]
+    MOD_COUNT_FIELD_NUMBER: _ClassVar[int]
+    name: str
+    version: str
+    scenario: str
+    play_ticks: int
+    total_ticks: int
+    mtime_ns: int
+    size: int
+    mod_count: int
+    def __init__(self, name: _Optional[str] = ..., version: _Optional[str] = ..., scenario: _Optional[str] = ..., play_ticks: _Optional[int] = ..., total_ticks: _Optional[int] = ..., mtime_ns: _Optional[int] = ..., size: _Optional[int] = ..., mod_count: _Optional[int] = ...) -> None: ...
+
+class SaveQueryResult(_message.Message):
+    __slots__ = ("total", "saves")
+    TOTAL_FIELD_NUMBER: _ClassVar[int]
+    SAVES_FIELD_NUMBER: _ClassVar[int]
+    total: int
+    saves: _containers.RepeatedCompositeFieldContainer[SaveSummary]
+    def __init__(self, total: _Optional[int] = ..., saves: _Optional[_Iterable[_Union[SaveSummary, _Mapping]]] = ...) -> None: ...
+
 class ServerOptions(_message.Message):
     __slots__ = ("save_name", "extra_args")
     SAVE_NAME_FIELD_NUMBER: _ClassVar[int]
@@ -60,24 +216,80 @@ class Status(_message.Message):
     def __init__(self, code: _Optional[int] = ..., message: _Optional[str] = ...) -> None: ...
 
 class Command(_message.Message):
-    __slots__ = ("cmd",)
+    __slots__ = ("cmd", "timeout")
     CMD_FIELD_NUMBER: _ClassVar[int]
+    TIMEOUT_FIELD_NUMBER: _ClassVar[int]
     cmd: str
-    def __init__(self, cmd: _Optional[str] = ...) -> None: ...
+    timeout: float
+    def __init__(self, cmd: _Optional[str] = ..., timeout: _Optional[float] = ...) -> None: ...
+
+class CommandOutput(_message.Message):
+    __slots__ = ("status", "lines")
+    STATUS_FIELD_NUMBER: _ClassVar[int]
+    LINES_FIELD_NUMBER: _ClassVar[int]
+    status: Status
+    lines: _containers.RepeatedScalarFieldContainer[bytes]
+    def __init__(self, status: _Optional[_Union[Status, _Mapping]] = ..., lines: _Optional[_Iterable[bytes]] = ...) -> None: ...
 
 class UpdateInquiry(_message.Message):
-    __slots__ = ("from_offset",)
+    __slots__ = ("from_offset", "max_batch", "overflow")
     FROM_OFFSET_FIELD_NUMBER: _ClassVar[int]
+    MAX_BATCH_FIELD_NUMBER: _ClassVar[int]
+    OVERFLOW_FIELD_NUMBER: _ClassVar[int]
     from_offset: int
-    def __init__(self, from_offset: _Optional[int] = ...) -> None: ...
+    max_batch: int
+    overflow: OverflowPolicy
+    def __init__(self, from_offset: _Optional[int] = ..., max_batch: _Optional[int] = ..., overflow: _Optional[_Union[OverflowPolicy, str]] = ...) -> None: ...
 
 class GameUpdates(_message.Message):
-    __slots__ = ("latest_offset", "updates")
+    __slots__ = ("latest_offset", "updates", "dropped", "lagged")
     LATEST_OFFSET_FIELD_NUMBER: _ClassVar[int]
     UPDATES_FIELD_NUMBER: _ClassVar[int]
+    DROPPED_FIELD_NUMBER: _ClassVar[int]
+    LAGGED_FIELD_NUMBER: _ClassVar[int]
     latest_offset: int
     updates: _containers.RepeatedScalarFieldContainer[bytes]
-    def __init__(self, latest_offset: _Optional[int] = ..., updates: _Optional[_Iterable[bytes]] = ...) -> None: ...
+    dropped: int
+    lagged: bool
+    def __init__(self, latest_offset: _Optional[int] = ..., updates: _Optional[_Iterable[bytes]] = ..., dropped: _Optional[int] = ..., lagged: bool = ...) -> None: ...
+
+class EventInquiry(_message.Message):
+    __slots__ = ("from_offset", "kinds", "max_batch", "overflow")
+    FROM_OFFSET_FIELD_NUMBER: _ClassVar[int]
+    KINDS_FIELD_NUMBER: _ClassVar[int]
+    MAX_BATCH_FIELD_NUMBER: _ClassVar[int]
+    OVERFLOW_FIELD_NUMBER: _ClassVar[int]
+    from_offset: int
+    kinds: _containers.RepeatedScalarFieldContainer[str]
+    max_batch: int
+    overflow: OverflowPolicy
+    def __init__(self, from_offset: _Optional[int] = ..., kinds: _Optional[_Iterable[str]] = ..., max_batch: _Optional[int] = ..., overflow: _Optional[_Union[OverflowPolicy, str]] = ...) -> None: ...
+
+class GameEvent(_message.Message):
+    __slots__ = ("offset", "timestamp", "kind", "player", "body")
+    OFFSET_FIELD_NUMBER: _ClassVar[int]
+    TIMESTAMP_FIELD_NUMBER: _ClassVar[int]
+    KIND_FIELD_NUMBER: _ClassVar[int]
+    PLAYER_FIELD_NUMBER: _ClassVar[int]
+    BODY_FIELD_NUMBER: _ClassVar[int]
+    offset: int
+    timestamp: str
+    kind: str
+    player: str
+    body: str
+    def __init__(self, offset: _Optional[int] = ..., timestamp: _Optional[str] = ..., kind: _Optional[str] = ..., player: _Optional[str] = ..., body: _Optional[str] = ...) -> None: ...
+
+class GameEvents(_message.Message):
+    __slots__ = ("latest_offset", "events", "dropped", "lagged")
+    LATEST_OFFSET_FIELD_NUMBER: _ClassVar[int]
+    EVENTS_FIELD_NUMBER: _ClassVar[int]
+    DROPPED_FIELD_NUMBER: _ClassVar[int]
+    LAGGED_FIELD_NUMBER: _ClassVar[int]
+    latest_offset: int
+    events: _containers.RepeatedCompositeFieldContainer[GameEvent]
+    dropped: int
+    lagged: bool
+    def __init__(self, latest_offset: _Optional[int] = ..., events: _Optional[_Iterable[_Union[GameEvent, _Mapping]]] = ..., dropped: _Optional[int] = ..., lagged: bool = ...) -> None: ...
 
 class OutputStreams(_message.Message):
     __slots__ = ("stdout", "stderr")
@@ -87,6 +299,42 @@ class OutputStreams(_message.Message):
     stderr: bytes
     def __init__(self, stdout: _Optional[bytes] = ..., stderr: _Optional[bytes] = ...) -> None: ...
 
+class ResourcePoint(_message.Message):
+    __slots__ = ("time", "cpu_percent", "rss", "read_bytes_per_sec", "write_bytes_per_sec", "threads", "samples")
+    TIME_FIELD_NUMBER: _ClassVar[int]
+    CPU_PERCENT_FIELD_NUMBER: _ClassVar[int]
+    RSS_FIELD_NUMBER: _ClassVar[int]
+    READ_BYTES_PER_SEC_FIELD_NUMBER: _ClassVar[int]
+    WRITE_BYTES_PER_SEC_FIELD_NUMBER: _ClassVar[int]
+    THREADS_FIELD_NUMBER: _ClassVar[int]
+    SAMPLES_FIELD_NUMBER: _ClassVar[int]
+    time: float
+    cpu_percent: float
+    rss: int
+    read_bytes_per_sec: float
+    write_bytes_per_sec: float
+    threads: int
+    samples: int
+    def __init__(self, time: _Optional[float] = ..., cpu_percent: _Optional[float] = ..., rss: _Optional[int] = ..., read_bytes_per_sec: _Optional[float] = ..., write_bytes_per_sec: _Optional[float] = ..., threads: _Optional[int] = ..., samples: _Optional[int] = ...) -> None: ...
+
+class ResourceWindow(_message.Message):
+    __slots__ = ("name", "points")
+    NAME_FIELD_NUMBER: _ClassVar[int]
+    POINTS_FIELD_NUMBER: _ClassVar[int]
+    name: str
+    points: _containers.RepeatedCompositeFieldContainer[ResourcePoint]
+    def __init__(self, name: _Optional[str] = ..., points: _Optional[_Iterable[_Union[ResourcePoint, _Mapping]]] = ...) -> None: ...
+
+class ResourceStats(_message.Message):
+    __slots__ = ("status", "interval", "windows")
+    STATUS_FIELD_NUMBER: _ClassVar[int]
+    INTERVAL_FIELD_NUMBER: _ClassVar[int]
+    WINDOWS_FIELD_NUMBER: _ClassVar[int]
+    status: Status
+    interval: float
+    windows: _containers.RepeatedCompositeFieldContainer[ResourceWindow]
+    def __init__(self, status: _Optional[_Union[Status, _Mapping]] = ..., interval: _Optional[float] = ..., windows: _Optional[_Iterable[_Union[ResourceWindow, _Mapping]]] = ...) -> None: ...
+
 class TelegramClient(_message.Message):
     __slots__ = ("session_string", "chat_id", "reply_id")
     SESSION_STRING_FIELD_NUMBER: _ClassVar[int]
@@ -50,6 +50,16 @@ class ServerManagerStub(object):
                 request_serializer=facmgr_dot_protobuf_dot_facmgr__pb2.SaveName.SerializeToString,
                 response_deserializer=facmgr_dot_protobuf_dot_facmgr__pb2.SaveStat.FromString,
                 _registered_method=True)
+        self.QuerySaves = channel.unary_unary(
+                '/factorio_server.ServerManager/QuerySaves',
+                request_serializer=facmgr_dot_protobuf_dot_facmgr__pb2.SaveQuery.SerializeToString,
+                response_deserializer=facmgr_dot_protobuf_dot_facmgr__pb2.SaveQueryResult.FromString,
+                _registered_method=True)
+        self.ScanSaves = channel.unary_stream(
+                '/factorio_server.ServerManager/ScanSaves',
+                request_serializer=google_dot_protobuf_dot_empty__pb2.Empty.SerializeToString,
+                response_deserializer=facmgr_dot_protobuf_dot_facmgr__pb2.SaveSummary.FromString,
+                _registered_method=True)
         self.StopServer = channel.unary_unary(
                 '/factorio_server.ServerManager/StopServer',
                 request_serializer=google_dot_protobuf_dot_empty__pb2.Empty.SerializeToString,
@@ -70,16 +80,41 @@ class ServerManagerStub(object):
                 request_serializer=facmgr_dot_protobuf_dot_facmgr__pb2.Command.SerializeToString,
                 response_deserializer=facmgr_dot_protobuf_dot_facmgr__pb2.Status.FromString,
                 _registered_method=True)
+        self.CaptureCommand = channel.unary_unary(
+                '/factorio_server.ServerManager/CaptureCommand',
+                request_serializer=facmgr_dot_protobuf_dot_facmgr__pb2.Command.SerializeToString,
+                response_deserializer=facmgr_dot_protobuf_dot_facmgr__pb2.CommandOutput.FromString,
+                _registered_method=True)
         self.WaitForUpdates = channel.unary_unary(
                 '/factorio_server.ServerManager/WaitForUpdates',
                 request_serializer=facmgr_dot_protobuf_dot_facmgr__pb2.UpdateInquiry.SerializeToString,
                 response_deserializer=facmgr_dot_protobuf_dot_facmgr__pb2.GameUpdates.FromString,
                 _registered_method=True)
+        self.GetGameEvents = channel.unary_unary(
+                '/factorio_server.ServerManager/GetGameEvents',
+                request_serializer=facmgr_dot_protobuf_dot_facmgr__pb2.EventInquiry.SerializeToString,
+                response_deserializer=facmgr_dot_protobuf_dot_facmgr__pb2.GameEvents.FromString,
+                _registered_method=True)
+        self.SubscribeUpdates = channel.unary_stream(
+                '/factorio_server.ServerManager/SubscribeUpdates',
+                request_serializer=facmgr_dot_protobuf_dot_facmgr__pb2.UpdateInquiry.SerializeToString,
+                response_deserializer=facmgr_dot_protobuf_dot_facmgr__pb2.GameUpdates.FromString,
+                _registered_method=True)
+        self.SubscribeGameEvents = channel.unary_stream(
+                '/factorio_server.ServerManager/SubscribeGameEvents',
+                request_serializer=facmgr_dot_protobuf_dot_facmgr__pb2.EventInquiry.SerializeToString,
+                response_deserializer=facmgr_dot_protobuf_dot_facmgr__pb2.GameEvents.FromString,
+                _registered_method=True)
         self.GetOutputStreams = channel.unary_unary(
                 '/factorio_server.ServerManager/GetOutputStreams',
                 request_serializer=google_dot_protobuf_dot_empty__pb2.Empty.SerializeToString,
                 response_deserializer=facmgr_dot_protobuf_dot_facmgr__pb2.OutputStreams.FromString,
                 _registered_method=True)
+        self.GetResourceStats = channel.unary_unary(
+                '/factorio_server.ServerManager/GetResourceStats',
+                request_serializer=google_dot_protobuf_dot_empty__pb2.Empty.SerializeToString,
+                response_deserializer=facmgr_dot_protobuf_dot_facmgr__pb2.ResourceStats.FromString,
+                _registered_method=True)
         self.UploadToTelegram = channel.unary_stream(
                 '/factorio_server.ServerManager/UploadToTelegram',
                 request_serializer=facmgr_dot_protobuf_dot_facmgr__pb2.UploadTelegramInfo.SerializeToString,
@@ -108,6 +143,18 @@ class ServerManagerServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def QuerySaves(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def ScanSaves(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
     def StopServer(self, request, context):
         """Missing associated documentation comment in .proto file."""
         context.set_code(grpc.StatusCode.UNIMPLEMENTED)
@@ -127,7 +174,15 @@ class ServerManagerServicer(object):
         raise NotImplementedError('Method not implemented!')
 
     def InGameCommand(self, request, context):
-        """Missing associated documentation comment in .proto file."""
+        """the message is the response if the commands run over RCON
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def CaptureCommand(self, request, context):
+        """run the command and return its output, see FactorioServerDaemon.capture_command
+        """
         context.set_code(grpc.StatusCode.UNIMPLEMENTED)
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
@@ -138,12 +193,38 @@ class ServerManagerServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def GetGameEvents(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def SubscribeUpdates(self, request, context):
+        """keep pushing the batches from from_offset over one stream, the same as calling the long polling ones in a loop
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def SubscribeGameEvents(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
     def GetOutputStreams(self, request, context):
         """Missing associated documentation comment in .proto file."""
         context.set_code(grpc.StatusCode.UNIMPLEMENTED)
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def GetResourceStats(self, request, context):
+        """CPU, memory, I/O and threads of the server process tree in the last minute, hour and day
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
     def UploadToTelegram(self, request, context):
         """Missing associated documentation comment in .proto file."""
         context.set_code(grpc.StatusCode.UNIMPLEMENTED)
@@ -168,6 +249,16 @@ def add_ServerManagerServicer_to_server(servicer, server):
                     request_deserializer=facmgr_dot_protobuf_dot_facmgr__pb2.SaveName.FromString,
                     response_serializer=facmgr_dot_protobuf_dot_facmgr__pb2.SaveStat.SerializeToString,
             ),
+            'QuerySaves': grpc.unary_unary_rpc_method_handler(
+                    servicer.QuerySaves,
+                    request_deserializer=facmgr_dot_protobuf_dot_facmgr__pb2.SaveQuery.FromString,
+                    response_serializer=facmgr_dot_protobuf_dot_facmgr__pb2.SaveQueryResult.SerializeToString,
+            ),
+            'ScanSaves': grpc.unary_stream_rpc_method_handler(
+                    servicer.ScanSaves,
+                    request_deserializer=google_dot_protobuf_dot_empty__pb2.Empty.FromString,
+                    response_serializer=facmgr_dot_protobuf_dot_facmgr__pb2.SaveSummary.SerializeToString,
+            ),
             'StopServer': grpc.unary_unary_rpc_method_handler(
                     servicer.StopServer,
                     request_deserializer=google_dot_protobuf_dot_empty__pb2.Empty.FromString,
@@ -188,16 +279,41 @@ def add_ServerManagerServicer_to_server(servicer, server):
                     request_deserializer=facmgr_dot_protobuf_dot_facmgr__pb2.Command.FromString,
                     response_serializer=facmgr_dot_protobuf_dot_facmgr__pb2.Status.SerializeToString,
             ),
+            'CaptureCommand': grpc.unary_unary_rpc_method_handler(
+                    servicer.CaptureCommand,
+                    request_deserializer=facmgr_dot_protobuf_dot_facmgr__pb2.Command.FromString,
+                    response_serializer=facmgr_dot_protobuf_dot_facmgr__pb2.CommandOutput.SerializeToString,
+            ),
             'WaitForUpdates': grpc.unary_unary_rpc_method_handler(
                     servicer.WaitForUpdates,
                     request_deserializer=facmgr_dot_protobuf_dot_facmgr__pb2.UpdateInquiry.FromString,
                     response_serializer=facmgr_dot_protobuf_dot_facmgr__pb2.GameUpdates.SerializeToString,
             ),
+            'GetGameEvents': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetGameEvents,
+                    request_deserializer=facmgr_dot_protobuf_dot_facmgr__pb2.EventInquiry.FromString,
+                    response_serializer=facmgr_dot_protobuf_dot_facmgr__pb2.GameEvents.SerializeToString,
+            ),
+            'SubscribeUpdates': grpc.unary_stream_rpc_method_handler(
+                    servicer.SubscribeUpdates,
+                    request_deserializer=facmgr_dot_protobuf_dot_facmgr__pb2.UpdateInquiry.FromString,
+                    response_serializer=facmgr_dot_protobuf_dot_facmgr__pb2.GameUpdates.SerializeToString,
+            ),
+            'SubscribeGameEvents': grpc.unary_stream_rpc_method_handler(
+                    servicer.SubscribeGameEvents,
+                    request_deserializer=facmgr_dot_protobuf_dot_facmgr__pb2.EventInquiry.FromString,
+                    response_serializer=facmgr_dot_protobuf_dot_facmgr__pb2.GameEvents.SerializeToString,
+            ),
             'GetOutputStreams': grpc.unary_unary_rpc_method_handler(
                     servicer.GetOutputStreams,
                     request_deserializer=google_dot_protobuf_dot_empty__pb2.Empty.FromString,
                     response_serializer=facmgr_dot_protobuf_dot_facmgr__pb2.OutputStreams.SerializeToString,
             ),
+            'GetResourceStats': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetResourceStats,
+                    request_deserializer=google_dot_protobuf_dot_empty__pb2.Empty.FromString,
+                    response_serializer=facmgr_dot_protobuf_dot_facmgr__pb2.ResourceStats.SerializeToString,
+            ),
             'UploadToTelegram': grpc.unary_stream_rpc_method_handler(
                     servicer.UploadToTelegram,
                     request_deserializer=facmgr_dot_protobuf_dot_facmgr__pb2.UploadTelegramInfo.FromString,
@@ -295,6 +411,60 @@ class ServerManager(object):
             metadata,
             _registered_method=True)
 
+    @staticmethod
+    def QuerySaves(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/factorio_server.ServerManager/QuerySaves',
+            facmgr_dot_protobuf_dot_facmgr__pb2.SaveQuery.SerializeToString,
+            facmgr_dot_protobuf_dot_facmgr__pb2.SaveQueryResult.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def ScanSaves(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/factorio_server.ServerManager/ScanSaves',
+            google_dot_protobuf_dot_empty__pb2.Empty.SerializeToString,
+            facmgr_dot_protobuf_dot_facmgr__pb2.SaveSummary.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
     @staticmethod
     def StopServer(request,
             target,
@@ -403,6 +573,33 @@ class ServerManager(object):
             metadata,
             _registered_method=True)
 
+    @staticmethod
+    def CaptureCommand(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/factorio_server.ServerManager/CaptureCommand',
+            facmgr_dot_protobuf_dot_facmgr__pb2.Command.SerializeToString,
+            facmgr_dot_protobuf_dot_facmgr__pb2.CommandOutput.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
     @staticmethod
     def WaitForUpdates(request,
             target,
@@ -430,6 +627,87 @@ class ServerManager(object):
             metadata,
             _registered_method=True)
 
+    @staticmethod
+    def GetGameEvents(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/factorio_server.ServerManager/GetGameEvents',
+            facmgr_dot_protobuf_dot_facmgr__pb2.EventInquiry.SerializeToString,
+            facmgr_dot_protobuf_dot_facmgr__pb2.GameEvents.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def SubscribeUpdates(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/factorio_server.ServerManager/SubscribeUpdates',
+            facmgr_dot_protobuf_dot_facmgr__pb2.UpdateInquiry.SerializeToString,
+            facmgr_dot_protobuf_dot_facmgr__pb2.GameUpdates.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def SubscribeGameEvents(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/factorio_server.ServerManager/SubscribeGameEvents',
+            facmgr_dot_protobuf_dot_facmgr__pb2.EventInquiry.SerializeToString,
+            facmgr_dot_protobuf_dot_facmgr__pb2.GameEvents.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
     @staticmethod
     def GetOutputStreams(request,
             target,
@@ -457,6 +735,33 @@ class ServerManager(object):
             metadata,
             _registered_method=True)
 
+    @staticmethod
+    def GetResourceStats(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/factorio_server.ServerManager/GetResourceStats',
+            google_dot_protobuf_dot_empty__pb2.Empty.SerializeToString,
+            facmgr_dot_protobuf_dot_facmgr__pb2.ResourceStats.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
     @staticmethod
     def UploadToTelegram(request,
             target,
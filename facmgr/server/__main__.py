@@ -23,6 +23,41 @@ parser.add_argument('--stop-strategy', choices=['quit', 'interrupt'], default=No
 parser.add_argument('--disable-version-output-check', action='store_false', dest='strict_version_output',
                     help="disable sanity check for the --version output of the Factorio executable. This is unfavored "
                          "since the output may contain undesired or sensitive information.")
+parser.add_argument('--logs-max-bytes', type=int, default=1 << 20,
+                    help="max bytes of the server output history kept for each of stdout and stderr (default 1 MiB)")
+parser.add_argument('--saves-index', default=None,
+                    help="SQLite database to persist the parsed metadata of the saves "
+                         "(default 'facmgr-saves.sqlite3' in the user data directory, set to empty string to disable)")
+parser.add_argument('--message-log-dir', default=None,
+                    help="directory to persist the game messages, so their offsets survive restarts. It's written "
+                         "on the event loop, so a stalled disk there blocks the whole manager, put it on a local disk "
+                         "(default 'facmgr-messages' in the user data directory, set to empty string to disable)")
+parser.add_argument('--message-log-bytes', type=int, default=64 << 20,
+                    help="max bytes of the game messages kept on disk (default 64 MiB)")
+parser.add_argument('--message-maxlen', type=int, default=None,
+                    help="max number of the game messages kept in memory "
+                         "(default 1024 with the message log, otherwise unlimited)")
+parser.add_argument('--subscriber-queue-size', type=int, default=1000,
+                    help="max number of the messages queued for each subscriber of the updates (default 1000)")
+parser.add_argument('--subscriber-overflow', choices=['drop-oldest', 'coalesce', 'disconnect'], default='coalesce',
+                    help="what to do when a subscriber is too slow and its queue is full: drop-oldest - drop the "
+                         "oldest queued messages; coalesce - read the missed ones from the buffer later; "
+                         "disconnect - close the subscription so the client resumes from the gap (default coalesce)")
+parser.add_argument('--command-queue-bytes', type=int, default=1 << 20,
+                    help="max bytes of the in-game commands waiting for the server to read, the ones beyond "
+                         "are rejected (default 1 MiB)")
+parser.add_argument('--rcon-address', default=None,
+                    help="run the in-game commands over RCON at host:port and return the responses, the server "
+                         "started by the manager listens on it (default: disabled, the commands are written to stdin)")
+parser.add_argument('--rcon-password', default='',
+                    help="RCON password, it's passed in the command line of the server. A random one is generated if "
+                         "it's empty, which only works for the server started by the manager")
+parser.add_argument('--rcon-pool-size', type=int, default=2, help="max number of RCON connections (default 2)")
+parser.add_argument('--resource-interval', type=float, default=5.,
+                    help="seconds between the samples of the CPU, memory, I/O and threads of the server, "
+                         "it needs psutil (the resources extra), 0 to disable it (default 5)")
+parser.add_argument('--scan-workers', type=int, default=None,
+                    help="max number of processes to parse the saves in bulk (default: number of CPUs)")
 
 cli_args = parser.parse_args()
 logging_level = {0: logging.WARNING, 1: logging.INFO, 2: logging.DEBUG}.get(cli_args.verbose, logging.DEBUG)
@@ -39,9 +74,21 @@ logging.info(f"Using factorio executable: {executable}")
 fac_save = os.path.join(data_dir, 'saves')
 if not os.path.isdir(fac_save):
     logging.warning(f"no 'saves' dir in the user data directory")
+saves_index = cli_args.saves_index
+if saves_index is None:
+    saves_index = os.path.join(data_dir, 'facmgr-saves.sqlite3')
+message_log_dir = cli_args.message_log_dir
+if message_log_dir is None:
+    message_log_dir = os.path.join(data_dir, 'facmgr-messages')
 
 asyncio.run(server.run(server.Config(
     address=grpc_address, saves_dir=fac_save, fac_exec=executable, fac_timeout=cli_args.timeout,
     executable_is_wrapper=cli_args.wrapper, stop_strategy=cli_args.stop_strategy,
-    strict_version_output=cli_args.strict_version_output
+    strict_version_output=cli_args.strict_version_output, saves_index=saves_index,
+    scan_workers=cli_args.scan_workers, logs_max_bytes=cli_args.logs_max_bytes,
+    message_log_dir=message_log_dir, message_log_bytes=cli_args.message_log_bytes,
+    message_maxlen=cli_args.message_maxlen, subscriber_queue_size=cli_args.subscriber_queue_size,
+    subscriber_overflow=cli_args.subscriber_overflow, command_queue_bytes=cli_args.command_queue_bytes,
+    rcon_address=cli_args.rcon_address, rcon_password=cli_args.rcon_password, rcon_pool_size=cli_args.rcon_pool_size,
+    resource_interval=cli_args.resource_interval
 )))
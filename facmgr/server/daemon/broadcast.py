@@ -0,0 +1,179 @@
+import asyncio
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Literal, Optional, Sequence
+
+__all__ = ['Broadcaster', 'Subscription', 'SubscriberStat', 'OverflowPolicy']
+
+type OverflowPolicy = Literal['drop-oldest', 'coalesce', 'disconnect']
+type Replay = Callable[[int, int, int], Sequence[Sequence]]  # (start, end, limit) -> items in [start, end)
+
+
+@dataclass
+class SubscriberStat:
+    stream: str
+    name: str
+    policy: str
+    queued: int  # items waiting in the queue
+    lag: int  # offsets between the newest one published and the last one delivered
+    dropped: int
+    delivered: int
+
+
+class Subscription:
+    """
+    A subscriber of a Broadcaster with its own bounded queue. When the queue is full:
+        drop-oldest - the oldest queued items are dropped, and the count is reported with the next batch;
+        coalesce - the queue is collapsed into the range of offsets, which are read again from the storage (the
+          buffer or the message log) when the subscriber catches up, so only the ones rotated out are lost. They are
+          counted as dropped once the range is read through;
+        disconnect - the subscription is closed, and gap is the first offset not delivered, for resuming from.
+    The items are sequences whose first field is the offset, e.g. (offset, message) or GameEvent.
+    """
+
+    def __init__(self, broadcaster: "Broadcaster", name: str, policy: OverflowPolicy, maxlen: int, replay: Replay,
+                 accept: Callable[[Sequence], bool] = None):
+        self.broadcaster = broadcaster
+        self.name = name
+        self.policy = policy
+        self.maxlen = maxlen
+        self._replay = replay
+        self._accept = accept
+        self._queue: deque[Sequence] = deque()
+        self._replay_range: Optional[tuple[int, int]] = None
+        self._replay_owed: Optional[int] = 0  # items collapsed into the replay range, None if it's unknown
+        self._wakeup = asyncio.Event()
+        self._pending_dropped = 0
+        self.dropped = 0
+        self.delivered = 0
+        self.last_offset: Optional[int] = None
+        self.closed = False
+        self.gap: Optional[int] = None
+
+    def _put(self, items: Sequence[Sequence]):
+        if self._accept is not None:
+            items = [item for item in items if self._accept(item)]
+        if not items:
+            return
+        overflow = len(self._queue) + len(items) - self.maxlen
+        if overflow <= 0:
+            self._queue.extend(items)
+        elif self.policy == 'drop-oldest':
+            self._queue.extend(items)
+            for _ in range(overflow):
+                self._queue.popleft()
+            self.dropped += overflow
+            self._pending_dropped += overflow
+        elif self.policy == 'coalesce':
+            start = self._queue[0][0] if self._queue else items[0][0]
+            if self._replay_range is not None:
+                start = self._replay_range[0]
+            self._replay_range = start, items[-1][0] + 1
+            if self._replay_owed is not None:
+                self._replay_owed += len(self._queue) + len(items)
+            self._queue.clear()
+        else:
+            self.gap = items[0][0]
+            self.close()
+        self._wakeup.set()
+
+    def _deliver(self, items: list[Sequence]) -> tuple[list[Sequence], int]:
+        dropped, self._pending_dropped = self._pending_dropped, 0
+        self.delivered += len(items)
+        self.last_offset = items[-1][0]
+        return items, dropped
+
+    async def get(self, max_batch: int) -> Optional[tuple[list[Sequence], int]]:
+        """
+        Wait for the next batch of at most max_batch items.
+
+        :return: the items and the number of items dropped before them, or None if the subscription is closed and all
+          the queued items are delivered
+        """
+        while True:
+            if self._replay_range is not None:
+                start, end = self._replay_range
+                self._replay_range = None
+                items = self._replay(start, end, max_batch)
+                if len(items) == max_batch and items[-1][0] + 1 < end:
+                    self._replay_range = items[-1][0] + 1, end
+                if self._accept is not None:
+                    items = [item for item in items if self._accept(item)]
+                if self._replay_owed is not None:
+                    self._replay_owed -= len(items)
+                if self._replay_range is None:
+                    if self._replay_owed:  # the rest are rotated out of the storage
+                        self.dropped += self._replay_owed
+                        self._pending_dropped += self._replay_owed
+                    self._replay_owed = 0
+                if items:
+                    return self._deliver(items)
+                continue
+            if self._queue:
+                return self._deliver([self._queue.popleft() for _ in range(min(max_batch, len(self._queue)))])
+            if self.closed:
+                return None
+            self._wakeup.clear()  # only the subscriber itself waits on it
+            await self._wakeup.wait()
+
+    def close(self):
+        self.closed = True
+        self.broadcaster.subscriptions.discard(self)
+        self._wakeup.set()
+
+    def stat(self) -> SubscriberStat:
+        head = self.broadcaster.head
+        if head is None:
+            lag = 0
+        elif self.last_offset is None:
+            lag = len(self._queue)
+        else:
+            lag = max(head - self.last_offset, 0)
+        return SubscriberStat(self.broadcaster.name, self.name, self.policy, len(self._queue), lag, self.dropped,
+                              self.delivered)
+
+
+class Broadcaster:
+    """
+    Fan out the new items to the subscribers, each of them has a bounded queue, so a slow one (e.g. a stuck
+    Telegram bridge) neither grows the memory without bound nor holds back the others.
+    """
+
+    def __init__(self, name: str, replay: Replay, *, queue_size=1000, policy: OverflowPolicy = 'coalesce'):
+        """
+        :param name: name of the stream in the stats
+        :param replay: read the items in the range of offsets from the storage, for catching up
+        :param queue_size: max number of the queued items of each subscriber
+        :param policy: the default overflow policy
+        """
+        self.name = name
+        self.queue_size = queue_size
+        self.policy = policy
+        self._replay = replay
+        self.subscriptions: set[Subscription] = set()
+        self.head: Optional[int] = None  # offset of the newest item published
+
+    def publish(self, items: Sequence[Sequence]):
+        if not items:
+            return
+        self.head = items[-1][0]
+        for subscription in self.subscriptions.copy():
+            subscription._put(items)
+
+    def subscribe(self, name: str, from_offset: int = None, *, policy: OverflowPolicy = None,
+                  accept: Callable[[Sequence], bool] = None) -> Subscription:
+        """
+        :param name: name of the subscriber in the stats, e.g. the peer address
+        :param from_offset: replay the items since this offset first, only the new ones if None
+        :param policy: overflow policy of the queue, the default one if None
+        :param accept: only the items accepted by it are delivered
+        """
+        subscription = Subscription(self, name, policy or self.policy, self.queue_size, self._replay, accept)
+        if from_offset is not None and self.head is not None and from_offset <= self.head:
+            subscription._replay_range = from_offset, self.head + 1
+            subscription._replay_owed = None  # not counted until this range is read through
+        self.subscriptions.add(subscription)
+        return subscription
+
+    def stats(self) -> list[SubscriberStat]:
+        return [subscription.stat() for subscription in self.subscriptions]
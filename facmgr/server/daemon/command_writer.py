@@ -0,0 +1,115 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Optional
+
+__all__ = ['CommandWriter', 'CommandStat', 'StdinClosedError']
+
+
+class StdinClosedError(Exception):
+    """the stdin is closed by write_eof(), e.g. the server is stopping"""
+
+
+@dataclass
+class CommandStat:
+    pending: int = 0  # commands waiting in the queue
+    pending_bytes: int = 0
+    commands: int = 0  # commands written
+    writes: int = 0  # writes to the stdin, fewer than commands if they are coalesced
+    rejected: int = 0  # commands rejected because the queue is full
+    mean_latency: float = 0.  # seconds from submitting a command to writing it
+    max_latency: float = 0.
+
+
+class CommandWriter:
+    """
+    Write the commands to the stdin of a process in order, and respect the backpressure of the pipe.
+    A command is written instantly if nothing is pending. Otherwise, it's queued and all the pending ones are
+    coalesced into one write after the pipe is drained. The queue is bounded by bytes so that a chat flood can't grow
+    the memory without bound, the commands beyond that are rejected.
+    """
+
+    def __init__(self, stdin: asyncio.StreamWriter, max_pending_bytes=1 << 20):
+        self.stdin = stdin
+        self.max_pending_bytes = max_pending_bytes
+        self._pending: deque[tuple[float, bytes]] = deque()  # (time submitted, command)
+        self._task: Optional[asyncio.Task] = None
+        self._eof = False
+        self._latency_sum = 0.
+        self.stat = CommandStat()
+
+    def submit(self, cmd: bytes, *, force=False) -> bool:
+        """
+        Write or queue the command without blocking.
+
+        :param force: queue it even if the queue is full, e.g. /quit
+        :return: False if it's rejected because the queue is full
+        :raise StdinClosedError: if write_eof() has been called
+        """
+        if self._eof:
+            raise StdinClosedError("the stdin is closed")
+        now = time.perf_counter()
+        if self._task is None:
+            self.stdin.write(cmd)
+            self._written([(now, cmd)], now)
+            if self.stdin.transport.get_write_buffer_size():  # start draining, and queue the next ones meanwhile
+                self._task = asyncio.create_task(self._run())
+            return True
+        if not force and self.stat.pending_bytes + len(cmd) > self.max_pending_bytes:
+            self.stat.rejected += 1
+            return False
+        self._pending.append((now, cmd))
+        self.stat.pending += 1
+        self.stat.pending_bytes += len(cmd)
+        return True
+
+    def _written(self, commands: list[tuple[float, bytes]], now: float):
+        self.stat.commands += len(commands)
+        self.stat.writes += 1
+        for submitted, _ in commands:
+            latency = now - submitted
+            self._latency_sum += latency
+            self.stat.max_latency = max(self.stat.max_latency, latency)
+        self.stat.mean_latency = self._latency_sum / self.stat.commands
+
+    async def _run(self):
+        try:
+            while True:
+                await self.stdin.drain()
+                if not self._pending:
+                    break
+                commands = list(self._pending)
+                self._pending.clear()
+                self.stat.pending = self.stat.pending_bytes = 0
+                self.stdin.write(b''.join(cmd for _, cmd in commands))
+                self._written(commands, time.perf_counter())
+            if self._eof:
+                self.stdin.write_eof()
+        except (ConnectionError, OSError) as e:
+            logging.warning(f"Fail to write the commands, {len(self._pending)} pending ones are dropped. "
+                            f"{type(e).__name__}: {e}")
+            self._pending.clear()
+            self.stat.pending = self.stat.pending_bytes = 0
+        finally:
+            self._task = None
+
+    def write_eof(self):
+        """close the stdin after the pending commands are written"""
+        self._eof = True
+        if self._task is None:
+            self.stdin.write_eof()
+
+    async def drain(self):
+        """wait until the pending commands are written and the pipe is drained"""
+        if self._task is not None:
+            await asyncio.shield(self._task)
+
+    def close(self):
+        """drop the pending commands, e.g. the process exited"""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self._pending.clear()
+        self.stat.pending = self.stat.pending_bytes = 0
@@ -2,16 +2,24 @@ import logging
 import os
 import asyncio
 import re
+import secrets
+import shutil
 import subprocess
-from asyncio import Event
-from collections import deque
 from contextlib import contextmanager
 from dataclasses import dataclass
 import itertools
 # import logging
-from typing import Optional, TypedDict, Literal
-
-from .monitor import AsyncStreamMonitor
+from typing import Optional, TypedDict, Literal, Callable
+
+from .broadcast import Broadcaster, OverflowPolicy, Subscription, SubscriberStat
+from .command_writer import CommandWriter, CommandStat, StdinClosedError
+from .events import GameEvent, parse_game_event
+from .message_log import MessageLog
+from .monitor import AsyncStreamMonitor, ThroughputStat
+from .notifier import OffsetNotifier
+from .offset_buffer import OffsetBuffer
+from .rcon import RconClient, RconError, RconStat
+from .resources import ResourceSampler, ResourcePoint
 from ...protobuf.error_code import *
 
 __all__ = ['Status', 'FactorioServerDaemon']
@@ -22,6 +30,17 @@ class Status(TypedDict):
     message: Optional[str]
 
 
+# server logs of saving a game, e.g.
+#   Saving to _autosave1 (non-blocking).
+#   Saving map as /opt/factorio/saves/my-save.zip
+#   Saving finished
+_saving_pattern = re.compile(
+    rb'Saving (?:to (?P<autosave>\S+) \((?:non-)?blocking\)|(?:map|game) as (?P<path>.+?))\.?\s*$'
+)
+_saved_keyword = b'Saving finished'
+_server_log_pattern = re.compile(rb' *\d+\.\d{3} ')  # the timestamp of the server logs, the rest are messages
+
+
 def _cmd_path():
     # Windows-only, copied from python standard library subprocess.py
     _comspec = os.environ.get('ComSpec')
@@ -65,21 +84,58 @@ class FactorioServerDaemon:
         # reset = super().__init__  # method
 
     process: Optional[asyncio.subprocess.Process] = None
+    _command_writer: Optional[CommandWriter] = None  # stdin of the process
+    rcon: Optional[RconClient] = None
+    resources: Optional[ResourceSampler] = None
     _process_info: Info
     _monitor: dict[Literal['stdout', 'stderr'], AsyncStreamMonitor]
     _background_tasks: set[asyncio.Task]
-    message_buffer: deque[tuple[int, bytes]]
+    message_buffer: OffsetBuffer  # of (offset, message)
     message_count: itertools.count
-    message_new: Event
-
-    def __init__(self, executable, timeout=30, *, logs_maxlen=None, message_maxlen=None,
-                 executable_is_wrapper=False, stop_strategy: Literal['quit', 'interrupt'] = None,
+    message_new: OffsetNotifier
+    message_log: Optional[MessageLog] = None
+    event_buffer: OffsetBuffer  # of GameEvent, at the offsets of the messages they are parsed from
+    event_new: OffsetNotifier
+    message_broadcaster: Broadcaster  # of (offset, message)
+    event_broadcaster: Broadcaster  # of GameEvent
+    _LOGGED_BUFFER_MAXLEN = 1024
+    save_callback: Optional[Callable[[str], None]] = None  # called with the file name after a save is written
+    _saving: Optional[str] = None
+    type ExecutableKey = tuple[str, int, int]  # (real path, inode, mtime in ns)
+    _game_version: Optional[tuple[ExecutableKey, str]] = None
+    _version_refresh: Optional[tuple[ExecutableKey, asyncio.Task]] = None
+
+    def __init__(self, executable, timeout=30, *, logs_maxlen=None, logs_max_bytes=1 << 20, message_maxlen=None,
+                 message_log_dir=None, message_log_bytes=64 << 20, message_max_batch=1000,
+                 subscriber_queue_size=1000, subscriber_overflow: OverflowPolicy = 'coalesce',
+                 command_queue_bytes=1 << 20, rcon_address: str = None, rcon_password='', rcon_pool_size=2,
+                 resource_interval=5., executable_is_wrapper=False, stop_strategy: Literal['quit', 'interrupt'] = None,
                  strict_version_output=True):
         """
         :param executable: path to the Factorio starter
         :param timeout: max waiting time for starting and (gracefully) stopping the server
-        :param logs_maxlen: size of process raw output history
-        :param message_maxlen: size of message buffer for TG forward long polling
+        :param logs_maxlen: max number of lines of process raw output history
+        :param logs_max_bytes: max bytes of process raw output history for each stream
+        :param message_maxlen: size of message buffer (and game event buffer) for TG forward long polling
+        :param message_log_dir: directory of the on-disk message log, which keeps the message offsets and serves the
+        old messages across restarts. Only the recent messages are kept in memory if it's set. None to disable it.
+        The messages are appended and flushed as they are read, and the old segments are removed, on the event loop,
+        so it should be on a local disk: a stall of the disk blocks the whole manager.
+        :param message_log_bytes: max total size of the message log
+        :param message_max_batch: default max number of messages (or game events) returned by one long polling
+        :param subscriber_queue_size: max number of messages (or game events) queued for each subscriber
+        :param subscriber_overflow: default policy when the queue of a subscriber is full, see Subscription
+        :param command_queue_bytes: max bytes of the in-game commands waiting for the stdin to drain
+        :param rcon_address: host:port to run the commands over RCON instead of the stdin, so their responses are
+        returned, and it works for a server not started by the manager. The server started by the manager listens on it
+        unless the RCON options are set in the args. None to disable it.
+        :param rcon_password: RCON password. A random one is generated if it's empty, so the server started by the
+        manager doesn't listen without one, but then it only works for that server. Note that it's in the command line
+        of the server, visible to the other users on the machine.
+        :param rcon_pool_size: max number of RCON connections
+        :param resource_interval: seconds between the samples of the CPU, memory, I/O and threads of the server process
+        tree, the samples of the last day are kept. None or 0 to disable it. It's also disabled if psutil is not
+        installed.
         :param executable_is_wrapper: whether the executable is a wrapper script
         (only works on Linux and always True on Windows)
         :param stop_strategy: stop strategy for the server:
@@ -90,12 +146,48 @@ class FactorioServerDaemon:
         self.executable = executable
         self.global_timeout = timeout
         self._background_tasks = set()
-        self.message_buffer = deque(maxlen=message_maxlen)
+        self.command_queue_bytes = command_queue_bytes
+        if rcon_address:
+            if not rcon_password:
+                rcon_password = secrets.token_urlsafe(24)
+                logging.info("no RCON password is given, a random one is generated for the server started by "
+                             "the manager")
+            host, _, port = rcon_address.rpartition(':')
+            self.rcon = RconClient(host.strip('[]'), int(port), rcon_password, pool_size=rcon_pool_size)
+            self.rcon_address, self.rcon_password = rcon_address, rcon_password
+        if resource_interval:
+            if ResourceSampler.available():
+                self.resources = ResourceSampler(resource_interval)
+            else:
+                logging.warning("psutil is not installed, the resource usage of the server is not sampled")
         self.message_count = itertools.count()
-        self.message_new = Event()
+        if message_log_dir:
+            try:
+                self.message_log = MessageLog(message_log_dir, retention_bytes=message_log_bytes)
+            except OSError as e:
+                logging.warning(f"cannot open the message log {message_log_dir}, it is disabled. "
+                                f"{type(e).__name__}: {e}")
+            else:
+                self.message_count = itertools.count(self.message_log.next_offset)
+                if message_maxlen is None:  # the older ones are read from the log
+                    message_maxlen = self._LOGGED_BUFFER_MAXLEN
+        self.message_buffer = OffsetBuffer(maxlen=message_maxlen)
+        self.message_max_batch = message_max_batch
+        self.message_new = OffsetNotifier(self._latest_message_offset)
+        self.event_buffer = OffsetBuffer(maxlen=message_maxlen)
+        self.event_new = OffsetNotifier(lambda: self.event_buffer[-1].offset if self.event_buffer else None)
+        self.message_broadcaster = Broadcaster('messages', self._read_messages, queue_size=subscriber_queue_size,
+                                               policy=subscriber_overflow)
+        self.message_broadcaster.head = self._latest_message_offset()
+        self.event_broadcaster = Broadcaster(
+            'events', lambda start, end, limit: [e for e in self.event_buffer.since(start, limit) if e.offset < end],
+            queue_size=subscriber_queue_size, policy=subscriber_overflow
+        )
         # noinspection PyTypeChecker
-        self._monitor = {stream_name: AsyncStreamMonitor(history_maxlen=logs_maxlen)
-                         for stream_name in ['stdout', 'stderr']}
+        self._monitor = {
+            stream_name: AsyncStreamMonitor(history_maxlen=logs_maxlen, history_max_bytes=logs_max_bytes)
+            for stream_name in ['stdout', 'stderr']
+        }
         self._set_monitor_callback()  # it's safe to set callback of the monitor after initialization
         self._is_wrapper = True if os.name == 'nt' else executable_is_wrapper
         if stop_strategy is None:
@@ -155,8 +247,8 @@ class FactorioServerDaemon:
         if self.stop_strategy == 'quit':
             # /quit command works for both Windows and Linux
             logging.info("stopping the server by /quit command")
-            self.in_game_command("/quit")
-            self.process.stdin.write_eof()
+            if self._write_command("/quit", force=True) is None:  # not stopping already
+                self._command_writer.write_eof()
         else:  # stop_strategy == 'interrupt'
             # SIGINT doesn't work for Windows and CTRL_C_EVENT doesn't work for detached console subprocess
             logging.info("stopping the server by interrupt signal")
@@ -178,6 +270,7 @@ class FactorioServerDaemon:
         if self.is_running:
             logging.error("The old subprocess is still running. Force stopping...")
             await self._kill(block=False)
+        sampling: Optional[asyncio.Task] = None
         try:
             # starting
             try:
@@ -186,8 +279,11 @@ class FactorioServerDaemon:
                 self._process_info.error = {"code": BAD_ARG, "message": f"Cannot start server. {type(e).__name__}: {e}"}
                 return
             self._process_info.error = None
+            self._command_writer = CommandWriter(self.process.stdin, self.command_queue_bytes)
             self._monitor['stdout'].stream = self.process.stdout
             self._monitor['stderr'].stream = self.process.stderr
+            if self.resources is not None:
+                sampling = asyncio.create_task(self.resources.run(self.process.pid))
             # running
             await self.process.wait()
             await self._monitor['stdout'].wait_eof()
@@ -197,6 +293,8 @@ class FactorioServerDaemon:
             logging.warning("The server is interrupted. Quitting...")
             raise
         finally:
+            if sampling is not None:
+                sampling.cancel()
             if self.is_running:
                 try:
                     await asyncio.wait_for(self.process.wait(), timeout=self.global_timeout)
@@ -219,6 +317,7 @@ class FactorioServerDaemon:
                 "code":    EXIT_UNEXPECT,
                 "message": f"The server exited unexpectedly without error, " + out_streams}
             logging.info(f"the server exited normally, " + out_streams)
+        self._command_writer.close()
         self.process = None
 
     @contextmanager
@@ -251,7 +350,10 @@ class FactorioServerDaemon:
             # prepare for starting
             logging.info(f"start Factorio server with {args=}")
             self._process_info.args = args
+            if self.rcon is not None and '--rcon-port' not in args and '--rcon-bind' not in args:
+                args = [*args, '--rcon-bind', self.rcon_address, '--rcon-password', self.rcon_password]
             self._process_info.error = None
+            self._saving = None
             if self._process_info.daemon is not None:
                 # there's no running process, so we don't care about the old daemon's status
                 self._process_info.daemon.cancel()
@@ -322,36 +424,207 @@ class FactorioServerDaemon:
         return await self.start(old_args if args is None else args)
 
     def _stream_history(self, stream_name, limit=None):
-        # it's better to read from the tail until reaching limit
-        history = repr(b''.join(self._monitor[stream_name].history).decode(errors='replace'))
-        if limit is not None and (l := len(history)) > limit:
-            history = f"'...[{l - limit} chars]" + history[-limit:]
-        return history
-
-    def in_game_command(self, cmd: str) -> Status:
-        if self.process is None:
-            return {"code": NOT_AVAILABLE, "message": "The server is not running."}
+        history = self._monitor[stream_name].history
+        data = history.tail(limit)
+        text = repr(data.decode(errors='replace'))
+        if (omitted := history.size - len(data)) > 0:
+            text = f"'...[{omitted} bytes]" + text[1:]
+        return text
+
+    def _write_command(self, cmd: str, force=False) -> Optional[Status]:
+        """write the command to the stdin, return the error status if it's not accepted"""
         cmd = cmd.splitlines()
         cmd.append('')
         cmd = os.linesep.join(cmd).encode()
         logging.info(f"run command: {cmd}")
-        self.process.stdin.write(cmd)
+        try:
+            if self._command_writer.submit(cmd, force=force):
+                return None
+        except StdinClosedError:
+            return {"code": STOPPING, "message": "The server is stopping."}
+        return {"code": ABORTED, "message": "Too many commands are waiting for the server."}
+
+    def in_game_command(self, cmd: str) -> Status:
+        if self.process is None:
+            return {"code": NOT_AVAILABLE, "message": "The server is not running."}
+        if (error := self._write_command(cmd)) is not None:
+            return error
         # we cannot easily detect whether the server get the message and run it successfully,
         # so leave this detection work for high-level code
         return {"code": SUCCESS, "message": None}
 
+    async def _rcon_command(self, cmd: str, timeout: float = None) -> tuple[Status, list[str]]:
+        try:
+            async with asyncio.timeout(timeout):
+                responses = await self.rcon.execute_batch(cmd.splitlines())
+        except RconError as e:
+            return {"code": NOT_AVAILABLE, "message": f"RCON is not available. {e}"}, []
+        except TimeoutError:
+            return {"code": ABORTED, "message": "No response from RCON."}, []
+        return {"code": SUCCESS, "message": None}, responses
+
+    async def run_command(self, cmd: str) -> Status:
+        """
+        Run the command over RCON if it's enabled, and return the responses as the message.
+        Otherwise, it's written to the stdin like in_game_command.
+        """
+        if self.rcon is None:
+            return self.in_game_command(cmd)
+        logging.info(f"run command over RCON: {cmd!r}")
+        status, responses = await self._rcon_command(cmd)
+        if status["code"] == SUCCESS:
+            # separated by newlines, the output printed by a command usually ends with one already
+            status["message"] = '\n'.join(response.removesuffix('\n') for response in responses)
+        return status
+
+    async def capture_command(self, cmd: str, timeout: float = 5.) -> tuple[Status, list[bytes]]:
+        """
+        Run the command and collect its output. Over RCON if it's enabled, the lines of the responses are returned.
+        Otherwise, the command is wrapped by the prints of unique markers, and the stdout lines between them are
+        returned, e.g. the output of rcon.print/print or the errors of the command. The markers and the lines between
+        them are kept out of the messages, so they are neither broadcast nor written to the message log.
+        Note that the markers are printed by /silent-command, which disables the achievements of the save like any
+        other Lua command.
+
+        :param timeout: max seconds to wait for the output, the lines read by then are returned with ABORTED
+        """
+        if self.rcon is not None:
+            status, responses = await self._rcon_command(cmd, timeout)
+            return status, [line.encode() for response in responses for line in response.splitlines(keepends=True)]
+        if self.process is None:
+            return {"code": NOT_AVAILABLE, "message": "The server is not running."}, []
+        token = secrets.token_hex(8)
+        begin, end = f'facmgr-begin-{token}', f'facmgr-end-{token}'
+        with self._monitor['stdout'].capture(begin.encode(), end.encode()) as capture:
+            # written at once so that no other command runs between the markers
+            error = self._write_command(f'/silent-command print("{begin}")\n{cmd}\n/silent-command print("{end}")')
+            if error is not None:
+                capture.discard()
+                return error, []
+            try:
+                lines = await asyncio.wait_for(capture.done, timeout)
+            except asyncio.TimeoutError:
+                state = "No end of the output" if capture.started else "No output"
+                return {"code": ABORTED, "message": f"{state} after {timeout}s."}, capture.lines
+        return {"code": SUCCESS, "message": None}, lines
+
+    def get_command_stat(self) -> CommandStat:
+        """queue depth and write latency of the in-game commands of the current process"""
+        if self._command_writer is None:
+            return CommandStat()
+        return self._command_writer.stat
+
+    def _detect_save(self, line: bytes):
+        if b'Saving' not in line:
+            return
+        if (match := _saving_pattern.search(line)) is not None:
+            if (name := match['autosave']) is not None:
+                self._saving = name.decode(errors='replace') + '.zip'
+            else:
+                self._saving = os.path.basename(match['path'].decode(errors='replace'))
+        elif self._saving is not None and _saved_keyword in line:
+            name, self._saving = self._saving, None
+            logging.info(f"the server saved {name}")
+            if self.save_callback is not None:
+                try:
+                    self.save_callback(name)
+                except Exception as e:
+                    logging.error(f"Error in the save callback of {name}. {type(e).__name__}: {e}")
+
     def _set_monitor_callback(self):
-        def stdout_callback(s: bytes):
-            logging.debug(f"factorio stdout: " + str(s))
-            # match server logs and do nothing. otherwise, we assume it's a new message
-            if re.match(rb' *\d+\.\d{3} ', s) is None:
-                self.message_buffer.append((next(self.message_count), s))
+        def stdout_callback(lines: list[bytes]):
+            if logging.getLogger().isEnabledFor(logging.DEBUG):
+                for s in lines:
+                    logging.debug(f"factorio stdout: " + str(s))
+            # match server logs and only look for the saving events. otherwise, we assume it's a new message
+            is_server_log = _server_log_pattern.match
+            new_messages, new_events = [], []
+            for s in lines:
+                if is_server_log(s) is None:
+                    new_messages.append((offset := next(self.message_count), s))
+                    # parse once here rather than in every client. The event shares the offset of its message, so
+                    # the event offsets are kept across restarts with the message log as well
+                    if (fields := parse_game_event(s)) is not None:
+                        new_events.append(GameEvent(offset, *fields))
+                else:
+                    self._detect_save(s)
+            if new_messages:
+                self.message_buffer.extend(new_messages)
+                self._write_message_log(new_messages)
                 self.message_new.set()
+                self.message_broadcaster.publish(new_messages)
+            if new_events:
+                self.event_buffer.extend(new_events)
+                self.event_new.set()
+                self.event_broadcaster.publish(new_events)
+
+        def stderr_callback(lines: list[bytes]):
+            if logging.getLogger().isEnabledFor(logging.DEBUG):
+                for s in lines:
+                    logging.debug(f"factorio stderr: " + str(s))
+
+        self._monitor["stderr"].batch_callback = stderr_callback
+        self._monitor["stdout"].batch_callback = stdout_callback
+
+    def _write_message_log(self, messages: list[tuple[int, bytes]]):
+        if self.message_log is None:
+            return
+        try:
+            self.message_log.extend(messages)
+        except (OSError, ValueError) as e:
+            logging.error(f"Fail to write the message log, it is disabled. {type(e).__name__}: {e}")
+            self.message_log.close()
+            self.message_log = None
+
+    def _latest_message_offset(self) -> Optional[int]:
+        if self.message_buffer:
+            return self.message_buffer[-1][0]
+        if self.message_log is not None and self.message_log.next_offset > self.message_log.start:
+            return self.message_log.next_offset - 1
+        return None
+
+    def _read_messages(self, start: int, end: int, limit: int) -> list[tuple[int, bytes]]:
+        """the (offset, message) in [start, end) from the buffer, or from the message log if they are older"""
+        result = []
+        if self.message_log is not None and not (self.message_buffer and self.message_buffer[0][0] <= start):
+            oldest = self.message_buffer[0][0] if self.message_buffer else end
+            result = self.message_log.read(start, min(oldest, end), limit=limit)
+        if len(result) < limit:
+            result += [message for message in self.message_buffer.since(start, limit - len(result)) if message[0] < end]
+        return result
+
+    def subscribe_messages(self, name: str, from_offset: int = None, overflow: OverflowPolicy = None) -> Subscription:
+        """
+        Subscribe to the messages with a bounded queue, read them by Subscription.get() until it returns None.
+        The messages since from_offset are read from the buffer (or the message log) first.
+        """
+        return self.message_broadcaster.subscribe(name, from_offset, policy=overflow)
+
+    def subscribe_events(self, name: str, from_offset: int = None, kinds=(),
+                         overflow: OverflowPolicy = None) -> Subscription:
+        """similar to subscribe_messages, but only the game events of the kinds (all if empty) are delivered"""
+        accept = (lambda event: event.kind in kinds) if kinds else None
+        return self.event_broadcaster.subscribe(name, from_offset, policy=overflow, accept=accept)
 
-        self._monitor["stderr"].logger_callback = lambda s: logging.debug(f"factorio stderr: " + str(s))
-        self._monitor["stdout"].logger_callback = stdout_callback
+    def get_subscriber_stats(self) -> list[SubscriberStat]:
+        """the queue and lag of each subscriber"""
+        return self.message_broadcaster.stats() + self.event_broadcaster.stats()
 
-    async def get_message(self, start_from: int = None) -> tuple[int, list[bytes]]:
+    def get_rcon_stat(self) -> Optional[RconStat]:
+        return None if self.rcon is None else self.rcon.stat
+
+    def get_resource_stats(self) -> Optional[dict[str, list[ResourcePoint]]]:
+        """the downsampled resource usage of the server process tree, None if disabled or psutil is not installed"""
+        return None if self.resources is None else self.resources.stats()
+
+    def close(self):
+        if self.rcon is not None:
+            self.rcon.close()
+        if self.message_log is not None:
+            self.message_log.close()
+            self.message_log = None
+
+    async def get_message(self, start_from: int = None, max_batch: int = None) -> tuple[int, list[bytes]]:
         """
         This is designed for idempotent, stateless long polling. Multiple clients can work simultaneously
         with no problem.
@@ -359,40 +632,117 @@ class FactorioServerDaemon:
         :param start_from: an offset to acknowledge the state. start_from<=0 means reading from the beginning;
           start_from<=message_buffer[-1][0] will return instantly with buffered messages;
           start_from>message_buffer[-1][0] or empty means waiting for new message.
+          The messages older than the buffer are read from the message log if it's enabled.
+        :param max_batch: return at most this number of the oldest messages, message_max_batch if None.
+          The rest can be read by continuing from the returned offset + 1.
 
-        :return: a sequence of the message(s) and the offset of the newest message.
+        :return: a sequence of the message(s) and the offset of the newest message returned.
         """
+        if max_batch is None:
+            max_batch = self.message_max_batch
+        max_batch = max(max_batch, 1)
 
-        result = []
-        if start_from is None:
-            start_from = float('inf')
-
-        if self.message_buffer and self.message_buffer[-1][0] >= start_from:
-            for message in reversed(self.message_buffer):
-                if message[0] < start_from:
-                    break
-                result.append(message)
+        latest = self._latest_message_offset()
+        if start_from is not None and latest is not None and latest >= start_from:
+            result = self._read_messages(start_from, latest + 1, max_batch)
         else:
-            self.message_new.clear()
-            # buffer[-1] < start_from for now
-            await self.message_new.wait()
-            # It's probable that buffer[-1] >= start_from is still False, but we only wait once and return.
-            # buffer[-2] < start_from may also be False (multiple messages is added),
-            # so we must detect the offset again from the buffer to ensure no missed item
-            for message in reversed(self.message_buffer):
-                # at lease return 1 new message
-                result.append(message)
-                if message[0] <= start_from:
-                    # the next message will be too early
-                    break
-        offset = result[0][0]
-        result = [message[1] for message in result]
-        return offset, result[::-1]
+            # buffer[-1] < start_from for now, wait for any newer message. It's probable that buffer[-1] >= start_from
+            # is still False (start_from is from before a restart), but we only wait once and return.
+            # Multiple messages may also be added, so we locate the offset again to ensure no missed item,
+            # and at least return 1 new message
+            await self.message_new.wait(0 if latest is None else latest + 1)
+            if start_from is None:
+                start_from = self.message_buffer[-1][0]
+            start = min(self.message_buffer.locate(start_from), len(self.message_buffer) - 1)
+            result = self.message_buffer.since(self.message_buffer[start][0], max_batch)
+        return result[-1][0], [message[1] for message in result]
+
+    async def get_events(self, start_from: int = None, kinds=(), max_batch: int = None) -> tuple[int, list[GameEvent]]:
+        """
+        Long polling of the game events, similar to get_message but the events are filtered by the kinds.
+
+        :param start_from: the offset of the first event to return. None means waiting for new events
+        :param kinds: only return the events of these kinds, all if empty
+        :param max_batch: return at most this number of the oldest events, message_max_batch if None
+        :return: the events, and the offset of the newest event read, including the ones filtered out. So the next
+          call can start from offset + 1 without reading them again.
+        """
+        if max_batch is None:
+            max_batch = self.message_max_batch
+        max_batch = max(max_batch, 1)
+        while True:
+            latest = self.event_buffer[-1].offset if self.event_buffer else -1
+            if start_from is None:
+                start_from = latest + 1
+            if latest < start_from:
+                await self.event_new.wait(latest + 1)
+                # without the message log, the offsets restart with the manager, so an offset from before that is
+                # reset to the next one
+                start_from = min(start_from, latest + 1)
+                continue
+            result = []
+            for i in range(self.event_buffer.locate(start_from), len(self.event_buffer)):
+                event = self.event_buffer[i]
+                if not kinds or event.kind in kinds:
+                    result.append(event)
+                    if len(result) >= max_batch:
+                        return event.offset, result
+            if result:
+                return latest, result
+            start_from = latest + 1  # all filtered out, wait for the newer ones
+
+    def get_output_stats(self) -> dict[str, ThroughputStat]:
+        """the number of lines and bytes read from the outputs, and the recent rates"""
+        return {stream_name: monitor.throughput.stat() for stream_name, monitor in self._monitor.items()}
 
     async def get_output(self) -> tuple[bytes, bytes]:
-        return b''.join(self._monitor['stdout'].history), b''.join(self._monitor['stderr'].history)
+        return self._monitor['stdout'].history.tail(), self._monitor['stderr'].history.tail()
+
+    def _executable_key(self) -> Optional[ExecutableKey]:
+        """identify the binary, so that a replaced or updated one is noticed"""
+        try:
+            path = os.path.realpath(shutil.which(self.executable) or self.executable)
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return path, stat.st_ino, stat.st_mtime_ns
+
+    def _refresh_game_version(self, key: ExecutableKey) -> asyncio.Task:
+        if self._version_refresh is not None and self._version_refresh[0] == key:
+            return self._version_refresh[1]  # not to launch another process for the same binary
+
+        async def refresh():
+            if (version := await self._read_game_version()) is not None:
+                self._game_version = key, version
+            return version
+
+        task = asyncio.create_task(refresh())
+        self._version_refresh = key, task
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+        task.add_done_callback(self._version_refreshed)
+        return task
+
+    def _version_refreshed(self, task: asyncio.Task):
+        if self._version_refresh is not None and self._version_refresh[1] is task:
+            self._version_refresh = None
 
     async def get_game_version(self) -> Optional[str]:
+        """
+        The output of `factorio --version`, cached by the path, inode and mtime of the executable. If the binary has
+        changed, the cached one is returned while the new one is read in the background. Note that a change of the
+        binary behind a wrapper script is not noticed.
+        """
+        if (key := self._executable_key()) is None:  # not found, it fails and logs the error
+            return await self._read_game_version()
+        if self._game_version is not None:
+            cached_key, version = self._game_version
+            if cached_key != key:
+                self._refresh_game_version(key)
+            return version
+        return await asyncio.shield(self._refresh_game_version(key))
+
+    async def _read_game_version(self) -> Optional[str]:
         try:
             process = await self._start_factorio_subprocess(["--version"])
             try:
@@ -0,0 +1,32 @@
+import re
+from typing import NamedTuple, Optional
+
+__all__ = ['GameEvent', 'parse_game_event']
+
+# e.g. 2024-01-01 00:00:00 [CHAT] player: hello
+_info_pattern = re.compile(r"(?P<datetime>\d\d\d\d-\d\d-\d\d \d\d:\d\d:\d\d) \[(?P<type>[A-Z]+)] (?P<message>.*)")
+_player_patterns = {
+    'CHAT': re.compile(r"(.+?): (.*)"),
+    'JOIN': re.compile(r"(.+?) joined the game()"),
+    'LEAVE': re.compile(r"(.+?) left the game()"),
+}
+
+
+class GameEvent(NamedTuple):
+    """a line of the game messages parsed once when it's read, kept as a tuple for the memory"""
+    offset: int  # of the message it's parsed from
+    timestamp: str
+    kind: str  # CHAT, JOIN, LEAVE, COMMAND, ...
+    player: str  # empty if the kind has no player
+    body: str  # the message without the player name, or the whole message for the other kinds
+
+
+def parse_game_event(line: bytes) -> Optional[tuple[str, str, str, str]]:
+    """parse a message line of the server stdout into the fields of GameEvent except the offset"""
+    if (match := _info_pattern.fullmatch(line.rstrip(b'\r\n').decode(errors='replace'))) is None:
+        return None
+    kind, message = match['type'], match['message']
+    player = ''
+    if (pattern := _player_patterns.get(kind)) is not None and (player_match := pattern.fullmatch(message)):
+        player, message = player_match.groups()
+    return match['datetime'], kind, player, message
@@ -0,0 +1,161 @@
+import bisect
+import logging
+import mmap
+import os
+from array import array
+from struct import Struct
+from typing import Optional
+
+__all__ = ['MessageLog']
+
+_record_header = Struct('<qI')  # offset, length of the data
+_segment_suffix = '.log'
+
+
+class _Segment:
+    """a segment file of the log, the records in it have continuous offsets starting from base"""
+
+    def __init__(self, path, base):
+        self.path = path
+        self.base = base
+        self.positions = array('Q')  # file position of each record
+        self.size = 0
+        self._mmap: Optional[mmap.mmap] = None
+
+    @property
+    def next_offset(self):
+        return self.base + len(self.positions)
+
+    def load(self):
+        """index the records in the file, and drop the incomplete or broken tail (e.g. the manager is killed)"""
+        file_size = os.path.getsize(self.path)
+        if file_size:
+            with open(self.path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                pos = 0
+                while pos + _record_header.size <= file_size:
+                    offset, length = _record_header.unpack_from(mm, pos)
+                    if offset != self.next_offset or pos + _record_header.size + length > file_size:
+                        break
+                    self.positions.append(pos)
+                    pos += _record_header.size + length
+            self.size = pos
+        if self.size != file_size:
+            logging.warning(f"drop {file_size - self.size} bytes of broken records at the end of {self.path}")
+            os.truncate(self.path, self.size)
+
+    def _view(self) -> mmap.mmap:
+        # the file is appended after mapping, so map it again to see the new records
+        if self._mmap is None or len(self._mmap) < self.size:
+            self.close()
+            with open(self.path, 'rb') as f:
+                self._mmap = mmap.mmap(f.fileno(), self.size, access=mmap.ACCESS_READ)
+        return self._mmap
+
+    def read(self, start, end, limit=None) -> list[tuple[int, bytes]]:
+        start, end = max(start, self.base), min(end, self.next_offset)
+        if limit is not None:
+            end = min(end, start + limit)
+        if start >= end:
+            return []
+        mm, result = self._view(), []
+        for i in range(start - self.base, end - self.base):
+            offset, length = _record_header.unpack_from(mm, self.positions[i])
+            pos = self.positions[i] + _record_header.size
+            result.append((offset, mm[pos:pos + length]))
+        return result
+
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+
+class MessageLog:
+    """
+    Append-only log of the messages on disk, so the offsets are kept and the old messages can be read after the
+    manager restarts.
+    It's split into segment files named by the offset of their first record, and each record is
+    (offset: int64, length: uint32, data). The segments are memory-mapped for reading, only the file positions of
+    the records are kept in memory. The oldest segments are removed when the total size exceeds retention_bytes.
+    All the methods are blocking, but the writes are buffered and the reads only touch the page cache mostly.
+    """
+
+    def __init__(self, path, *, segment_bytes=4 << 20, retention_bytes=64 << 20):
+        """
+        :param path: the directory of the segment files, created if not exists
+        :param segment_bytes: start a new segment file after the current one exceeds this size
+        :param retention_bytes: max total size of the segment files, the newest segment is always kept
+        """
+        self.path = path
+        self.segment_bytes = segment_bytes
+        self.retention_bytes = retention_bytes
+        os.makedirs(path, exist_ok=True)
+        self._segments: list[_Segment] = []
+        for name in os.listdir(path):
+            base, suffix = os.path.splitext(name)
+            if suffix == _segment_suffix and base.isdigit():
+                segment = _Segment(os.path.join(path, name), int(base))
+                segment.load()
+                self._segments.append(segment)
+        self._segments.sort(key=lambda segment: segment.base)
+        self._file = None
+        if self._segments:
+            self._file = open(self._segments[-1].path, 'ab')
+        logging.info(f"loaded message log {path}, offsets [{self.start}, {self.next_offset})")
+
+    @property
+    def start(self) -> int:
+        """offset of the oldest message kept"""
+        return self._segments[0].base if self._segments else 0
+
+    @property
+    def next_offset(self) -> int:
+        """offset of the next message, it continues after restarting"""
+        return self._segments[-1].next_offset if self._segments else 0
+
+    def _roll(self, base):
+        if self._file is not None:
+            self._file.close()
+        segment = _Segment(os.path.join(self.path, f'{base:020d}{_segment_suffix}'), base)
+        self._file = open(segment.path, 'ab')
+        self._segments.append(segment)
+        total = sum(segment.size for segment in self._segments)
+        while len(self._segments) > 1 and total > self.retention_bytes:
+            oldest = self._segments.pop(0)
+            total -= oldest.size
+            oldest.close()
+            os.remove(oldest.path)
+
+    def extend(self, messages: list[tuple[int, bytes]]):
+        """append the (offset, data) of messages, the offsets must be increasing"""
+        for offset, data in messages:
+            if offset < self.next_offset:
+                raise ValueError(f"offset {offset} is before the end of the log {self.next_offset}")
+            if not self._segments or offset != self.next_offset or self._segments[-1].size >= self.segment_bytes:
+                self._roll(offset)  # a gap in the offsets also starts a new segment
+            segment = self._segments[-1]
+            self._file.write(_record_header.pack(offset, len(data)))
+            self._file.write(data)
+            segment.positions.append(segment.size)
+            segment.size += _record_header.size + len(data)
+        if self._file is not None:
+            self._file.flush()
+
+    def read(self, start, end=None, limit=None) -> list[tuple[int, bytes]]:
+        """the (offset, data) of the messages in [start, end) which are still kept, at most limit of the oldest ones"""
+        if end is None:
+            end = self.next_offset
+        result = []
+        i = max(bisect.bisect_right(self._segments, start, key=lambda segment: segment.base) - 1, 0)
+        for segment in self._segments[i:]:
+            if segment.base >= end or (limit is not None and len(result) >= limit):
+                break
+            result.extend(segment.read(start, end, None if limit is None else limit - len(result)))
+        return result
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        for segment in self._segments:
+            segment.close()
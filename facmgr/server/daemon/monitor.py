@@ -1,21 +1,204 @@
 import asyncio
+import bisect
+import re
+import time
 from collections import deque, defaultdict
-from typing import Optional, TypedDict, Callable
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Optional, TypedDict, Callable, Iterator
+
+# the flags which can be scoped to a part of the combined pattern, e.g. (?i:...)
+_inline_flags = {re.IGNORECASE: b'i', re.MULTILINE: b'm', re.DOTALL: b's', re.VERBOSE: b'x'}
+_numbered_backref = re.compile(rb'\\[1-9]')
+
+
+def _embed_pattern(pattern: re.Pattern) -> Optional[bytes]:
+    """the pattern as a part of the alternation, or None if it cannot be combined with others"""
+    flags = pattern.flags
+    if flags & ~sum(_inline_flags):
+        return None
+    # the group numbers are shifted in the alternation, and the group names may conflict with other patterns
+    if pattern.groupindex or _numbered_backref.search(pattern.pattern):
+        return None
+    part = b'(?' + b''.join(c for f, c in _inline_flags.items() if flags & f) + b':' + pattern.pattern + b')'
+    try:
+        re.compile(part)
+    except re.error:  # e.g. global inline flags in the pattern
+        return None
+    return part
+
+
+class OutputHistory:
+    """
+    Ring buffer of the recent lines of a stream, bounded by the total bytes and optionally the number of lines.
+    The lines are addressed by their byte offsets from the beginning of the stream, which keep increasing after
+    the old lines are dropped or the history is cleared, so a reader can continue from where it stopped.
+    The lines and their offsets are kept in lists with a head index, like OffsetBuffer, so a ranged read bisects the
+    offsets and copies only the lines in the range. The dropped lines are compacted away in bulk.
+    """
+    COMPACT_MIN = 1024  # min number of the dropped lines before compacting
+
+    def __init__(self, max_bytes=None, maxlen=None):
+        self.max_bytes = max_bytes
+        self.maxlen = maxlen
+        self._offsets: list[int] = []  # offset of each line
+        self._lines: list[bytes] = []
+        self._head = 0  # index of the oldest line kept, the ones before it are dropped
+        self.start = 0  # offset of the oldest line kept
+        self.end = 0  # offset after the newest line
+
+    @property
+    def size(self):
+        """total bytes kept"""
+        return self.end - self.start
+
+    def __len__(self):
+        return len(self._lines) - self._head
+
+    def append(self, line: bytes):
+        self._offsets.append(self.end)
+        self._lines.append(line)
+        self.end += len(line)
+        self._trim()
+
+    def extend(self, lines: list[bytes]):
+        end, append = self.end, self._offsets.append
+        for line in lines:
+            append(end)
+            end += len(line)
+        self._lines.extend(lines)
+        self.end = end
+        self._trim()
+
+    def _trim(self):
+        head, offsets, lines = self._head, self._offsets, self._lines
+        while head < len(lines) and ((self.max_bytes is not None and self.end - self.start > self.max_bytes)
+                                     or (self.maxlen is not None and len(lines) - head > self.maxlen)):
+            self.start = offsets[head] + len(lines[head])
+            lines[head] = b''  # release it before compacting
+            head += 1
+        if head > self.COMPACT_MIN and head * 2 > len(lines):  # amortized O(1) per line
+            del offsets[:head], lines[:head]
+            head = 0
+        self._head = head
+
+    def clear(self):
+        self._offsets.clear()
+        self._lines.clear()
+        self._head = 0
+        self.start = self.end
+
+    def tail(self, limit=None) -> bytes:
+        """the last limit bytes (all if None), only the lines within the limit are copied"""
+        if limit is None:
+            return b''.join(self._lines[self._head:])
+        if limit <= 0:
+            return b''
+        i, size = len(self._lines), 0
+        while i > self._head and size < limit:
+            i -= 1
+            size += len(self._lines[i])
+        return b''.join(self._lines[i:])[-limit:]
+
+    def read(self, start=None, end=None) -> tuple[int, bytes]:
+        """
+        Read the bytes in [start, end) of the stream, clamped to what is kept.
+
+        :return: the offset where the result actually starts, and the bytes
+        """
+        start = self.start if start is None else max(start, self.start)
+        end = self.end if end is None else min(end, self.end)
+        if start >= end:
+            return start, b''
+        offsets = self._offsets
+        i = max(bisect.bisect_right(offsets, start, self._head) - 1, self._head)
+        j = bisect.bisect_left(offsets, end, i)
+        first_offset = offsets[i]
+        return start, b''.join(self._lines[i:j])[start - first_offset:end - first_offset]
+
+
+@dataclass
+class ThroughputStat:
+    lines: int
+    bytes: int
+    lines_per_sec: float
+    bytes_per_sec: float
+
+
+class ThroughputMeter:
+    """count the lines and bytes, and their rates averaged over the recent window"""
+
+    def __init__(self, window=10.):
+        self.window = window
+        self.lines = 0
+        self.bytes = 0
+        self._samples: deque[tuple[float, int, int]] = deque()  # (time, lines, bytes) before a batch, 1 per second
+
+    def _drop_old(self, now):
+        while self._samples and now - self._samples[0][0] > self.window:
+            self._samples.popleft()
+
+    def add(self, lines: int, nbytes: int):
+        now = time.monotonic()
+        if not self._samples or now - self._samples[-1][0] >= 1:
+            self._samples.append((now, self.lines, self.bytes))
+            self._drop_old(now)
+        self.lines += lines
+        self.bytes += nbytes
+
+    def stat(self) -> ThroughputStat:
+        now = time.monotonic()
+        self._drop_old(now)
+        if not self._samples:
+            return ThroughputStat(self.lines, self.bytes, 0., 0.)
+        start, lines, nbytes = self._samples[0]
+        elapsed = max(now - start, 1.)  # not to report a burst in a moment as a huge rate
+        return ThroughputStat(self.lines, self.bytes, (self.lines - lines) / elapsed, (self.bytes - nbytes) / elapsed)
+
+
+class StreamCapture:
+    """the lines between a begin and an end marker line, see AsyncStreamMonitor.capture"""
+
+    def __init__(self, begin: bytes, end: bytes):
+        self.begin = begin
+        self.end = end
+        self.started = False
+        self.abandoned = False  # no one waits for it, but its lines are still kept out of the stream
+        self.lines: list[bytes] = []
+        self.done = asyncio.get_running_loop().create_future()  # set with the lines when the end marker is read
+        self.discarded = False
+
+    def discard(self):
+        """the markers will not be in the stream, e.g. the command is not written, so forget it when it's left"""
+        self.discarded = True
 
 
 class AsyncStreamMonitor:
     _stream: asyncio.StreamReader = None
     stream: asyncio.StreamReader
-    history: deque
+    history: OutputHistory
     logger_callback: Optional[Callable[[bytes], None]] = None
-    type KeywordInfo = TypedDict('KeywordInfo', {'count': int, 'found': asyncio.Event, 'result': Optional[bytes]})
-    _keywords: defaultdict[bytes, KeywordInfo]
+    batch_callback: Optional[Callable[[list[bytes]], None]] = None  # the lines read in a chunk
+    throughput: ThroughputMeter
+    READ_SIZE = 1 << 16
+    type Keyword = bytes | re.Pattern[bytes]
+    type KeywordInfo = TypedDict('KeywordInfo', {'count': int, 'found': asyncio.Event,
+                                                 'result': Optional[bytes | re.Match[bytes]]})
+    _keywords: defaultdict[Keyword, KeywordInfo]
+    _matcher: Optional[re.Pattern[bytes]] = None  # alternation of all pending keywords to filter the lines
+    _unfiltered: list[Keyword]  # the patterns not in the matcher, checked for every line
+    _matcher_dirty = False
     _task: asyncio.Task
+    _captures: dict[bytes, StreamCapture]  # by the begin marker
+    _capturing: Optional[StreamCapture] = None
 
-    def __init__(self, initial_stream=None, *, history_maxlen=None, logger_callback=None):
+    def __init__(self, initial_stream=None, *, history_maxlen=None, history_max_bytes=None, logger_callback=None):
         self._keywords = defaultdict(lambda: {'count': 0, 'found': asyncio.Event(), 'result': None})
-        self.history = deque(maxlen=history_maxlen)
+        self._captures = {}
+        self._unfiltered = []
+        self.history = OutputHistory(history_max_bytes, history_maxlen)
         self.logger_callback = logger_callback
+        self.throughput = ThroughputMeter()
         self.stream = initial_stream
 
     # use stream as property to avoid inconsistency of setting value directly
@@ -29,32 +212,129 @@ class AsyncStreamMonitor:
         if old_stream is not None:
             self.history.clear()
             self._keywords.clear()
+            self._matcher_dirty = True
+            self._capturing = None
+            self._captures = {begin: capture for begin, capture in self._captures.items() if not capture.abandoned}
             self._task.cancel()
         if new_stream is not None:
             self._task = asyncio.create_task(self._run())
 
     async def _run(self):
-        async for line in self._stream:
-            assert isinstance(line, bytes)
-            self.history.append(line)
-            if self.logger_callback is not None:
+        # read in large chunks and split them in bulk, rather than awaiting every line
+        stream, partial = self._stream, b''
+        while chunk := await stream.read(self.READ_SIZE):
+            *lines, partial = (partial + chunk).split(b'\n')
+            if lines:
+                self._ingest([line + b'\n' for line in lines], len(chunk))
+            else:  # in the middle of a long line, count the bytes now and the line when it ends
+                self.throughput.add(0, len(chunk))
+        if partial:  # the last line without a newline
+            self._ingest([partial], 0)
+
+    def _ingest(self, lines: list[bytes], nbytes: int):
+        self.throughput.add(len(lines), nbytes)
+        if self._captures and not (lines := self._feed_captures(lines)):
+            return
+        self.history.extend(lines)
+        if self.logger_callback is not None:
+            for line in lines:
                 self.logger_callback(line)
-            for pattern, info in self._keywords.items():
-                if not info['found'].is_set() and pattern in line:
-                    info['result'] = line
-                    info['found'].set()
+        if self.batch_callback is not None:
+            self.batch_callback(lines)
+        if self._keywords:
+            for line in lines:
+                self._match(line)
+
+    def _feed_captures(self, lines: list[bytes]) -> list[bytes]:
+        """collect the lines of the captures, return the other lines"""
+        rest = []
+        for line in lines:
+            if (capture := self._capturing) is not None:
+                if line.rstrip(b'\r\n') == capture.end:
+                    self._capturing = None
+                    del self._captures[capture.begin]
+                    if not capture.done.done():
+                        capture.done.set_result(capture.lines)
+                elif not capture.abandoned:
+                    capture.lines.append(line)
+            elif (capture := self._captures.get(line.rstrip(b'\r\n'))) is not None:
+                capture.started = True
+                self._capturing = capture
+            else:
+                rest.append(line)
+        return rest
+
+    @contextmanager
+    def capture(self, begin: bytes, end: bytes) -> Iterator[StreamCapture]:
+        """
+        Collect the lines between the lines equal to the begin and end markers (without the line breaks), e.g. the
+        output of a command wrapped by the prints of the markers. Await the done future of the capture for the lines.
+        The markers should be unique, and the captures should not overlap in the stream.
+        The captured lines and the markers are taken out of the stream, so they are not in the history or passed to
+        the callbacks. If the capture is left before the end marker, e.g. timeout, its remaining lines are still
+        dropped when they come, until the end marker or the stream is changed.
+        """
+        capture = self._captures[begin] = StreamCapture(begin, end)
+        try:
+            yield capture
+        finally:
+            if self._captures.get(begin) is capture:
+                if capture.discarded:
+                    del self._captures[begin]
+                else:
+                    capture.abandoned = True
+
+    def _build_matcher(self):
+        parts, self._unfiltered = [], []
+        for keyword, info in self._keywords.items():
+            if info['found'].is_set():
+                continue
+            if isinstance(keyword, bytes):
+                parts.append(re.escape(keyword))
+            elif (part := _embed_pattern(keyword)) is not None:
+                parts.append(part)
+            else:
+                self._unfiltered.append(keyword)
+        self._matcher = re.compile(b'|'.join(parts)) if parts else None
+        self._matcher_dirty = False
+
+    def _match(self, line: bytes):
+        if self._matcher_dirty:
+            self._build_matcher()
+        # a single search for most lines. The alternation only reports the first keyword at a position,
+        # so every keyword is checked again for the (rare) lines matching any of them
+        candidates = self._unfiltered
+        if self._matcher is not None and self._matcher.search(line) is not None:
+            candidates = list(self._keywords)
+        for keyword in candidates:
+            info = self._keywords[keyword]
+            if info['found'].is_set():
+                continue
+            if isinstance(keyword, bytes):
+                if keyword not in line:
+                    continue
+                result = line
+            elif (result := keyword.search(line)) is None:
+                continue
+            info['result'] = result
+            info['found'].set()
+            self._matcher_dirty = True
 
-    async def wait_for(self, keyword: bytes):
+    async def wait_for(self, keyword: Keyword):
         """
         Wait until the keyword found in stream.
             1. Coroutine-safe: can handle multiple concurrent tasks waiting for the same keyword;
             2. It will never finish if the stream is finished or changed, so use asyncio.wait_for for timeout if needed;
             3. It can wait for the keyword even if the stream is not available yet
 
-        :param keyword: the bytes string to search for (only within a single line)
-        :return: the line containing the keyword
+        :param keyword: the bytes string or a compiled bytes regex to search for (only within a single line)
+        :return: the line containing the keyword, or the re.Match if keyword is a regex
         """
+        if isinstance(keyword, re.Pattern) and not isinstance(keyword.pattern, bytes):
+            raise TypeError(f"the stream is bytes, but the pattern is {type(keyword.pattern).__name__}")
         kw_info = self._keywords[keyword]
+        if not kw_info['count']:
+            self._matcher_dirty = True
         kw_info['count'] += 1
         try:
             await kw_info['found'].wait()
@@ -62,6 +342,7 @@ class AsyncStreamMonitor:
             kw_info['count'] -= 1
             if not kw_info['count']:
                 del self._keywords[keyword]
+                self._matcher_dirty = True
         return kw_info['result']
 
     async def wait_eof(self):
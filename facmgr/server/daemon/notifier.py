@@ -0,0 +1,58 @@
+import asyncio
+import heapq
+import itertools
+from typing import Callable, Optional
+
+__all__ = ['OffsetNotifier']
+
+
+class OffsetNotifier:
+    """
+    Wake up the long pollers by the offset they are waiting for, instead of a shared asyncio.Event.
+    Each waiter sleeps until the head (the newest offset) reaches its own threshold, so there is no clear() that can
+    swallow a wakeup of the other waiters, and a waiter is not woken up before there's something for it.
+    """
+
+    def __init__(self, head: Callable[[], Optional[int]]):
+        """
+        :param head: returns the newest offset, or None if there's nothing yet
+        """
+        self._head = head
+        self._waiters: list[tuple[int, int, asyncio.Future]] = []  # heap of (threshold, seq, future)
+        self._seq = itertools.count()  # keep the waiters of the same threshold in order, and never compare futures
+        self._cancelled = 0
+
+    def __len__(self):
+        """number of the waiters, including the cancelled ones not removed yet"""
+        return len(self._waiters)
+
+    def set(self):
+        """call it after the head advances, to wake up the waiters whose threshold is reached"""
+        if (head := self._head()) is None:
+            return
+        while self._waiters and self._waiters[0][0] <= head:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(head)
+            else:
+                self._cancelled -= 1
+
+    async def wait(self, threshold: int) -> int:
+        """
+        Wait until the head offset >= threshold, return instantly if it is already.
+
+        :return: the head offset when it's woken up
+        """
+        if (head := self._head()) is not None and head >= threshold:
+            return head
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (threshold, next(self._seq), future))
+        try:
+            return await future
+        except asyncio.CancelledError:
+            self._cancelled += 1
+            if self._cancelled > len(self._waiters) // 2:  # drop the cancelled ones, e.g. the clients disconnected
+                self._waiters = [waiter for waiter in self._waiters if not waiter[2].done()]
+                heapq.heapify(self._waiters)
+                self._cancelled = 0
+            raise
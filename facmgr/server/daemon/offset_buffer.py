@@ -0,0 +1,67 @@
+import bisect
+import itertools
+from typing import Any, Iterator, Optional, Sequence
+
+__all__ = ['OffsetBuffer']
+
+
+class OffsetBuffer(Sequence):
+    """
+    Ring buffer of the items whose first field is an increasing offset, e.g. (offset, message) or GameEvent.
+    It can be used like a deque(maxlen=...), but the random access is O(1) and the items since an offset are located
+    directly: by arithmetic if the offsets are continuous, which they normally are, or by bisect otherwise.
+    """
+
+    def __init__(self, maxlen: Optional[int] = None):
+        self.maxlen = maxlen
+        self._items: list[Sequence] = []
+        self._head = 0  # index of the oldest item in _items once it's full
+
+    def __len__(self):
+        return len(self._items)
+
+    def __getitem__(self, i: int) -> Any:
+        size = len(self._items)
+        if i < 0:
+            i += size
+        if not 0 <= i < size:
+            raise IndexError('OffsetBuffer index out of range')
+        return self._items[(self._head + i) % size]
+
+    def __iter__(self) -> Iterator:
+        return itertools.chain(self._items[self._head:], self._items[:self._head])
+
+    def __reversed__(self) -> Iterator:
+        return itertools.chain(reversed(self._items[:self._head]), reversed(self._items[self._head:]))
+
+    def append(self, item: Sequence):
+        if self.maxlen is None or len(self._items) < self.maxlen:
+            self._items.append(item)
+        elif self.maxlen:
+            self._items[self._head] = item
+            self._head = (self._head + 1) % self.maxlen
+
+    def extend(self, items):
+        for item in items:
+            self.append(item)
+
+    def clear(self):
+        self._items.clear()
+        self._head = 0
+
+    def locate(self, offset: int) -> int:
+        """index of the first item whose offset >= the offset, len(self) if there's none"""
+        if not self._items:
+            return 0
+        i = offset - self[0][0]
+        if i <= 0:
+            return 0
+        if i < len(self._items) and self[i][0] == offset:
+            return i
+        return bisect.bisect_left(self, offset, key=lambda item: item[0])
+
+    def since(self, offset: int, limit: Optional[int] = None) -> list:
+        """the items whose offset >= the offset, at most limit of the oldest ones"""
+        start = self.locate(offset)
+        stop = len(self._items) if limit is None else min(len(self._items), start + limit)
+        return [self[i] for i in range(start, stop)]
@@ -0,0 +1,229 @@
+import asyncio
+import itertools
+import logging
+import time
+from dataclasses import dataclass
+from struct import Struct
+from typing import Optional
+
+__all__ = ['RconClient', 'RconError', 'RconStat']
+
+_header = Struct('<iii')  # size (of the rest of the packet), id, type
+_AUTH = 3
+_AUTH_RESPONSE = _EXEC_COMMAND = 2
+_AUTH_ID = 0  # the ids of the commands start from 1
+_MAX_BODY = 4096  # a longer response is split into multiple packets
+_MIN_SIZE, _MAX_SIZE = 10, _MAX_BODY + 10  # size of id, type, body and two null bytes
+
+
+class RconError(ConnectionError):
+    """cannot connect or authenticate, or the connection is lost before the response"""
+
+
+def _packet(request_id: int, packet_type: int, body: str) -> bytes:
+    data = body.encode() + b'\0\0'
+    return _header.pack(len(data) + 8, request_id, packet_type) + data
+
+
+async def _read_packet(reader: asyncio.StreamReader) -> tuple[int, int, bytes]:
+    size, request_id, packet_type = _header.unpack(await reader.readexactly(_header.size))
+    if not _MIN_SIZE <= size <= _MAX_SIZE:  # not to read a garbage size, e.g. a negative one or a huge allocation
+        raise RconError(f"malformed RCON packet of size {size}")
+    body = await reader.readexactly(size - 8)
+    return request_id, packet_type, body[:-2]
+
+
+@dataclass
+class RconStat:
+    connections: int = 0
+    pending: int = 0  # commands waiting for the responses
+    commands: int = 0  # commands responded
+    errors: int = 0  # commands failed or timed out, and failed connecting attempts
+    mean_latency: float = 0.  # seconds from sending a command to the response
+
+
+class _Connection:
+    """
+    An authenticated connection, the commands are pipelined and their responses are matched by the ids.
+    A response longer than a packet is split, so every command is followed by an empty one as the sentinel. The
+    server answers the commands in order, so the parts of a response are all read once the sentinel is answered.
+    """
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self.pending: dict[int, asyncio.Future] = {}
+        self._parts: dict[int, list[bytes]] = {}  # of the pending responses, by the command id
+        self._ids = itertools.count()
+        self._task = asyncio.create_task(self._read())
+
+    @classmethod
+    async def open(cls, host, port, password, timeout) -> "_Connection":
+        async with asyncio.timeout(timeout):
+            reader, writer = await asyncio.open_connection(host, port)
+            try:
+                writer.write(_packet(_AUTH_ID, _AUTH, password))
+                await writer.drain()
+                # an empty response value may come before the auth response
+                while (packet := await _read_packet(reader))[1] != _AUTH_RESPONSE:
+                    pass
+            except BaseException:
+                writer.close()
+                raise
+        if packet[0] == -1:
+            writer.close()
+            raise RconError("the RCON password is refused")
+        return cls(reader, writer)
+
+    @property
+    def closed(self):
+        return self._task.done()
+
+    async def _read(self):
+        try:
+            while True:
+                request_id, _, body = await _read_packet(self.reader)
+                if request_id % 2:  # a part of the response of a command
+                    if (parts := self._parts.get(request_id)) is not None:
+                        parts.append(body)
+                elif (parts := self._parts.pop(request_id - 1, None)) is not None:  # the sentinel, it's complete
+                    if not (future := self.pending.pop(request_id - 1)).done():
+                        future.set_result(b''.join(parts).decode(errors='replace'))
+        except (OSError, asyncio.IncompleteReadError) as e:  # including RconError of a malformed packet
+            if isinstance(e, RconError):
+                logging.warning(f"drop the RCON connection. {e}")
+        finally:
+            self.writer.close()
+            for future in self.pending.values():
+                if not future.done():
+                    future.set_exception(RconError("the RCON connection is lost"))
+            self.pending.clear()
+            self._parts.clear()
+
+    async def send(self, commands: list[str]) -> list[asyncio.Future]:
+        """write the commands at once, and return the futures of their responses"""
+        if self.closed:
+            raise RconError("the RCON connection is lost")
+        loop, futures, packets = asyncio.get_running_loop(), [], []
+        for command in commands:
+            # odd ids for the commands, and the following even ones for their sentinels, wrapping around in int32
+            request_id = next(self._ids) % 0x3fffffff * 2 + 1
+            future = self.pending[request_id] = loop.create_future()
+            self._parts[request_id] = []
+            futures.append(future)
+            packets.append(_packet(request_id, _EXEC_COMMAND, command))
+            packets.append(_packet(request_id + 1, _EXEC_COMMAND, ''))
+        try:
+            self.writer.write(b''.join(packets))
+            await self.writer.drain()
+        except OSError as e:
+            self.close()
+            raise RconError(f"the RCON connection is lost. {type(e).__name__}: {e}") from e
+        return futures
+
+    def discard(self, futures: list[asyncio.Future]):
+        """stop waiting for the responses, e.g. timed out"""
+        futures = set(futures)
+        for request_id in [request_id for request_id, future in self.pending.items() if future in futures]:
+            del self.pending[request_id], self._parts[request_id]
+
+    def close(self):
+        self._task.cancel()
+        self.writer.close()
+
+
+class RconClient:
+    """
+    RCON client with a small pool of persistent connections. A command is sent on the connection with the fewest
+    responses pending, and another connection is opened only if all of them are busy. The broken connections are
+    dropped and reopened on demand, with a backoff after failed attempts.
+    """
+    RECONNECT_DELAY = 1.
+    RECONNECT_MAX_DELAY = 30.
+
+    def __init__(self, host: str, port: int, password: str, *, pool_size=2, timeout=10.):
+        """
+        :param pool_size: max number of connections
+        :param timeout: max seconds for connecting and for the responses of a batch of commands
+        """
+        self.host = host
+        self.port = port
+        self.password = password
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self._connections: list[_Connection] = []
+        self._opening: Optional[asyncio.Task] = None
+        self._retry_at = 0.
+        self._delay = self.RECONNECT_DELAY
+        self._latency_sum = 0.
+        self._stat = RconStat()
+
+    @property
+    def stat(self) -> RconStat:
+        self._connections = [connection for connection in self._connections if not connection.closed]
+        self._stat.connections = len(self._connections)
+        self._stat.pending = sum(len(connection.pending) for connection in self._connections)
+        return self._stat
+
+    async def _open(self) -> _Connection:
+        if (delay := self._retry_at - time.monotonic()) > 0:
+            raise RconError(f"RCON {self.host}:{self.port} is unavailable, retrying in {delay:.1f}s")
+        try:
+            connection = await _Connection.open(self.host, self.port, self.password, self.timeout)
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError) as e:
+            self._stat.errors += 1
+            self._retry_at = time.monotonic() + self._delay
+            self._delay = min(self._delay * 2, self.RECONNECT_MAX_DELAY)
+            raise RconError(f"cannot connect to RCON {self.host}:{self.port}. {type(e).__name__}: {e}") from e
+        self._delay = self.RECONNECT_DELAY
+        self._connections.append(connection)
+        return connection
+
+    def _opened(self, task: asyncio.Task):
+        self._opening = None
+        if not task.cancelled():
+            task.exception()  # retrieved by the waiters if any
+
+    async def _get_connection(self) -> _Connection:
+        self._connections = [connection for connection in self._connections if not connection.closed]
+        best = min(self._connections, key=lambda connection: len(connection.pending), default=None)
+        if best is not None and (not best.pending or len(self._connections) >= self.pool_size):
+            return best
+        if self._opening is None:
+            self._opening = asyncio.create_task(self._open())
+            self._opening.add_done_callback(self._opened)
+        if best is not None:  # don't wait for the new one
+            return best
+        return await asyncio.shield(self._opening)
+
+    async def execute_batch(self, commands: list[str]) -> list[str]:
+        """
+        Run the commands in order on one connection, and return their responses.
+        Raise RconError if the connection fails, or TimeoutError if the responses don't come in time.
+        """
+        connection = await self._get_connection()
+        start = time.perf_counter()
+        futures = await connection.send(commands)
+        try:
+            async with asyncio.timeout(self.timeout):
+                responses = await asyncio.gather(*futures)
+        except BaseException:
+            self._stat.errors += len(commands)
+            connection.discard(futures)
+            for future in futures:
+                future.cancel()
+            raise
+        self._stat.commands += len(commands)
+        self._latency_sum += (time.perf_counter() - start) * len(commands)
+        self._stat.mean_latency = self._latency_sum / self._stat.commands
+        return responses
+
+    async def execute(self, command: str) -> str:
+        return (await self.execute_batch([command]))[0]
+
+    def close(self):
+        if self._opening is not None:
+            self._opening.cancel()
+        for connection in self._connections:
+            connection.close()
+        self._connections.clear()
@@ -0,0 +1,167 @@
+import array
+import asyncio
+import importlib.util
+import math
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+__all__ = ['ResourceSampler', 'ResourceSeries', 'ResourcePoint']
+
+
+@dataclass
+class ResourcePoint:
+    """the samples in a bucket of a window, the rates are averaged, the rss and threads are the max"""
+    time: float  # unix time of the last sample in the bucket
+    cpu_percent: float  # of a single core, summed over the process tree
+    rss: int  # bytes
+    read_bytes_per_sec: float
+    write_bytes_per_sec: float
+    threads: int
+    samples: int
+
+
+class ResourceSeries:
+    """
+    Ring buffer of the samples with a fixed capacity, one preallocated array of doubles per field, so the memory is
+    bounded from the start and appending a sample allocates nothing.
+    """
+    FIELDS = ('time', 'cpu_percent', 'rss', 'read_bytes_per_sec', 'write_bytes_per_sec', 'threads')
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._columns = [array.array('d', bytes(8 * capacity)) for _ in self.FIELDS]
+        self._next = 0  # index of the next sample
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def append(self, *values: float):
+        """the values of the FIELDS in order, the time should be increasing"""
+        i = self._next
+        for column, value in zip(self._columns, values, strict=True):
+            column[i] = value
+        self._next = (i + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+
+    def _first_since(self, since: float) -> int:
+        """the position (0 for the oldest) of the first sample at or after the time"""
+        times, base, lo, hi = self._columns[0], self._next - self._count, 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if times[(base + mid) % self.capacity] < since:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _slice(self, column: array.array, lo: int, hi: int) -> array.array:
+        """the values at the positions [lo, hi)"""
+        start = (self._next - self._count + lo) % self.capacity
+        if (end := start + hi - lo) <= self.capacity:
+            return column[start:end]
+        return column[start:] + column[:end - self.capacity]
+
+    def window(self, seconds: float, points: int, now: float = None) -> list[ResourcePoint]:
+        """downsample the samples in the last seconds into at most the number of buckets of the same duration"""
+        now = time.time() if now is None else now
+        start, step = now - seconds, seconds / points
+        times, cpu, rss, read, write, threads = self._columns
+        result, lo = [], self._first_since(start)
+        for bucket in range(1, points + 1):  # the bounds are located by bisection, and the values summed in bulk
+            hi = self._count if bucket == points else self._first_since(start + bucket * step)
+            if hi > lo:
+                result.append(ResourcePoint(
+                    self._slice(times, hi - 1, hi)[0], sum(self._slice(cpu, lo, hi)) / (hi - lo),
+                    int(max(self._slice(rss, lo, hi))), sum(self._slice(read, lo, hi)) / (hi - lo),
+                    sum(self._slice(write, lo, hi)) / (hi - lo), int(max(self._slice(threads, lo, hi))), hi - lo
+                ))
+                lo = hi
+        return result
+
+
+class ResourceSampler:
+    """
+    Sample the CPU, memory, I/O and threads of a process and its children (e.g. the server behind a wrapper script).
+    psutil (the resources extra) is imported only when the sampling starts, check available() before using it.
+    The samples are taken in a thread, so walking the process tree doesn't block the event loop.
+    """
+    WINDOWS = {'minute': 60., 'hour': 3600., 'day': 86400.}
+
+    def __init__(self, interval=5., *, retention=86400., points=60):
+        """
+        :param interval: seconds between the samples
+        :param retention: seconds of the samples kept
+        :param points: max number of the points of a window
+        """
+        self.interval = interval
+        self.points = points
+        self.series = ResourceSeries(math.ceil(retention / interval))
+        self._pid: Optional[int] = None
+        self._processes = {}  # psutil.Process by pid, kept for the CPU times between the samples
+        self._io: dict[int, tuple[int, int]] = {}  # (read bytes, write bytes) by pid
+        self._last: Optional[float] = None  # monotonic time of the last sample
+
+    @staticmethod
+    def available() -> bool:
+        """whether psutil is installed"""
+        return importlib.util.find_spec('psutil') is not None
+
+    def sample(self, pid: int) -> bool:
+        """take a sample of the process tree, return False if the process is gone"""
+        if (values := self._measure(pid)) is None:
+            return False
+        self.series.append(*values)
+        return True
+
+    def _measure(self, pid: int) -> Optional[tuple[float, ...]]:
+        """the values of the ResourceSeries.FIELDS for the process tree, None if the process is gone"""
+        import psutil
+        if pid != self._pid:
+            self._pid, self._processes, self._io, self._last = pid, {}, {}, None
+        try:
+            root = self._processes.get(pid) or psutil.Process(pid)
+            tree = [root, *root.children(recursive=True)]
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            return None
+        now = time.monotonic()
+        elapsed = None if self._last is None else now - self._last
+        processes, io = {}, {}
+        cpu = rss = threads = read = write = 0
+        for process in tree:
+            process = self._processes.get(process.pid, process)
+            try:
+                with process.oneshot():
+                    cpu += process.cpu_percent(None)  # 0 at the first call for a process
+                    rss += process.memory_info().rss
+                    threads += process.num_threads()
+                    try:
+                        counters = process.io_counters()
+                    except (AttributeError, psutil.AccessDenied):  # not supported on macOS
+                        counters = None
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+            processes[process.pid] = process
+            if counters is not None:
+                io[process.pid] = counters.read_bytes, counters.write_bytes
+                last_read, last_write = self._io.get(process.pid, io[process.pid])
+                read += max(counters.read_bytes - last_read, 0)
+                write += max(counters.write_bytes - last_write, 0)
+        self._processes, self._io, self._last = processes, io, now
+        if not elapsed:
+            read = write = 0
+            elapsed = 1.
+        return time.time(), cpu, rss, read / elapsed, write / elapsed, threads
+
+    async def run(self, pid: int):
+        """sample the process tree every interval until the process exits or it's cancelled"""
+        # measured in a thread, but appended here so that the windows never see a half-written sample
+        while (values := await asyncio.to_thread(self._measure, pid)) is not None:
+            self.series.append(*values)
+            await asyncio.sleep(self.interval)
+
+    def stats(self) -> dict[str, list[ResourcePoint]]:
+        """the downsampled windows of the last minute, hour and day"""
+        now = time.time()
+        return {name: self.series.window(seconds, self.points, now) for name, seconds in self.WINDOWS.items()}
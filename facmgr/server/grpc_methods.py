@@ -1,18 +1,42 @@
 import logging
-from typing import Literal
+from dataclasses import asdict
+from typing import Literal, Optional
 
-from ..protobuf.facmgr_pb2 import SaveNameList, SaveName, SaveStat, Status, GameUpdates, ManagerStat, OutputStreams
+from ..protobuf.facmgr_pb2 import (
+    SaveNameList, SaveName, SaveStat, Status, GameUpdates, ManagerStat, OutputStreams, SaveQuery, SaveQueryResult,
+    SaveSummary, CacheStat, OutputStat, GameEvents, GameEvent, SubscriberStat, OverflowPolicy, CommandStat,
+    CommandOutput, RconStat, ResourceStats, ResourceWindow, ResourcePoint
+)
 from ..protobuf.facmgr_pb2_grpc import ServerManagerServicer
+from ..protobuf.error_code import SUCCESS, NOT_AVAILABLE
 
 from .save_explorer import SavesExplorer
 from . import daemon
 
 
+def _overflow_policy(request) -> Optional[str]:
+    if request.overflow == OverflowPolicy.DEFAULT:
+        return None
+    return OverflowPolicy.Name(request.overflow).lower().replace('_', '-')
+
+
+def _save_summary(name, file_stat, metadata) -> SaveSummary:
+    summary = SaveSummary(
+        name=name, version=metadata.get('version', ''), scenario=metadata.get('scenario', ''),
+        mtime_ns=file_stat.st_mtime_ns, size=file_stat.st_size, mod_count=len(metadata.get('mods', []))
+    )
+    if (ticks := metadata.get('ticks')) is not None:
+        summary.play_ticks = ticks[2]
+        summary.total_ticks = ticks[0]
+    return summary
+
+
 class ServerManager(ServerManagerServicer):
     def __init__(self, saves_dir, fac_exec, fac_timeout, *,
-                 welcome_message: str = 'welcome to Factorio server', **kwargs):
-        self.saves = SavesExplorer(saves_dir)
+                 welcome_message: str = 'welcome to Factorio server', saves_index=None, scan_workers=None, **kwargs):
+        self.saves = SavesExplorer(saves_dir, index_path=saves_index, scan_workers=scan_workers)
         self.daemon = daemon.FactorioServerDaemon(fac_exec, timeout=fac_timeout, **kwargs)
+        self.daemon.save_callback = self.saves.prewarm  # refresh the autosaves as soon as they are written
         self.welcome = welcome_message
 
     async def GetManagerStatus(self, request, context):
@@ -31,7 +55,13 @@ class ServerManager(ServerManagerServicer):
             welcome=self.welcome,
             running=is_running,
             game_version=game_version,
-            current_save=current_save
+            current_save=current_save,
+            saves_cache=CacheStat(**asdict(self.saves.cache_stat)),
+            output_stats=[OutputStat(stream=stream_name, **asdict(stat))
+                          for stream_name, stat in self.daemon.get_output_stats().items()],
+            subscribers=[SubscriberStat(**asdict(stat)) for stat in self.daemon.get_subscriber_stats()],
+            commands=CommandStat(**asdict(self.daemon.get_command_stat())),
+            rcon=None if (rcon_stat := self.daemon.get_rcon_stat()) is None else RconStat(**asdict(rcon_stat))
         )
 
     async def GetAllSaveName(self, request, context):
@@ -42,6 +72,22 @@ class ServerManager(ServerManagerServicer):
     async def GetStatByName(self, request, context):
         return SaveStat(stat_json=await self.saves.load_json(request.name))
 
+    async def QuerySaves(self, request, context):
+        total, rows = await self.saves.query(
+            SaveQuery.SortKey.Name(request.sort_by).lower(), request.descending,
+            version=request.version if request.HasField("version") else None,
+            scenario=request.scenario if request.HasField("scenario") else None,
+            mod_name=request.mod_name if request.HasField("mod_name") else None,
+            offset=request.offset, limit=request.limit or None
+        )
+        result = SaveQueryResult(total=total)
+        result.saves.extend(_save_summary(*row) for row in rows)
+        return result
+
+    async def ScanSaves(self, request, context):
+        async for row in self.saves.scan(self.saves.SUMMARY_KEYS):
+            yield _save_summary(*row)
+
     async def StartServerByName(self, request, context):
         if not request.HasField("save_name"):
             return Status(code=daemon.BAD_ARG, message="Save name is required for starting a server")
@@ -65,19 +111,72 @@ class ServerManager(ServerManagerServicer):
         return Status(**result)
 
     async def InGameCommand(self, request, context):
-        return Status(**self.daemon.in_game_command(request.cmd))
+        return Status(**await self.daemon.run_command(request.cmd))
+
+    async def CaptureCommand(self, request, context):
+        kwargs = {'timeout': request.timeout} if request.HasField("timeout") else {}
+        status, lines = await self.daemon.capture_command(request.cmd, **kwargs)
+        return CommandOutput(status=Status(**status), lines=lines)
 
     async def WaitForUpdates(self, request, context):
         from_offset = None
         if request.HasField("from_offset"):
             from_offset = request.from_offset
-        offset, messages = await self.daemon.get_message(from_offset)
+        max_batch = request.max_batch if request.HasField("max_batch") else None
+        offset, messages = await self.daemon.get_message(from_offset, max_batch)
         return GameUpdates(latest_offset=offset, updates=messages)
 
+    async def SubscribeUpdates(self, request, context):
+        from_offset = request.from_offset if request.HasField("from_offset") else None
+        max_batch = request.max_batch if request.HasField("max_batch") else self.daemon.message_max_batch
+        subscription = self.daemon.subscribe_messages(context.peer(), from_offset, _overflow_policy(request))
+        try:
+            # until the client cancels it, or it's disconnected for lagging
+            while (batch := await subscription.get(max_batch)) is not None:
+                messages, dropped = batch
+                yield GameUpdates(latest_offset=messages[-1][0], updates=[message[1] for message in messages],
+                                  dropped=dropped)
+            yield GameUpdates(latest_offset=subscription.gap - 1, lagged=True)
+        finally:
+            subscription.close()
+
+    async def GetGameEvents(self, request, context):
+        from_offset = None
+        if request.HasField("from_offset"):
+            from_offset = request.from_offset
+        max_batch = request.max_batch if request.HasField("max_batch") else None
+        offset, events = await self.daemon.get_events(from_offset, set(request.kinds), max_batch)
+        return GameEvents(latest_offset=offset, events=[GameEvent(**event._asdict()) for event in events])
+
+    async def SubscribeGameEvents(self, request, context):
+        from_offset = request.from_offset if request.HasField("from_offset") else None
+        max_batch = request.max_batch if request.HasField("max_batch") else self.daemon.message_max_batch
+        subscription = self.daemon.subscribe_events(context.peer(), from_offset, set(request.kinds),
+                                                    _overflow_policy(request))
+        try:
+            while (batch := await subscription.get(max_batch)) is not None:
+                events, dropped = batch
+                yield GameEvents(latest_offset=events[-1].offset,
+                                 events=[GameEvent(**event._asdict()) for event in events], dropped=dropped)
+            yield GameEvents(latest_offset=subscription.gap - 1, lagged=True)
+        finally:
+            subscription.close()
+
     async def GetOutputStreams(self, request, context):
         stdout, stderr = await self.daemon.get_output()
         return OutputStreams(stdout=stdout, stderr=stderr)
 
+    async def GetResourceStats(self, request, context):
+        if (stats := self.daemon.get_resource_stats()) is None:
+            return ResourceStats(status=Status(code=NOT_AVAILABLE,
+                                               message="Resource sampling is disabled or psutil is not installed."))
+        return ResourceStats(
+            status=Status(code=SUCCESS),
+            interval=self.daemon.resources.interval,
+            windows=[ResourceWindow(name=name, points=[ResourcePoint(**asdict(point)) for point in points])
+                     for name, points in stats.items()]
+        )
+
     async def UploadToTelegram(self, request, context):
         try:
             progress = await self.saves.upload_tg(
@@ -0,0 +1,83 @@
+import marshal
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+from .parser import LazyMetadata
+
+type CacheKey = tuple[str, int, int, int]  # (name, st_ino, st_mtime_ns, st_size)
+
+
+@dataclass
+class CacheStat:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    entries: int = 0
+    bytes: int = 0
+
+
+class MetadataCache:
+    """
+    LRU cache of the parsed metadata, bounded by both the number of entries and the estimated size in bytes.
+    Only the latest version of each savefile is kept, the entry of an old (inode, mtime, size) is replaced.
+    """
+
+    def __init__(self, max_entries=200, max_bytes=32 << 20):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[CacheKey, tuple[LazyMetadata, int]] = OrderedDict()
+        self._names: dict[str, CacheKey] = {}
+        self.stat = CacheStat()
+
+    @staticmethod
+    def _estimate_size(metadata: LazyMetadata) -> int:
+        # the serialized size is close enough to compare the entries, and much cheaper than walking the objects
+        return len(marshal.dumps(metadata.dump()))
+
+    def get(self, key: CacheKey, keys=None) -> Optional[LazyMetadata]:
+        """
+        Get the cached metadata and mark it as recently used.
+        It counts as a hit only if the sections of the keys (all if None) are parsed, a partially parsed one is still
+        returned so that the caller can continue parsing it.
+        """
+        try:
+            metadata, _ = self._entries[key]
+        except KeyError:
+            self.stat.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        if metadata.is_loaded(keys):
+            self.stat.hits += 1
+        else:
+            self.stat.misses += 1
+        return metadata
+
+    def put(self, key: CacheKey, metadata: LazyMetadata):
+        """add or update the entry, it's also called after more sections are parsed to update the size"""
+        name = key[0]
+        if (old_key := self._names.get(name)) is not None and old_key != key:
+            self._remove(old_key)
+        if key in self._entries:
+            self.stat.bytes -= self._entries[key][1]
+        size = self._estimate_size(metadata)
+        self._entries[key] = metadata, size
+        self._entries.move_to_end(key)
+        self._names[name] = key
+        self.stat.bytes += size
+        while len(self._entries) > 1 and (len(self._entries) > self.max_entries or self.stat.bytes > self.max_bytes):
+            self._remove(next(iter(self._entries)))
+            self.stat.evictions += 1
+        self.stat.entries = len(self._entries)
+
+    def _remove(self, key: CacheKey):
+        _, size = self._entries.pop(key)
+        self.stat.bytes -= size
+        if self._names.get(key[0]) == key:
+            del self._names[key[0]]
+
+    def discard(self, name: str):
+        """remove the entry of a savefile, e.g. it's deleted"""
+        if (key := self._names.get(name)) is not None:
+            self._remove(key)
+            self.stat.entries = len(self._entries)
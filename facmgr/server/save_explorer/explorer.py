@@ -1,52 +1,325 @@
 import asyncio
+import logging
+import multiprocessing
+import re
+import sqlite3
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+from typing import Literal, Optional, AsyncIterator, Callable, Awaitable
 
-from .parser import load_metadata, json_stringify
+from .cache import MetadataCache, CacheKey
+from .parser import LazyMetadata, load_lazy_metadata, json_stringify
+from .index import SaveIndex
+from .watcher import SavesWatcher, file_key
 from .uploader import TelegramUploader
 import os
 
 
+def _version_key(version: str) -> tuple[int, ...]:
+    return tuple(int(x) for x in re.findall(r'\d+', version))
+
+
 class SavesExplorer:
-    _CACHE_MAX = 200
-    _CACHE_MIN = 20
+    # the metadata keys used by query() and the save summaries, only their sections are parsed
+    SUMMARY_KEYS = ('version', 'scenario', 'mods', 'ticks')
 
-    def __init__(self, path):
+    def __init__(self, path, index_path=None, scan_workers=None, cache_entries=200, cache_bytes=32 << 20):
+        """
+        :param path: the saves directory
+        :param index_path: path to the persistent metadata index (SQLite database). None to disable it.
+        :param scan_workers: max number of processes to parse the saves in bulk (default: number of CPUs)
+        :param cache_entries: max number of saves in the in-memory metadata cache
+        :param cache_bytes: max estimated size in bytes of the in-memory metadata cache
+        """
         self.path = path
-        self._cache = {}
+        self._cache = MetadataCache(cache_entries, cache_bytes)
+        self._inflight: dict[CacheKey, asyncio.Task] = {}  # the parses running for each cache key
+        self._background_tasks: set[asyncio.Task] = set()
+        self._scan_workers = scan_workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._index = None
+        if index_path:
+            try:
+                self._index = SaveIndex(index_path)
+            except sqlite3.Error as e:
+                logging.warning(f"cannot open the saves index {index_path}, it is disabled. {type(e).__name__}: {e}")
+        self._watcher = SavesWatcher(path, on_change=self._on_file_change)
+        self._watching = False
 
-    async def _full_path(self, name):
-        if name not in await self.get_names():  # better way to do this sanity check?
+    def _on_file_change(self, name, stat):
+        self._cache.discard(name)
+        if stat is None and self._index is not None:
+            task = asyncio.create_task(asyncio.to_thread(self._index_discard, name))
+            self._background_tasks.add(task)
+            task.add_done_callback(self._background_tasks.discard)
+
+    def _index_discard(self, name):
+        # blocking
+        try:
+            self._index.discard(os.path.join(self.path, name))
+        except sqlite3.Error as e:
+            logging.warning(f"fail to update the saves index for {name}. {type(e).__name__}: {e}")
+
+    def _index_prune(self, names):
+        # blocking
+        try:
+            self._index.prune([os.path.join(self.path, name) for name in names])
+        except sqlite3.Error as e:
+            logging.warning(f"fail to prune the saves index. {type(e).__name__}: {e}")
+
+    async def _ensure_watching(self):
+        await self._watcher.wait_ready()
+        if not self._watching:
+            self._watching = True
+            if self._index is not None:  # the files removed when the manager is not running
+                await asyncio.to_thread(self._index_prune, list(self._watcher.files))
+
+    async def _stat(self, name) -> tuple[str, os.stat_result]:
+        await self._ensure_watching()
+        if (file_stat := await self._watcher.lookup(name)) is None:
             raise FileNotFoundError(f"savefile {name} not found")
-        return os.path.join(self.path, name)
+        return os.path.join(self.path, name), file_stat
 
-    async def load(self, name, flush_cache=False):
-        full_name = await self._full_path(name)
-        file_stat = os.stat(full_name)
-        key = file_stat.st_mtime, file_stat.st_size
-        if not flush_cache:
-            try:
-                return self._cache[key]
-            except KeyError:
-                pass
-        self._cache[key] = result = await asyncio.to_thread(load_metadata, full_name)
-        if len(self._cache) > self._CACHE_MAX:
-            # sort from new to old, keep the first CACHE_MIN items
-            for key in sorted(self._cache, reverse=True)[self._CACHE_MIN:]:
-                del self._cache[key]
-        return result
+    async def _full_path(self, name):
+        return (await self._stat(name))[0]
+
+    def _index_put(self, full_name, index_key, metadata: LazyMetadata):
+        # blocking
+        try:
+            self._index.put(full_name, index_key, metadata.dump())
+        except sqlite3.Error as e:
+            logging.warning(f"fail to update the saves index for {full_name}. {type(e).__name__}: {e}")
+
+    def _load_indexed(self, full_name, index_key, metadata: Optional[LazyMetadata], keys, flush_cache):
+        # blocking, run in a thread. The metadata is modified, so it must not be the cached one
+        if metadata is None:
+            state = None
+            if not flush_cache and self._index is not None:
+                state = self._index.get(full_name, index_key)
+            metadata = LazyMetadata(full_name, state)
+            if metadata.is_loaded(keys):
+                return metadata
+        metadata.load(keys)
+        if self._index is not None:
+            self._index_put(full_name, index_key, metadata)
+        return metadata
+
+    @staticmethod
+    def _cache_key(name, file_stat) -> CacheKey:
+        return name, *file_key(file_stat)
+
+    @property
+    def cache_stat(self):
+        return self._cache.stat
+
+    def _single_flight(self, key: CacheKey, parse: Callable[[], Awaitable[LazyMetadata]]) -> asyncio.Task:
+        """
+        Get the running parse of the key, or start a new one with parse().
+        The waiters should await it with asyncio.shield, so cancelling one of them does not cancel the others.
+        """
+        if (task := self._inflight.get(key)) is not None:
+            return task
+
+        async def run():
+            result = await parse()
+            self._cache.put(key, result)
+            return result
+
+        def done(_):
+            if self._inflight.get(key) is task:
+                del self._inflight[key]
+            if not task.cancelled():
+                task.exception()  # retrieved by the waiters if any, avoid the warning when all of them are cancelled
+
+        self._inflight[key] = task = asyncio.create_task(run())
+        task.add_done_callback(done)
+        return task
+
+    async def load_lazy(self, name, keys=None, flush_cache=False) -> LazyMetadata:
+        """
+        Get the metadata with the sections of the keys (all if None) parsed, the other sections are parsed when
+        they are accessed. The concurrent loads of the same save share one parse.
+        """
+        full_name, file_stat = await self._stat(name)
+        key = self._cache_key(name, file_stat)
+        metadata = None if flush_cache else self._cache.get(key, keys)
+        while metadata is None or not metadata.is_loaded(keys):
+            # the running parse may be for other keys, then parse again for the rest
+            task = self._single_flight(key, partial(self._load_copy, full_name, file_stat, metadata, keys, flush_cache))
+            metadata = await asyncio.shield(task)
+            flush_cache = False
+        return metadata
+
+    async def _load_copy(self, full_name, file_stat, metadata: Optional[LazyMetadata], keys, flush_cache):
+        # the cached metadata may be read meanwhile, so a copy is parsed and it replaces the cached one once done
+        return await asyncio.to_thread(self._load_indexed, full_name, file_key(file_stat),
+                                       metadata and metadata.copy(), keys, flush_cache)
+
+    def prewarm(self, name):
+        """
+        Parse a save in the background if it's changed, so the next query is a cache hit.
+        It's for the saves just written by the server, the watcher may not have seen the change yet.
+        """
+        task = asyncio.create_task(self._prewarm(name))
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    async def _prewarm(self, name):
+        await self._ensure_watching()
+        if await self._watcher.refresh(name) is None:
+            logging.debug(f"skip warming up the cache for {name}, it's not in {self.path}")
+            return
+        try:
+            await self.load_lazy(name, self.SUMMARY_KEYS)
+        except Exception as e:
+            logging.warning(f"fail to warm up the cache for {name}. {type(e).__name__}: {e}")
+
+    async def load(self, name, flush_cache=False) -> dict:
+        return (await self.load_lazy(name, flush_cache=flush_cache)).to_dict()
+
+    def _get_pool(self):
+        if self._pool is None:
+            # spawn rather than fork: the grpc server and the asyncio threads are running in this process
+            self._pool = ProcessPoolExecutor(self._scan_workers, mp_context=multiprocessing.get_context('spawn'))
+        return self._pool
+
+    def _lookup_index(self, candidates):
+        # blocking, run in a thread
+        found = {}
+        for name, full_name, file_stat, _ in candidates:
+            if (state := self._index.get(full_name, file_key(file_stat))) is not None:
+                found[name] = LazyMetadata(full_name, state)
+        return found
+
+    async def scan(self, keys=None) -> AsyncIterator[tuple[str, os.stat_result, LazyMetadata]]:
+        """
+        Load the metadata of all the saves in bulk, with the sections of the keys (all if None) parsed.
+        The cached ones are yielded first, then the cache misses are parsed in parallel by a process pool and
+        yielded as they finish.
+        """
+        await self._ensure_watching()
+        await self._watcher.sync()
+        misses = []
+        for name, file_stat in list(self._watcher.files.items()):
+            metadata = self._cache.get(self._cache_key(name, file_stat), keys)
+            if metadata is not None and metadata.is_loaded(keys):
+                yield name, file_stat, metadata
+            else:
+                misses.append((name, os.path.join(self.path, name), file_stat, metadata))
+        if self._index is not None and (uncached := [miss for miss in misses if miss[3] is None]):
+            found = await asyncio.to_thread(self._lookup_index, uncached)
+            remaining = []
+            for name, full_name, file_stat, metadata in misses:
+                if name in found:
+                    metadata = found[name]
+                    self._cache.put(self._cache_key(name, file_stat), metadata)
+                    if metadata.is_loaded(keys):
+                        yield name, file_stat, metadata
+                        continue
+                remaining.append((name, full_name, file_stat, metadata))
+            misses = remaining
+        if not misses:
+            return
+
+        loop = asyncio.get_running_loop()
+        # not worth starting the processes for a single save or a single CPU
+        use_pool = len(misses) > 1 and (self._scan_workers or os.cpu_count() or 1) > 1
+        executor = self._get_pool() if use_pool else None
+
+        async def parse(full_name, file_stat, metadata):
+            # the partially parsed ones continue from their known sections and offsets. From a copy, since the
+            # cached one may be read meanwhile, and the state is modified in place if it's parsed in a thread
+            result = await loop.run_in_executor(executor, load_lazy_metadata, full_name,
+                                                metadata and metadata.copy().dump(), keys)
+            if self._index is not None:
+                await asyncio.to_thread(self._index_put, full_name, file_key(file_stat), result)
+            return result
+
+        def start(name, full_name, file_stat, metadata):
+            # shared with the concurrent loads and scans, it keeps running if this scan is closed early
+            task = self._single_flight(self._cache_key(name, file_stat),
+                                       partial(parse, full_name, file_stat, metadata))
+            pending[asyncio.shield(task)] = name, full_name, file_stat
+
+        pending = {}
+        for miss in misses:
+            start(*miss)
+        try:
+            while pending:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    name, full_name, file_stat = pending.pop(future)
+                    try:
+                        result = future.result()
+                    except FileNotFoundError:  # removed after listing
+                        continue
+                    except Exception as e:
+                        logging.warning(f"fail to parse {full_name}. {type(e).__name__}: {e}")
+                        # not parsed again until the file is changed, e.g. a save being written when scanned
+                        result = LazyMetadata(full_name, invalid=True)
+                        self._cache.put(self._cache_key(name, file_stat), result)
+                        yield name, file_stat, result
+                        continue
+                    if not result.is_loaded(keys):  # joined a running parse for other keys
+                        start(name, full_name, file_stat, result)
+                        continue
+                    yield name, file_stat, result
+        finally:
+            for future in pending:
+                future.cancel()
 
     async def load_json(self, name, flush_cache=False):
         return json_stringify(await self.load(name, flush_cache=flush_cache))
 
     async def load_all(self):
         return {
-            name.rsplit('.', maxsplit=1)[0]: await self.load(name)
-            for name in await self.get_names()
+            name.rsplit('.', maxsplit=1)[0]: metadata.to_dict()
+            async for name, _, metadata in self.scan()
         }
 
+    async def query(self, sort_by: Literal['play_time', 'mtime', 'name', 'version'] = 'play_time',
+                    descending=False, *, version: Optional[str] = None, scenario: Optional[str] = None,
+                    mod_name: Optional[str] = None, offset=0, limit: Optional[int] = None
+                    ) -> tuple[int, list[tuple[str, os.stat_result, LazyMetadata]]]:
+        """
+        Sort, filter and paginate the saves by their metadata. The saves which cannot be parsed are treated as
+        the oldest ones and never match a filter. Only the sections of SUMMARY_KEYS are parsed.
+
+        :param version: prefix of the version string
+        :param scenario: exact scenario name
+        :param mod_name: only the saves with this mod
+        :return: the number of all matched saves, and a page of (name, stat, metadata)
+        """
+        rows = []
+        async for name, file_stat, metadata in self.scan(self.SUMMARY_KEYS):
+            if version is not None and not metadata.get('version', '').startswith(version):
+                continue
+            if scenario is not None and metadata.get('scenario') != scenario:
+                continue
+            if mod_name is not None and all(mod['name'] != mod_name for mod in metadata.get('mods', [])):
+                continue
+            rows.append((name, file_stat, metadata))
+        sort_key = {
+            'play_time': lambda row: (row[2].get('ticks', (-1, -1, -1))[2], row[0]),
+            'mtime':     lambda row: (row[1].st_mtime_ns, row[0]),
+            'name':      lambda row: row[0],
+            'version':   lambda row: (_version_key(row[2].get('version', '')), row[0]),
+        }[sort_by]
+        rows.sort(key=sort_key, reverse=descending)
+        return len(rows), rows[offset:None if limit is None else offset + limit]
+
     async def get_names(self):
-        return [name
-                for name in await asyncio.to_thread(os.listdir, self.path)
-                if name.endswith('.zip')]
+        await self._ensure_watching()
+        return list(self._watcher.files)
+
+    def close(self):
+        self._watcher.close()
+        for task in [*self._inflight.values(), *self._background_tasks]:
+            task.cancel()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+        if self._index is not None:
+            self._index.close()
 
     async def upload_tg(self, name, session_string, chat_id, reply_id):
         return TelegramUploader(session_string).send(await self._full_path(name), chat_id, reply_id)
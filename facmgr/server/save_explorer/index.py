@@ -0,0 +1,81 @@
+import logging
+import marshal
+import sqlite3
+import sys
+import threading
+from typing import Optional
+
+type FileKey = tuple[int, int, int]  # (st_ino, st_mtime_ns, st_size)
+
+
+class SaveIndex:
+    """
+    Persistent metadata index of the savefiles backed by SQLite, so that the saves do not need to be parsed again
+    after restarting the manager.
+    Only the keys are kept in memory. The metadata is loaded from the database when it is requested.
+    The metadata is stored as the state of LazyMetadata, so the partially parsed saves and the section offsets
+    are also kept.
+    It's thread-safe and all the methods are blocking.
+    The marshal format may change between Python versions, so the index is rebuilt after upgrading the interpreter.
+    """
+    _SCHEMA_VERSION = 3  # 2: the metadata is LazyMetadata.dump(), 3: read_bytes is not in the metadata
+    # stored as PRAGMA user_version, which is a single integer
+    _USER_VERSION = (_SCHEMA_VERSION << 24 | marshal.version << 16
+                     | sys.version_info.major << 8 | sys.version_info.minor)
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        if self._db.execute("PRAGMA user_version").fetchone()[0] != self._USER_VERSION:
+            # nothing valuable in the index, just rebuild it
+            self._db.execute("DROP TABLE IF EXISTS saves")
+            self._db.execute("CREATE TABLE saves (path TEXT PRIMARY KEY, inode INTEGER, mtime_ns INTEGER, "
+                             "size INTEGER, metadata BLOB)")
+            self._db.execute(f"PRAGMA user_version={self._USER_VERSION}")
+        self._keys: dict[str, FileKey] = {
+            path: (inode, mtime_ns, size)
+            for path, inode, mtime_ns, size in self._db.execute("SELECT path, inode, mtime_ns, size FROM saves")
+        }
+        logging.info(f"loaded {len(self._keys)} entries from the saves index {db_path}")
+
+    def get(self, path: str, key: FileKey) -> Optional[dict]:
+        if self._keys.get(path) != key:
+            return None
+        with self._lock:
+            row = self._db.execute("SELECT metadata FROM saves WHERE path=?", (path,)).fetchone()
+        if row is None:
+            return None
+        try:
+            return marshal.loads(row[0])
+        except (EOFError, ValueError, TypeError) as e:
+            logging.warning(f"broken entry of {path} in the saves index. {type(e).__name__}: {e}")
+            return None
+
+    def put(self, path: str, key: FileKey, metadata: dict):
+        blob = marshal.dumps(metadata)
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO saves VALUES (?, ?, ?, ?, ?)", (path, *key, blob))
+            self._keys[path] = key
+
+    def discard(self, path: str):
+        if path not in self._keys:
+            return
+        with self._lock:
+            self._db.execute("DELETE FROM saves WHERE path=?", (path,))
+            self._keys.pop(path, None)
+
+    def prune(self, alive_paths):
+        """remove the entries of the savefiles which no longer exist"""
+        if not (stale := self._keys.keys() - set(alive_paths)):
+            return
+        with self._lock:
+            self._db.executemany("DELETE FROM saves WHERE path=?", [(path,) for path in stale])
+            for path in stale:
+                self._keys.pop(path, None)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
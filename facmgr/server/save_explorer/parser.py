@@ -1,59 +1,133 @@
+import marshal
 import zipfile
+from collections.abc import Mapping
 from struct import Struct
+from typing import Optional
 import zlib
-import io
 from warnings import warn
 import json
 
 STRICT_CHECK = True
 
 
+class LevelSource:
+    """Pull the level.dat(0) from the opened zip and decompress it on demand"""
+    CHUNK_SIZE = 4096
+
+    def __init__(self, zf: zipfile.ZipFile, f, is_zlib):
+        self._zf = zf
+        self._file = f
+        self._decompressor = zlib.decompressobj() if is_zlib else None
+        self.compressed_bytes = 0
+
+    def read(self, n) -> bytes:
+        """return n bytes, or fewer at the end of the stream"""
+        if (decompressor := self._decompressor) is None:
+            result = self._file.read(n)
+            self.compressed_bytes += len(result)
+            return result
+        result = bytearray()
+        while len(result) < n and not decompressor.eof:
+            if not (data := decompressor.unconsumed_tail):
+                if not (data := self._file.read(self.CHUNK_SIZE)):
+                    break
+                self.compressed_bytes += len(data)
+            result += decompressor.decompress(data, n - len(result))
+        return bytes(result)
+
+    def close(self):
+        self._file.close()
+        self._zf.close()
+
+
 class Deserializer:
+    """
+    Cursor-based reader over a buffer. Numbers are unpacked in place through a memoryview with unpack_from, and
+    only the fields kept in the result (e.g. strings) are copied out of the buffer.
+    If a source is given, the buffer is a bytearray extended in place from it only when the cursor reaches the end.
+    """
+    MIN_FILL = 4096
     u16 = Struct('<H')
     u32 = Struct('<I')
     u64 = Struct('<Q')
     fp32 = Struct('<f')
     fp64 = Struct('<d')
 
-    @staticmethod
-    def optim_read(func):
-        def wrapper(self, optim=False):
-            if optim:
-                byte = self.read_u8()
-                if byte != 0xFF:
-                    return byte
-            return func(self)
-
-        return wrapper
-
-    def __init__(self, stream):
-        self.stream = stream
-
-    def read(self, n):
-        return self.stream.read(n)
+    def __init__(self, data: bytes = b'', source: LevelSource = None):
+        self.data = data if source is None else bytearray(data)
+        self._view = memoryview(self.data)
+        self.pos = 0
+        self.source = source
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.source is not None:
+            self.source.close()
+
+    def _fill(self, n):
+        """make sure n bytes are available after the cursor"""
+        if self.source is not None and (missing := self.pos + n - len(self.data)) > 0:
+            self._view.release()  # the bytearray cannot be resized while it's exported
+            self.data += self.source.read(max(missing, self.MIN_FILL))
+            self._view = memoryview(self.data)
+        if self.pos + n > len(self.data):
+            raise EOFError(f"read {n} bytes at {self.pos} exceeds the data of {len(self.data)} bytes")
+
+    def _advance(self, n):
+        """move the cursor forward by n bytes and return the old position"""
+        pos = self.pos
+        if pos + n > len(self.data):
+            self._fill(n)
+        self.pos = pos + n
+        return pos
+
+    def read(self, n) -> bytes:
+        pos = self._advance(n)
+        return bytes(self._view[pos:pos + n])
 
     def read_fmt(self, fmt):
-        return fmt.unpack(self.read(fmt.size))[0]
+        pos = self._advance(fmt.size)  # the view may be replaced
+        return fmt.unpack_from(self._view, pos)[0]
+
+    def read_fmt_tuple(self, fmt) -> tuple:
+        pos = self._advance(fmt.size)
+        return fmt.unpack_from(self._view, pos)
 
     def read_u8(self):
-        return self.read(1)[0]
+        try:
+            byte = self.data[self.pos]
+        except IndexError:
+            self._fill(1)
+            byte = self.data[self.pos]
+        self.pos += 1
+        return byte
+
+    def read_u8_list(self, n) -> list[int]:
+        return list(self.read(n))
 
     def read_bool(self):
         byte = self.read_u8()
-        if byte in [0, 1]:
+        if byte <= 1:
             return bool(byte)
         raise ValueError(f"invalid bool value: {byte}")
 
-    @optim_read
-    def read_u16(self):
+    # optim: the value is stored as u8 if it's less than 0xFF
+
+    def read_u16(self, optim=False):
+        if optim and (byte := self.read_u8()) != 0xFF:
+            return byte
         return self.read_fmt(self.u16)
 
-    @optim_read
-    def read_u32(self):
+    def read_u32(self, optim=False):
+        if optim and (byte := self.read_u8()) != 0xFF:
+            return byte
         return self.read_fmt(self.u32)
 
-    @optim_read
-    def read_u64(self):
+    def read_u64(self, optim=False):
+        if optim and (byte := self.read_u8()) != 0xFF:
+            return byte
         return self.read_fmt(self.u64)
 
     def read_fp32(self):
@@ -63,8 +137,26 @@ class Deserializer:
         return self.read_fmt(self.fp64)
 
     def read_str(self):
-        length = self.read_u32(optim=True)
-        result: bytes = self.read(length)
+        # the hottest path, so read_u32(optim=True) and read() are inlined
+        data, pos = self.data, self.pos
+        if pos >= len(data):
+            self._fill(1)
+            data = self.data
+        length = data[pos]
+        pos += 1
+        if length == 0xFF:
+            if pos + 4 > len(data):
+                self._fill(5)
+                data = self.data
+            length = self.u32.unpack_from(data, pos)[0]
+            pos += 4
+        end = pos + length
+        if end > len(data):
+            self._fill(end - self.pos)
+            data = self.data
+        self.pos = end
+        # decoding a copied slice is faster than a memoryview for the short strings here
+        result = data[pos:end]
         try:
             return result.decode('utf-8')
         except UnicodeDecodeError:
@@ -72,53 +164,43 @@ class Deserializer:
                 raise
             else:
                 warn("cannot decode with 'utf-8' codec")
-                return result
+                return bytes(result)
+
+    def skip_str(self):
+        self._advance(self.read_u32(optim=True))
+
+    def seek(self, pos):
+        if pos > len(self.data):
+            self._fill(pos - self.pos)
+        self.pos = pos
 
     def assert_byte_seq(self, desired: bytes, name=''):
-        if not STRICT_CHECK:
+        pos = self._advance(len(desired))
+        if not STRICT_CHECK or self.data.startswith(desired, pos):
             return
-        magic = self.read(len(desired))
         if name:
             name = '[' + name + '] '
-        if magic != desired:
-            raise ValueError(rf"{name}{magic} != {desired}")
+        raise ValueError(rf"{name}{self.data[pos:pos + len(desired)]} != {desired}")
 
     @classmethod
-    def load_save_zip(cls, zip_name, head_size=16384):
+    def load_save_zip(cls, zip_name):
+        """Open the level data in the savefile for reading. Use the result as a context manager to close it."""
         zf = zipfile.ZipFile(zip_name, 'r')
-        for dat_filename in zf.namelist():
-            if dat_filename.endswith('/level.dat0'):
-                is_zlib = True
-                break
-            if dat_filename.endswith('/level.dat'):
-                is_zlib = False
-                break
-        else:
-            raise IOError("level.dat not found in save file")
-        with zf.open(dat_filename) as f:
-            raw_data = f.read(head_size)
-            if is_zlib:
-                raw_data = zlib.decompressobj().decompress(raw_data)
-            return cls(io.BytesIO(raw_data))
-
-    # def read_optim(self, dtype):
-    #     byte = self.read_u8()
-    #     if byte != 0xFF:
-    #         return byte
-    #     return self.read_fmt(dtype)
-    #
-    # def read_optim_u16(self):
-    #     return self.read_optim(self.u16)
-    #
-    # def read_optim_u32(self):
-    #     return self.read_optim(self.u32)
-    #
-    # def read_optim_str(self):
-    #     length = self.read_optim_u32()
-    #     return self.read(length)
-    #
-    # def read_optim_tuple(self, dtype, num):
-    #     return tuple(self.read_optim(dtype) for i in range(num))
+        try:
+            for dat_filename in zf.namelist():
+                if dat_filename.endswith('/level.dat0'):
+                    is_zlib = True
+                    break
+                if dat_filename.endswith('/level.dat'):
+                    is_zlib = False
+                    break
+            else:
+                raise IOError("level.dat not found in save file")
+            f = zf.open(dat_filename)
+        except BaseException:  # the LevelSource closes it once created
+            zf.close()
+            raise
+        return cls(source=LevelSource(zf, f, is_zlib))
 
 
 def version_to_str(ver):
@@ -137,22 +219,28 @@ def ticks_to_formatted_time(ticks) -> str:
     return ':'.join(str(x) for x in [h, m, s])
 
 
-def load_metadata(filename) -> dict:
-    try:
-        ds = Deserializer.load_save_zip(filename)
-    except (zipfile.BadZipFile, zlib.error):
-        return {}
-    map_version = [ds.read_u16() for _ in range(4)]
-    is_v2map = map_version[0] >= 2
-    metadata = {'version': version_to_str(map_version), 'unknowns': []}
+_version_fmt = Struct('<4H')
+_ticks_fmt = {True: Struct('<3Q'), False: Struct('<3I')}
+_2fp32_fmt = Struct('<2f')
+_3fp32_fmt = Struct('<3f')
+_mod_tail_fmt = Struct('<3B4s')  # version and crc32 after the mod name
+_startup_dtypes = {1: 'bool', 2: 'double', 3: 'str', 6: 'uint64'}
+
+
+def _read_header(ds: Deserializer, _) -> dict:
+    section = {'version': version_to_str(ds.read_fmt_tuple(_version_fmt))}
     ds.assert_byte_seq(b'\x00', "after version")
     sce = [ds.read_str(), ds.read_str()]
     if sce[0]:
-        metadata['scenario'] = '/'.join(sce)
+        section['scenario'] = '/'.join(sce)
     else:
-        metadata['scenario'] = sce[1]
-    metadata['base_mod'] = ds.read_str()
-    metadata['flags'] = {
+        section['scenario'] = sce[1]
+    section['base_mod'] = ds.read_str()
+    return section
+
+
+def _read_flags(ds: Deserializer, is_v2map) -> dict:
+    flags = {
         'difficulty':                    ds.read_u8(),
         'finished':                      ds.read_bool(),
         'player_won':                    ds.read_bool(),
@@ -161,75 +249,308 @@ def load_metadata(filename) -> dict:
         'finished_but_continuing':       ds.read_bool(),
         'saving_replay':                 ds.read_bool(),
         'allow_non_admin_debug_options': ds.read_bool(),
-        'loaded_from':                   version_to_str([ds.read_u8() for _ in range(3)]),
+        'loaded_from':                   version_to_str(ds.read_u8_list(3)),
         'build_number':                  ds.read_u32() if is_v2map else ds.read_u16(),
         'allowed_commands':              ds.read_u8()
     }
     if is_v2map:
         ds.assert_byte_seq(b'\x00\x00\xa0\x00', "after flags, before mods")
+    return {'flags': flags}
+
+
+def _read_mods(ds: Deserializer, _) -> dict:
     mods_len = ds.read_u8()
-    metadata['mods'] = [
-        {'name': ds.read_str(), 'version': version_to_str([ds.read_u8() for _ in range(3)]), 'crc32': ds.read(4)}
-        for _ in range(mods_len)
-    ]
-    metadata['unknowns'].append(ds.read(6))
+    read_str, read_fmt_tuple = ds.read_str, ds.read_fmt_tuple  # many small fields below
+    mods = []
+    for _ in range(mods_len):
+        name = read_str()
+        major, minor, patch, crc32 = read_fmt_tuple(_mod_tail_fmt)
+        mods.append({'name': name, 'version': f'{major}.{minor}.{patch}', 'crc32': crc32})
+    return {'mods': mods, 'unknowns': ds.read(6)}
+
+
+def _skip_mods(ds: Deserializer, _):
+    for _ in range(ds.read_u8()):
+        ds.skip_str()
+        ds._advance(_mod_tail_fmt.size)
+    ds._advance(6)
+
+
+def _read_startup_settings(ds: Deserializer, _) -> dict:
     startup_len = ds.read_u32()
-    metadata['mods_startup_settings'] = startup = []
+    read_str, assert_byte_seq = ds.read_str, ds.assert_byte_seq
+    startup = []
     for _ in range(startup_len):
-        ds.assert_byte_seq(b'\x00', "before startup name")
-        value = [ds.read_str()]
+        assert_byte_seq(b'\x00', "before startup name")
+        value = [read_str()]
         startup.append(value)
-        ds.assert_byte_seq(b'\x05\x00\x01\x00\x00\x00\x00\x05value', "after startup name")
-        dtype = {1: 'bool', 2: 'double', 3: 'str', 6: 'uint64'}[ds.read_u8()]
+        assert_byte_seq(b'\x05\x00\x01\x00\x00\x00\x00\x05value', "after startup name")
+        dtype = _startup_dtypes[ds.read_u8()]
         value.append(dtype)
         if dtype == 'bool':
-            ds.assert_byte_seq(b'\x00', "startup bool")
+            assert_byte_seq(b'\x00', "startup bool")
             value.append(ds.read_bool())
         elif dtype == 'double':
-            ds.assert_byte_seq(b'\x00', "startup double")
+            assert_byte_seq(b'\x00', "startup double")
             value.append(ds.read_fp64())
         elif dtype == 'uint64':
-            ds.assert_byte_seq(b'\x00', "startup uint64")
+            assert_byte_seq(b'\x00', "startup uint64")
             value.append(ds.read_u64())
         elif dtype == 'str':
-            ds.assert_byte_seq(b'\x00\x00', "startup str")
-            value.append(ds.read_str())
-    if is_v2map:
-        metadata['game_finish'] = []
-        for i in range(2):
-            finish_msg = []
-            ds.assert_byte_seq(b'\x01', f"before game finish type {i}")
+            assert_byte_seq(b'\x00\x00', "startup str")
+            value.append(read_str())
+    return {'mods_startup_settings': startup}
+
+
+def _skip_startup_settings(ds: Deserializer, _):
+    for _ in range(ds.read_u32()):
+        ds._advance(1)
+        ds.skip_str()
+        ds._advance(13)  # b'\x05\x00\x01\x00\x00\x00\x00\x05value'
+        dtype = _startup_dtypes[ds.read_u8()]
+        if dtype == 'bool':
+            ds._advance(2)
+        elif dtype == 'str':
+            ds._advance(2)
+            ds.skip_str()
+        else:  # double or uint64
+            ds._advance(9)
+
+
+def _read_game_finish(ds: Deserializer, is_v2map) -> dict:
+    if not is_v2map:
+        return {}
+    game_finish = []
+    for i in range(2):
+        finish_msg = []
+        ds.assert_byte_seq(b'\x01', f"before game finish type {i}")
+        finish_msg.append(ds.read_str())
+        ds.assert_byte_seq(b'\x00', f"after game finish type {i}")
+        if ds.read_bool():
             finish_msg.append(ds.read_str())
-            ds.assert_byte_seq(b'\x00', f"after game finish type {i}")
-            if ds.read_bool():
-                finish_msg.append(ds.read_str())
-                ds.assert_byte_seq(b'\x00', f"after game finish type {i} message 1")
-            bullet_point_len = ds.read_u8()
-            bullet_point = []
-            for _ in range(bullet_point_len):
-                ds.assert_byte_seq(b'\x01', f"before finish type {i} bullet point")
-                bullet_point.append(ds.read_str())
-                ds.assert_byte_seq(b'\x00', f"after finish type {i} bullet point")
-            finish_msg.append(bullet_point)
-            if ds.read_bool():
-                finish_msg.append(ds.read_str())
-                ds.assert_byte_seq(b'\x00', f"after finish type {i} victory final message")
+            ds.assert_byte_seq(b'\x00', f"after game finish type {i} message 1")
+        bullet_point_len = ds.read_u8()
+        bullet_point = []
+        for _ in range(bullet_point_len):
+            ds.assert_byte_seq(b'\x01', f"before finish type {i} bullet point")
+            bullet_point.append(ds.read_str())
+            ds.assert_byte_seq(b'\x00', f"after finish type {i} bullet point")
+        finish_msg.append(bullet_point)
+        if ds.read_bool():
             finish_msg.append(ds.read_str())
-            metadata['game_finish'].append(finish_msg)
-        metadata['game_finish'].append(ds.read_bool())
+            ds.assert_byte_seq(b'\x00', f"after finish type {i} victory final message")
+        finish_msg.append(ds.read_str())
+        game_finish.append(finish_msg)
+    game_finish.append(ds.read_bool())
+    return {'game_finish': game_finish}
+
 
-    metadata["ticks"] = ticks = tuple(ds.read_u64() if is_v2map else ds.read_u32() for _ in range(3))
-    metadata["play_time"] = ticks_to_formatted_time(ticks[2])
-    metadata["total_time"] = ticks_to_formatted_time(ticks[0])
+def _skip_game_finish(ds: Deserializer, is_v2map):
+    if not is_v2map:
+        return
+    for _ in range(2):
+        ds._advance(1)
+        ds.skip_str()
+        ds._advance(1)
+        if ds.read_bool():
+            ds.skip_str()
+            ds._advance(1)
+        for _ in range(ds.read_u8()):
+            ds._advance(1)
+            ds.skip_str()
+            ds._advance(1)
+        if ds.read_bool():
+            ds.skip_str()
+            ds._advance(1)
+        ds.skip_str()
+    ds._advance(1)
+
+
+def _read_ticks(ds: Deserializer, is_v2map) -> dict:
+    ticks = ds.read_fmt_tuple(_ticks_fmt[is_v2map])
+    section = {
+        'ticks': ticks,
+        'play_time': ticks_to_formatted_time(ticks[2]),
+        'total_time': ticks_to_formatted_time(ticks[0]),
+    }
     if not is_v2map:
-        metadata['unknowns'].append([ds.read_fp32(), ds.read_fp32()])
+        section['unknowns'] = list(ds.read_fmt_tuple(_2fp32_fmt))
+    return section
+
+
+def _read_map_settings(ds: Deserializer, _) -> dict:
     map_setting_len = ds.read_u8()
-    metadata['map_settings'] = map_settings = []
+    read_str, read_fmt_tuple = ds.read_str, ds.read_fmt_tuple
+    map_settings = []
     for _ in range(map_setting_len):
-        map_settings.append([ds.read_str(), [ds.read_fp32() for _ in range(3)]])
+        map_settings.append([read_str(), list(read_fmt_tuple(_3fp32_fmt))])
+    return {'map_settings': map_settings}
+
+
+def _skip_map_settings(ds: Deserializer, _):
+    for _ in range(ds.read_u8()):
+        ds.skip_str()
+        ds._advance(_3fp32_fmt.size)
+
+
+def _read_map_seed(ds: Deserializer, _) -> dict:
     ds.assert_byte_seq(b'\x00\x01', "before map seed")
-    metadata['map_seed'] = ds.read_u32()
-    return metadata
+    return {'map_seed': ds.read_u32()}
+
+
+# the sections of the level.dat header in order: (name, reader, skipper)
+# a reader returns the parsed fields, and a skipper only moves the cursor to the next section.
+# The sections without a skipper are cheap enough to be parsed and dropped.
+_SECTIONS = (
+    ('header', _read_header, None),
+    ('flags', _read_flags, None),
+    ('mods', _read_mods, _skip_mods),
+    ('mods_startup_settings', _read_startup_settings, _skip_startup_settings),
+    ('game_finish', _read_game_finish, _skip_game_finish),
+    ('ticks', _read_ticks, None),
+    ('map_settings', _read_map_settings, _skip_map_settings),
+    ('map_seed', _read_map_seed, None),
+)
+_SECTION_INDEX = {name: i for i, (name, _, _) in enumerate(_SECTIONS)}
+# the sections needed by each metadata key, in the order of the keys in the result
+_KEY_SECTIONS = {
+    'version': ('header',),
+    'unknowns': ('mods', 'ticks'),
+    'scenario': ('header',),
+    'base_mod': ('header',),
+    'flags': ('flags',),
+    'mods': ('mods',),
+    'mods_startup_settings': ('mods_startup_settings',),
+    'game_finish': ('game_finish',),
+    'ticks': ('ticks',),
+    'play_time': ('ticks',),
+    'total_time': ('ticks',),
+    'map_settings': ('map_settings',),
+    'map_seed': ('map_seed',),
+}
+
+
+class LazyMetadata(Mapping):
+    """
+    Metadata of a savefile whose sections are parsed only when they are accessed.
+    The byte offset where each section starts in level.dat is remembered, so a later access decompresses up to
+    the section and parses it directly, without decoding the sections before it again.
+    Accessing a key which is not parsed yet reads the savefile, call load() in a thread beforehand in async code.
+    Iterating it never reads the savefile, only the keys parsed so far are listed.
+    """
+
+    def __init__(self, filename, state: Optional[dict] = None, *, invalid=False):
+        """
+        :param filename: path to the savefile
+        :param state: the result of dump(), to restore the parsed sections and offsets
+        :param invalid: the savefile cannot be parsed, so the metadata is empty
+        """
+        self.filename = filename
+        if state is None:
+            state = {'metadata': {}, 'sections': [], 'offsets': {'header': 0}, 'unknowns': {}, 'invalid': invalid}
+        self._metadata: dict = state['metadata']
+        self._sections: set[str] = set(state['sections'])
+        self._offsets: dict[str, int] = state['offsets']
+        self._unknowns: dict = state['unknowns']
+        self.invalid: bool = state['invalid']
+        # the compressed and decompressed bytes read by the last load() of this object, for diagnostics
+        self.read_bytes: Optional[dict[str, int]] = None
+
+    def dump(self) -> dict:
+        """the parsed sections and offsets, which can be serialized by marshal"""
+        return {'metadata': self._metadata, 'sections': sorted(self._sections), 'offsets': self._offsets,
+                'unknowns': self._unknowns, 'invalid': self.invalid}
+
+    def copy(self) -> 'LazyMetadata':
+        """an independent copy, so it can be loaded in a thread while this one is still read by others"""
+        return LazyMetadata(self.filename, marshal.loads(marshal.dumps(self.dump())))
+
+    @staticmethod
+    def _required_sections(keys) -> set[str]:
+        if keys is None:
+            return set(_SECTION_INDEX)
+        return {section for key in keys for section in _KEY_SECTIONS.get(key, ())}
+
+    def is_loaded(self, keys=None) -> bool:
+        """whether the keys (all if None) can be accessed without reading the savefile"""
+        return self.invalid or self._required_sections(keys) <= self._sections
+
+    def load(self, keys=None) -> 'LazyMetadata':
+        """parse the sections of the keys (all if None) which are not parsed yet. It's blocking"""
+        missing = self._required_sections(keys) - self._sections
+        if self.invalid or not missing:
+            return self
+        try:
+            with Deserializer.load_save_zip(self.filename) as ds:
+                self._parse(ds, missing)
+                self.read_bytes = {'compressed': ds.source.compressed_bytes, 'decompressed': len(ds.data)}
+        except (zipfile.BadZipFile, zlib.error):
+            self.invalid = True
+            self._metadata.clear()
+        return self
+
+    def _is_v2map(self) -> bool:
+        return int(self._metadata['version'].split('.', maxsplit=1)[0]) >= 2
+
+    def _parse(self, ds: Deserializer, missing: set[str]):
+        if 'header' not in self._sections:  # the version decides the layout of the rest
+            missing.add('header')
+        indexes = [_SECTION_INDEX[name] for name in missing]
+        first, last = min(indexes), max(indexes)
+        # start from the nearest known offset before the first missing section
+        start = max(i for i in range(first + 1) if _SECTIONS[i][0] in self._offsets)
+        ds.seek(self._offsets[_SECTIONS[start][0]])
+        for name, reader, skipper in _SECTIONS[start:last + 1]:
+            self._offsets[name] = ds.pos
+            is_v2map = self._is_v2map() if name != 'header' else None
+            if name not in missing:
+                (skipper or reader)(ds, is_v2map)
+                continue
+            section = reader(ds, is_v2map)
+            if 'unknowns' in section:
+                self._unknowns[name] = section.pop('unknowns')
+            self._metadata.update(section)
+            self._sections.add(name)
+        if last + 1 < len(_SECTIONS):
+            self._offsets[_SECTIONS[last + 1][0]] = ds.pos
+        if 'unknowns' not in self._metadata and {'mods', 'ticks'} <= self._sections:
+            self._metadata['unknowns'] = [self._unknowns[name] for name in ('mods', 'ticks')
+                                          if name in self._unknowns]
+
+    def __getitem__(self, key):
+        try:
+            return self._metadata[key]
+        except KeyError:
+            if key not in _KEY_SECTIONS or self.is_loaded([key]):
+                raise
+        self.load([key])
+        return self._metadata[key]
+
+    def to_dict(self) -> dict:
+        """parse all the sections and return the metadata as a plain dict"""
+        self.load()
+        return {key: self._metadata[key] for key in self._loaded_keys()}
+
+    def _loaded_keys(self) -> list[str]:
+        return [key for key in _KEY_SECTIONS if key in self._metadata]
+
+    def __iter__(self):
+        return iter(self._loaded_keys())
+
+    def __len__(self):
+        return len(self._loaded_keys())
+
+    def __repr__(self):
+        return f'{type(self).__name__}({self.filename!r}, sections={sorted(self._sections)})'
+
+
+def load_metadata(filename) -> dict:
+    return LazyMetadata(filename).to_dict()
+
+
+def load_lazy_metadata(filename, state: Optional[dict] = None, keys=None) -> LazyMetadata:
+    """restore the LazyMetadata from state and parse the sections of the keys. It can be run in a worker process"""
+    return LazyMetadata(filename, state).load(keys)
 
 
 class BytesEncoder(json.JSONEncoder):
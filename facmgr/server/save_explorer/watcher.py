@@ -0,0 +1,227 @@
+import asyncio
+import logging
+import os
+import struct
+from typing import Optional, Callable
+
+# inotify(7) constants
+_IN_ATTRIB = 0x4
+_IN_CLOSE_WRITE = 0x8
+_IN_MOVED_FROM = 0x40
+_IN_MOVED_TO = 0x80
+_IN_CREATE = 0x100
+_IN_DELETE = 0x200
+_IN_DELETE_SELF = 0x400
+_IN_MOVE_SELF = 0x800
+_IN_Q_OVERFLOW = 0x4000
+_IN_IGNORED = 0x8000
+_IN_WATCH_MASK = (_IN_ATTRIB | _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+                  | _IN_DELETE_SELF | _IN_MOVE_SELF)
+_IN_LOST_MASK = _IN_IGNORED | _IN_DELETE_SELF | _IN_MOVE_SELF
+_inotify_event = struct.Struct('iIII')
+
+
+def file_key(stat: os.stat_result) -> tuple[int, int, int]:
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
+def _inotify_watch(path) -> int:
+    """create an inotify instance watching the directory, return the non-blocking fd"""
+    import ctypes
+    import ctypes.util
+    libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+    fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+    if fd < 0:
+        raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+    if libc.inotify_add_watch(fd, os.fsencode(path), _IN_WATCH_MASK) < 0:
+        errno = ctypes.get_errno()
+        os.close(fd)
+        raise OSError(errno, f"inotify_add_watch failed for {path}")
+    return fd
+
+
+class SavesWatcher:
+    """
+    Keep the listing of the savefiles and their stat in memory.
+    It is updated by inotify events on Linux, or by polling the directory if inotify is unavailable.
+    When polling, the listing can be stale for up to poll_interval, so lookup() checks the file again and sync()
+    rescans the directory before the stat is used, e.g. as a cache key. With inotify, it's only stale until the
+    files named by the pending events are checked, which sync() waits for.
+    The files are checked in a thread, only the events are read on the event loop.
+    """
+    files: dict[str, os.stat_result]
+    on_change: Optional[Callable[[str, Optional[os.stat_result]], None]]
+
+    def __init__(self, path, *, suffix='.zip', poll_interval=5., on_change=None, use_inotify=True):
+        """
+        :param path: the directory to watch
+        :param suffix: only the files with this suffix are tracked
+        :param poll_interval: interval in seconds of the polling fallback
+        :param on_change: callback(name, new_stat) when a file is changed. new_stat is None if the file is removed
+        :param use_inotify: False to always poll the directory
+        """
+        self.path = path
+        self.suffix = suffix
+        self.poll_interval = poll_interval
+        self.use_inotify = use_inotify
+        self.on_change = on_change
+        self.files = {}
+        self._ready: Optional[asyncio.Task] = None
+        self._fd: Optional[int] = None
+        self._poll_task: Optional[asyncio.Task] = None
+        self._changed: set[str] = set()  # named by the events, not checked yet
+        self._rescan = False  # the events overflowed, so the whole directory is checked
+        self._update_task: Optional[asyncio.Task] = None
+
+    def _stat(self, name) -> Optional[os.stat_result]:
+        try:
+            return os.stat(os.path.join(self.path, name))
+        except (OSError, ValueError):
+            return None
+
+    def _stat_all(self, names) -> dict[str, Optional[os.stat_result]]:
+        return {name: self._stat(name) for name in names}
+
+    def _scan(self) -> dict[str, os.stat_result]:
+        try:
+            names = [name for name in os.listdir(self.path) if name.endswith(self.suffix)]
+        except OSError:
+            return {}
+        return {name: stat for name in names if (stat := self._stat(name)) is not None}
+
+    def _set(self, name, stat):
+        if stat is None:
+            if self.files.pop(name, None) is None:
+                return
+        elif (old := self.files.get(name)) is not None and file_key(old) == file_key(stat):
+            return
+        else:
+            self.files[name] = stat
+        if self.on_change is not None:
+            self.on_change(name, stat)
+
+    def _apply_scan(self, files):
+        for name in self.files.keys() - files.keys():
+            self._set(name, None)
+        for name, stat in files.items():
+            self._set(name, stat)
+
+    async def _start(self):
+        self._apply_scan(await asyncio.to_thread(self._scan))
+        if os.name == 'posix' and self.use_inotify:
+            try:
+                self._fd = _inotify_watch(self.path)
+            except (OSError, AttributeError) as e:  # AttributeError: no inotify in libc
+                logging.warning(f"cannot watch {self.path} with inotify, fallback to polling. {type(e).__name__}: {e}")
+            else:
+                asyncio.get_running_loop().add_reader(self._fd, self._read_events)
+                return
+        self._poll_task = asyncio.create_task(self._poll())
+
+    async def wait_ready(self):
+        """start watching if not yet, and wait until the initial listing is available"""
+        if self._ready is None:
+            self._ready = asyncio.create_task(self._start())
+        await asyncio.shield(self._ready)
+
+    def _read_events(self):
+        buffer = b''
+        while True:
+            try:
+                data = os.read(self._fd, 65536)
+            except BlockingIOError:
+                break
+            if not data:
+                break
+            buffer += data
+        overflow = lost = False
+        changed = set()
+        pos = 0
+        while pos + _inotify_event.size <= len(buffer):
+            _, mask, _, length = _inotify_event.unpack_from(buffer, pos)
+            pos += _inotify_event.size
+            name = os.fsdecode(buffer[pos:pos + length].rstrip(b'\x00'))
+            pos += length
+            if mask & _IN_LOST_MASK:
+                lost = True
+            elif mask & _IN_Q_OVERFLOW:
+                overflow = True
+            elif name.endswith(self.suffix):
+                changed.add(name)
+        if lost:
+            logging.warning(f"inotify watch of {self.path} is lost, fallback to polling")
+            self.close()
+            self._poll_task = asyncio.create_task(self._poll())
+            return
+        if overflow:  # events are dropped, so we don't know what is changed
+            self._rescan = True
+        self._changed |= changed
+        if self._update_task is None and (self._rescan or self._changed):
+            self._update_task = asyncio.create_task(self._update())
+
+    async def _update(self):
+        """check the files changed by the events in a thread, one batch at a time so they are applied in order"""
+        try:
+            while self._rescan or self._changed:
+                if self._rescan:
+                    self._rescan = False
+                    self._changed.clear()
+                    self._apply_scan(await asyncio.to_thread(self._scan))
+                else:
+                    names, self._changed = self._changed, set()
+                    for name, stat in (await asyncio.to_thread(self._stat_all, names)).items():
+                        self._set(name, stat)
+        finally:
+            if self._update_task is asyncio.current_task():
+                self._update_task = None
+
+    async def _poll(self):
+        while True:
+            self._apply_scan(await asyncio.to_thread(self._scan))
+            await asyncio.sleep(self.poll_interval)
+
+    @property
+    def polling(self):
+        return self._poll_task is not None
+
+    async def sync(self):
+        """rescan the directory now if it's polled, or wait for the pending events, so the listing is up-to-date"""
+        if self.polling:
+            self._apply_scan(await asyncio.to_thread(self._scan))
+        elif self._update_task is not None:
+            await asyncio.wait([self._update_task])
+
+    async def lookup(self, name) -> Optional[os.stat_result]:
+        """
+        Get the stat of a savefile from the listing.
+        If it's not found or the directory is polled, the file is checked directly in case the change has not been
+        seen yet.
+        """
+        if not self.polling and (stat := self.files.get(name)) is not None:
+            return stat
+        if os.path.basename(name) != name or not name.endswith(self.suffix):
+            return None
+        stat = await asyncio.to_thread(self._stat, name)
+        if stat is not None or self.polling:
+            self._set(name, stat)
+        return stat
+
+    async def refresh(self, name) -> Optional[os.stat_result]:
+        """check a savefile directly and update the listing, e.g. it's known to be written before the event arrives"""
+        if os.path.basename(name) != name or not name.endswith(self.suffix):
+            return None
+        stat = await asyncio.to_thread(self._stat, name)
+        self._set(name, stat)
+        return stat
+
+    def close(self):
+        if self._fd is not None:
+            asyncio.get_running_loop().remove_reader(self._fd)
+            os.close(self._fd)
+            self._fd = None
+        if self._update_task is not None:
+            self._update_task.cancel()
+            self._update_task = None
+        if self._poll_task is not None:
+            self._poll_task.cancel()
+            self._poll_task = None
@@ -17,6 +17,19 @@ class Config:
     executable_is_wrapper: Optional[bool]
     stop_strategy: Optional[Literal['quit', 'interrupt']]
     strict_version_output: Optional[bool]
+    saves_index: Optional[str] = None
+    scan_workers: Optional[int] = None
+    logs_max_bytes: Optional[int] = 1 << 20
+    message_log_dir: Optional[str] = None
+    message_log_bytes: Optional[int] = 64 << 20
+    message_maxlen: Optional[int] = None
+    subscriber_queue_size: Optional[int] = 1000
+    subscriber_overflow: Optional[Literal['drop-oldest', 'coalesce', 'disconnect']] = 'coalesce'
+    command_queue_bytes: Optional[int] = 1 << 20
+    rcon_address: Optional[str] = None
+    rcon_password: Optional[str] = ''
+    rcon_pool_size: Optional[int] = 2
+    resource_interval: Optional[float] = 5.
 
 
 # Starting the server
@@ -26,7 +39,20 @@ async def run(config: Config):
         config.saves_dir, config.fac_exec, config.fac_timeout,
         executable_is_wrapper=config.executable_is_wrapper,
         stop_strategy=config.stop_strategy,
-        strict_version_output=config.strict_version_output
+        strict_version_output=config.strict_version_output,
+        saves_index=config.saves_index,
+        scan_workers=config.scan_workers,
+        logs_max_bytes=config.logs_max_bytes,
+        message_log_dir=config.message_log_dir,
+        message_log_bytes=config.message_log_bytes,
+        message_maxlen=config.message_maxlen,
+        subscriber_queue_size=config.subscriber_queue_size,
+        subscriber_overflow=config.subscriber_overflow,
+        command_queue_bytes=config.command_queue_bytes,
+        rcon_address=config.rcon_address,
+        rcon_password=config.rcon_password,
+        rcon_pool_size=config.rcon_pool_size,
+        resource_interval=config.resource_interval
     )
     add_ServerManagerServicer_to_server(manager_servicer, server)
     listen_addr = config.address
@@ -38,4 +64,6 @@ async def run(config: Config):
     except asyncio.CancelledError:
         async with asyncio.timeout(30):
             await asyncio.gather(manager_servicer.daemon.stop(), server.stop(grace=None))
+        manager_servicer.saves.close()
+        manager_servicer.daemon.close()
         raise
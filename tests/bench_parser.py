@@ -0,0 +1,131 @@
+# Benchmark of the save parser with synthetic savefiles.
+#
+#   python -m tests.bench_parser [--saves 200] [--mods 30] [--startup-settings 100] [--output bench_output.txt]
+#
+# One JSON object is printed per line for each layout and target, e.g.
+#   {"target": "load_metadata", "layout": "v2", "saves": 200, "saves_per_sec": ..., "peak_memory": ...}
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from facmgr.server.save_explorer import SavesExplorer
+from facmgr.server.save_explorer.parser import LazyMetadata
+from .save_fixtures import make_save_zip
+
+LAYOUTS = {'v1': (1, 1, 110, 0), 'v2': (2, 0, 66, 0)}
+
+
+def _measure(func, repeat):
+    """return the best wall time of the runs and the peak of traced memory in an extra run"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return best, peak
+
+
+def bench_load_metadata(paths, repeat):
+    results = []
+
+    def run():
+        results.clear()
+        results.extend(LazyMetadata(path).load() for path in paths)
+
+    elapsed, peak = _measure(run, repeat)
+    read_bytes = [metadata.read_bytes for metadata in results]
+    return {
+        'seconds':                      elapsed,
+        'saves_per_sec':                len(paths) / elapsed,
+        'compressed_bytes_per_save':    sum(x['compressed'] for x in read_bytes) / len(paths),
+        'decompressed_bytes_per_save':  sum(x['decompressed'] for x in read_bytes) / len(paths),
+        'peak_memory':                  peak,
+    }
+
+
+def bench_load_play_time(paths, repeat):
+    """only the section needed to sort the saves by play time"""
+    def run():
+        for path in paths:
+            LazyMetadata(path).load(['ticks'])
+
+    elapsed, peak = _measure(run, repeat)
+    return {
+        'seconds':       elapsed,
+        'saves_per_sec': len(paths) / elapsed,
+        'peak_memory':   peak,
+    }
+
+
+def bench_load_all(saves_dir, repeat, workers):
+    def run():
+        # a new explorer without the index for a cold cache every time
+        explorer = SavesExplorer(saves_dir, scan_workers=workers)
+
+        async def load():
+            try:
+                return await explorer.load_all()
+            finally:
+                explorer.close()
+
+        return asyncio.run(load())
+
+    elapsed, peak = _measure(run, repeat)
+    return {
+        'seconds':       elapsed,
+        'saves_per_sec': len(os.listdir(saves_dir)) / elapsed,
+        'peak_memory':   peak,  # the worker processes are not counted
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="tests.bench_parser", description="benchmark of the save parser")
+    parser.add_argument('--saves', type=int, default=200, help="number of savefiles for each layout")
+    parser.add_argument('--mods', type=int, default=30, help="number of mods in each save (max 255)")
+    parser.add_argument('--startup-settings', type=int, default=100, help="number of mod startup settings")
+    parser.add_argument('--body-size', type=int, default=1 << 16, help="size of the fake game data after the header")
+    parser.add_argument('--layout', choices=[*LAYOUTS, 'all'], default='all')
+    parser.add_argument('--repeat', type=int, default=3, help="report the best of the repeated runs")
+    parser.add_argument('--workers', type=int, default=None, help="scan_workers for SavesExplorer.load_all")
+    parser.add_argument('--output', default=None, help="append the results to this file besides stdout")
+    args = parser.parse_args()
+
+    layouts = LAYOUTS if args.layout == 'all' else {args.layout: LAYOUTS[args.layout]}
+    output = open(args.output, 'a') if args.output else None
+    try:
+        for layout, version in layouts.items():
+            with tempfile.TemporaryDirectory() as saves_dir:
+                paths = [
+                    make_save_zip(os.path.join(saves_dir, f'bench-{i}.zip'), version, mods=args.mods,
+                                  startup_settings=args.startup_settings, body_size=args.body_size, seed=i)
+                    for i in range(args.saves)
+                ]
+                common = {'layout': layout, 'saves': args.saves, 'mods': args.mods,
+                          'startup_settings': args.startup_settings, 'python': sys.version.split()[0]}
+                for target, result in [
+                    ('load_metadata', bench_load_metadata(paths, args.repeat)),
+                    ('LazyMetadata[ticks]', bench_load_play_time(paths, args.repeat)),
+                    ('SavesExplorer.load_all', bench_load_all(saves_dir, args.repeat, args.workers)),
+                ]:
+                    line = json.dumps({'target': target, **common, **result})
+                    print(line, flush=True)
+                    if output is not None:
+                        output.write(line + '\n')
+    finally:
+        if output is not None:
+            output.close()
+
+
+if __name__ == '__main__':
+    main()
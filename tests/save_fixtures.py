@@ -0,0 +1,140 @@
+# Synthetic savefiles for testing and benchmarking the save parser.
+# Only the header of level.dat0 follows the real format (see facmgr/server/save_explorer/parser.py),
+# the game data after it is faked with random bytes.
+import io
+import os
+import random
+import struct
+import zipfile
+import zlib
+
+
+class Serializer:
+    """the reverse of parser.Deserializer"""
+    def __init__(self):
+        self.buffer = io.BytesIO()
+
+    def write(self, data: bytes):
+        self.buffer.write(data)
+
+    def write_u8(self, value):
+        self.write(bytes([value]))
+
+    def write_bool(self, value):
+        self.write_u8(int(value))
+
+    def write_fmt(self, fmt, value):
+        self.write(struct.pack(fmt, value))
+
+    def write_optim(self, fmt, value):
+        if value < 0xFF:
+            self.write_u8(value)
+        else:
+            self.write_u8(0xFF)
+            self.write_fmt(fmt, value)
+
+    def write_str(self, value: str):
+        data = value.encode()
+        self.write_optim('<I', len(data))
+        self.write(data)
+
+    def getvalue(self):
+        return self.buffer.getvalue()
+
+
+def make_level_header(version=(2, 0, 66, 0), *, mods=3, startup_settings=10, map_settings=4,
+                      ticks=(216000, 216000, 216000), map_seed=123456789, scenario=('base', 'freeplay')) -> bytes:
+    is_v2map = version[0] >= 2
+    s = Serializer()
+    for v in version:
+        s.write_fmt('<H', v)
+    s.write(b'\x00')
+    s.write_str(scenario[0])
+    s.write_str(scenario[1])
+    s.write_str('base')
+    # flags
+    s.write_u8(1)
+    s.write_bool(False)
+    s.write_bool(False)
+    s.write_str('')
+    s.write_bool(True)
+    s.write_bool(False)
+    s.write_bool(False)
+    s.write_bool(False)
+    for v in version[:3]:
+        s.write_u8(v)
+    if is_v2map:
+        s.write_fmt('<I', 83907)
+    else:
+        s.write_fmt('<H', 59829)
+    s.write_u8(1)
+    if is_v2map:
+        s.write(b'\x00\x00\xa0\x00')
+    s.write_u8(mods)
+    for i in range(mods):
+        s.write_str('base' if i == 0 else f'synthetic-mod-{i}')
+        for v in (1, i % 256, 3):
+            s.write_u8(v)
+        s.write(struct.pack('<I', zlib.crc32(str(i).encode())))
+    s.write(b'\x00' * 6)
+    s.write_fmt('<I', startup_settings)
+    for i in range(startup_settings):
+        s.write(b'\x00')
+        s.write_str(f'synthetic-mod-setting-{i}')
+        s.write(b'\x05\x00\x01\x00\x00\x00\x00\x05value')
+        kind = i % 4
+        if kind == 0:
+            s.write(b'\x01\x00')
+            s.write_bool(i % 3 == 0)
+        elif kind == 1:
+            s.write(b'\x02\x00')
+            s.write_fmt('<d', i / 7)
+        elif kind == 2:
+            s.write(b'\x03\x00\x00')
+            s.write_str(f'value-{i}' * (i % 5))
+        else:
+            s.write(b'\x06\x00')
+            s.write_fmt('<Q', i * 1000)
+    if is_v2map:
+        for i in range(2):
+            s.write(b'\x01')
+            s.write_str(f'finish-{i}')
+            s.write(b'\x00')
+            s.write_bool(True)
+            s.write_str(f'message-{i}')
+            s.write(b'\x00')
+            s.write_u8(2)
+            for j in range(2):
+                s.write(b'\x01')
+                s.write_str(f'bullet-{i}-{j}')
+                s.write(b'\x00')
+            s.write_bool(False)
+            s.write_str('')
+        s.write_bool(False)
+    for t in ticks:
+        s.write_fmt('<Q' if is_v2map else '<I', t)
+    if not is_v2map:
+        s.write_fmt('<f', 1.0)
+        s.write_fmt('<f', 0.5)
+    s.write_u8(map_settings)
+    for i in range(map_settings):
+        s.write_str(f'map-setting-{i}')
+        for v in (0.1, 0.2, 0.3):
+            s.write_fmt('<f', v)
+    s.write(b'\x00\x01')
+    s.write_fmt('<I', map_seed)
+    return s.getvalue()
+
+
+def make_save_zip(path, version=(2, 0, 66, 0), *, body_size=1 << 20, zlib_level=True, seed=0, **kwargs):
+    """write a synthetic savefile to path. The header is followed by body_size bytes of pseudo game data"""
+    rng = random.Random(seed)
+    data = make_level_header(version, **kwargs) + rng.randbytes(body_size // 4) * 4
+    name = os.path.splitext(os.path.basename(path))[0]
+    with zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_STORED) as zf:
+        if zlib_level:
+            zf.writestr(f'{name}/level.dat0', zlib.compress(data))
+        else:
+            zf.writestr(f'{name}/level.dat', data)
+        zf.writestr(f'{name}/level.datmetadata', b'\x00' * 16)
+    return path
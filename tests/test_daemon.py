@@ -1,9 +1,24 @@
 import asyncio
 import logging
 import os
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
 from unittest import TestCase
+from unittest.mock import patch
 
 from facmgr.server.daemon import FactorioServerDaemon
+from facmgr.server.daemon.broadcast import Broadcaster
+from facmgr.server.daemon.command_writer import CommandWriter, StdinClosedError
+from facmgr.server.daemon.events import GameEvent
+from facmgr.server.daemon.message_log import MessageLog
+from facmgr.server.daemon.notifier import OffsetNotifier
+from facmgr.server.daemon.offset_buffer import OffsetBuffer
+from facmgr.server.daemon.monitor import AsyncStreamMonitor, OutputHistory
+from facmgr.server.daemon.resources import ResourceSampler, ResourceSeries, ResourcePoint
 from facmgr.protobuf.error_code import *
 
 logging.basicConfig(format='%(asctime)s [%(levelname).1s] [%(name)s] %(message)s', level=logging.INFO)
@@ -267,3 +282,656 @@ class TestFactorioServerDaemon(TestCase):
             self.assertIsNone(fac.get_current_args())
 
         self.loop.run_until_complete(test())
+
+
+class TestStdoutParsing(TestCase):
+    """parse the stdout lines without a real server"""
+
+    def test_save_events(self):
+        fac = FactorioServerDaemon('factorio')
+        saved = []
+        fac.save_callback = saved.append
+        stdout_callback = fac._monitor['stdout'].batch_callback
+        for line in [b' 300.000 Info AutosaveScheduler.cpp:1: Saving to _autosave1 (non-blocking).\n',
+                     b'2024-01-01 00:00:00 [CHAT] player: Saving finished\n',  # a message, not a log
+                     b' 300.500 Info AutosaveScheduler.cpp:2: Saving finished\n',
+                     b' 400.000 Info AppManagerStates.cpp:3: Saving map as /opt/factorio/saves/my save.zip\n',
+                     b' 400.100 Info AppManagerStates.cpp:4: Saving finished\n',
+                     b' 500.000 Info AutosaveScheduler.cpp:5: Saving finished\n']:
+            stdout_callback([line])
+        self.assertEqual(saved, ['_autosave1.zip', 'my save.zip'])
+        self.assertEqual(len(fac.message_buffer), 1)
+
+    def test_game_events(self):
+        async def test():
+            fac = FactorioServerDaemon('factorio')
+            stdout_callback = fac._monitor['stdout'].batch_callback
+            stdout_callback([b'2024-01-01 00:00:00 [JOIN] alice joined the game\r\n',
+                             b' 100.000 Info ServerMultiplayerManager.cpp:1: not a message\n',
+                             b'not a game event\n',
+                             b'2024-01-01 00:00:01 [CHAT] alice: hello: world\n'])
+            # at the offsets of the messages
+            self.assertEqual(await fac.get_events(0), (2, [
+                GameEvent(0, '2024-01-01 00:00:00', 'JOIN', 'alice', ''),
+                GameEvent(2, '2024-01-01 00:00:01', 'CHAT', 'alice', 'hello: world'),
+            ]))
+            self.assertEqual(await fac.get_events(1), (2, [
+                GameEvent(2, '2024-01-01 00:00:01', 'CHAT', 'alice', 'hello: world'),
+            ]))
+            waiter = asyncio.create_task(fac.get_events(3, {'LEAVE'}))
+            stdout_callback([b'2024-01-01 00:00:02 [CHAT] bob: hi\n'])
+            await asyncio.sleep(0)
+            self.assertFalse(waiter.done())  # filtered out
+            stdout_callback([b'2024-01-01 00:00:03 [LEAVE] alice left the game\n'])
+            self.assertEqual(await waiter, (4, [GameEvent(4, '2024-01-01 00:00:03', 'LEAVE', 'alice', '')]))
+            self.assertEqual(len(fac.message_buffer), 5)
+            # the offset of the last event returned when it's cut by max_batch
+            self.assertEqual(await fac.get_events(0, {'JOIN', 'LEAVE'}, max_batch=1), (0, [
+                GameEvent(0, '2024-01-01 00:00:00', 'JOIN', 'alice', ''),
+            ]))
+
+        asyncio.run(test())
+
+    def test_message_log(self):
+        async def test():
+            with tempfile.TemporaryDirectory() as log_dir:
+                fac = FactorioServerDaemon('factorio', message_maxlen=2, message_log_dir=log_dir)
+                fac._monitor['stdout'].batch_callback([b'message %d\n' % i for i in range(5)])
+                fac.close()
+                # the offsets continue after restarting, and the old messages are read from the log
+                fac = FactorioServerDaemon('factorio', message_maxlen=2, message_log_dir=log_dir)
+                self.assertEqual(await fac.get_message(3), (4, [b'message 3\n', b'message 4\n']))
+                fac._monitor['stdout'].batch_callback([b'message 5\n', b'message 6\n', b'message 7\n'])
+                self.assertEqual(list(fac.message_buffer), [(6, b'message 6\n'), (7, b'message 7\n')])
+                self.assertEqual(await fac.get_message(4), (7, [b'message %d\n' % i for i in range(4, 8)]))
+                self.assertEqual(await fac.get_message(0), (7, [b'message %d\n' % i for i in range(8)]))
+                self.assertEqual(await fac.get_message(0, 3), (2, [b'message %d\n' % i for i in range(3)]))
+                self.assertEqual(await fac.get_message(4, 3), (6, [b'message %d\n' % i for i in range(4, 7)]))
+                fac.close()
+
+        asyncio.run(test())
+
+    def test_event_offsets(self):
+        async def test():
+            with tempfile.TemporaryDirectory() as log_dir:
+                fac = FactorioServerDaemon('factorio', message_log_dir=log_dir)
+                fac._monitor['stdout'].batch_callback([b'2024-01-01 00:00:00 [JOIN] alice joined the game\n'])
+                self.assertEqual(await fac.get_events(0), (0, [GameEvent(0, '2024-01-01 00:00:00', 'JOIN', 'alice', '')]))
+                fac.close()
+                # the events after restarting are not mistaken for the ones already read
+                fac = FactorioServerDaemon('factorio', message_log_dir=log_dir)
+                waiter = asyncio.create_task(fac.get_events(1))
+                fac._monitor['stdout'].batch_callback([b'2024-01-01 00:00:01 [LEAVE] alice left the game\n'])
+                self.assertEqual(await waiter, (1, [GameEvent(1, '2024-01-01 00:00:01', 'LEAVE', 'alice', '')]))
+                fac.close()
+
+        asyncio.run(test())
+
+
+class TestGameVersion(TestCase):
+    """a fake executable which counts the launches"""
+    SCRIPT = ('#!{python}\nopen({count!r}, "a").write("x")\n'
+              'print("Version: {version} (build 1, linux64, headless)\\nBinary version: 64\\n'
+              'Map input version: 0.18.0-0\\nMap output version: {version}-0")\n')
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+        self.executable = os.path.join(self.dir.name, 'factorio')
+        self.count = os.path.join(self.dir.name, 'count')
+
+    def write_executable(self, version, mtime_ns):
+        with open(self.executable, 'w') as f:
+            f.write(self.SCRIPT.format(python=sys.executable, count=self.count, version=version))
+        os.chmod(self.executable, 0o755)
+        os.utime(self.executable, ns=(mtime_ns, mtime_ns))
+
+    def launches(self):
+        with open(self.count) as f:
+            return len(f.read())
+
+    def test_cache(self):
+        async def test():
+            self.write_executable('1.1.0', 10 ** 18)
+            fac = FactorioServerDaemon(self.executable)
+            versions = await asyncio.gather(*[fac.get_game_version() for _ in range(5)])
+            self.assertTrue(versions[0].startswith('Version: 1.1.0'))
+            self.assertEqual(versions, [versions[0]] * 5)
+            self.assertEqual(await fac.get_game_version(), versions[0])
+            self.assertEqual(self.launches(), 1)
+            self.write_executable('1.1.1', 10 ** 18 + 1)
+            self.assertEqual(await fac.get_game_version(), versions[0])  # refreshed in the background
+            await asyncio.gather(*fac._background_tasks)
+            self.assertTrue((await fac.get_game_version()).startswith('Version: 1.1.1'))
+            self.assertEqual(self.launches(), 2)
+
+        asyncio.run(test())
+
+
+class TestResourceSeries(TestCase):
+    def test_ring(self):
+        series = ResourceSeries(4)
+        for t in range(6):
+            series.append(t, 10. * t, 100 * t, 0., 0., t)
+        self.assertEqual(len(series), 4)
+        points = series.window(10, 10, now=5.5)
+        self.assertEqual([(p.time, p.cpu_percent, p.rss, p.samples) for p in points],
+                         [(2, 20., 200, 1), (3, 30., 300, 1), (4, 40., 400, 1), (5, 50., 500, 1)])
+        self.assertEqual([p.time for p in series.window(2, 10, now=5.5)], [4, 5])
+
+    def test_downsample(self):
+        series = ResourceSeries(100)
+        for t in range(60):
+            series.append(t, t % 2 * 100., 1000 + t, 10., 20., 4 + t % 3)
+        points = series.window(60, 6, now=60)
+        self.assertEqual(len(points), 6)
+        self.assertEqual([p.samples for p in points], [10] * 6)
+        self.assertEqual(points[0], ResourcePoint(9, 50., 1009, 10., 20., 6, 10))
+        self.assertEqual(series.window(60, 6, now=1000), [])
+
+    def test_sampler(self):
+        import psutil
+        sampler = ResourceSampler(1)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            # a child of this process keeps a core busy and writes a file, it's sampled in the process tree
+            child = subprocess.Popen([sys.executable, '-c', '\n'.join([
+                'import sys, time', 'f = open(sys.argv[1], "wb")', 'end = time.monotonic() + 10',
+                'while time.monotonic() < end: f.write(bytes(4096)); f.tell() > 1 << 20 and f.seek(0)'
+            ]), os.path.join(tmpdir, 'data')])
+            self.addCleanup(child.wait)
+            self.addCleanup(child.kill)
+            self.assertTrue(sampler.sample(os.getpid()))
+            time.sleep(0.5)
+            self.assertTrue(sampler.sample(os.getpid()))
+            first, second = sampler.series.window(60, 6000)  # each sample in its own bucket
+            self.assertEqual((first.cpu_percent, first.read_bytes_per_sec, first.write_bytes_per_sec), (0, 0, 0))
+            self.assertGreater(second.cpu_percent, 20)
+            self.assertLess(second.cpu_percent, 100 * os.cpu_count() + 20)
+            for point in first, second:
+                self.assertGreater(point.rss, psutil.Process().memory_info().rss)  # with the child
+                self.assertLess(point.rss, 1 << 34)
+                self.assertGreater(point.threads, psutil.Process().num_threads())
+                self.assertTrue(0 <= point.read_bytes_per_sec < 1 << 34 and 0 <= point.write_bytes_per_sec < 1 << 34)
+            # sampling another process starts over
+            time.sleep(0.05)
+            self.assertTrue(sampler.sample(child.pid))
+            third = sampler.series.window(60, 6000)[-1]
+            self.assertEqual((third.cpu_percent, third.write_bytes_per_sec, third.threads), (0, 0, 1))
+            self.assertLess(third.rss, second.rss)
+            child.kill()
+            child.wait()
+            self.assertFalse(sampler.sample(child.pid))
+            self.assertEqual(len(sampler.series), 3)
+
+    def test_run(self):
+        sampler, threads = ResourceSampler(0.01), []
+        measure = sampler._measure
+
+        def recorded(pid):
+            threads.append(threading.current_thread())
+            return measure(pid)
+
+        async def test():
+            process = await asyncio.create_subprocess_exec(sys.executable, '-c', 'import time; time.sleep(0.5)')
+            await asyncio.wait_for(sampler.run(process.pid), 5)  # until the process exits
+            await process.wait()
+
+        with patch.object(sampler, '_measure', recorded):
+            asyncio.run(test())
+        self.assertGreater(len(sampler.series), 2)
+        self.assertEqual(len(threads), len(sampler.series) + 1)
+        self.assertNotIn(threading.main_thread(), threads)  # off the event loop
+
+    def test_unavailable(self):
+        with patch.object(ResourceSampler, 'available', return_value=False):
+            fac = FactorioServerDaemon(sys.executable, resource_interval=5.)
+        self.assertIsNone(fac.resources)
+        self.assertIsNone(fac.get_resource_stats())
+
+
+class TestOffsetBuffer(TestCase):
+    def test_ring(self):
+        buffer = OffsetBuffer(maxlen=3)
+        self.assertEqual((len(buffer), list(buffer), buffer.locate(5), buffer.since(0)), (0, [], 0, []))
+        buffer.extend((i, str(i)) for i in range(5))
+        self.assertEqual(list(buffer), [(2, '2'), (3, '3'), (4, '4')])
+        self.assertEqual(list(reversed(buffer)), [(4, '4'), (3, '3'), (2, '2')])
+        self.assertEqual((buffer[0], buffer[-1], buffer[1]), ((2, '2'), (4, '4'), (3, '3')))
+        with self.assertRaises(IndexError):
+            _ = buffer[3]
+        self.assertEqual([buffer.locate(offset) for offset in range(7)], [0, 0, 0, 1, 2, 3, 3])
+        self.assertEqual(buffer.since(3), [(3, '3'), (4, '4')])
+        self.assertEqual(buffer.since(0, limit=2), [(2, '2'), (3, '3')])
+        buffer.clear()
+        buffer.append((0, '0'))
+        self.assertEqual(list(buffer), [(0, '0')])
+
+    def test_gaps(self):
+        buffer = OffsetBuffer()
+        buffer.extend((offset, None) for offset in [1, 2, 10, 11, 20])
+        self.assertEqual([buffer.locate(offset) for offset in [0, 2, 3, 10, 12, 20, 21]], [0, 1, 2, 2, 4, 4, 5])
+        self.assertEqual(buffer.since(11, limit=1), [(11, None)])
+
+
+class TestOffsetNotifier(TestCase):
+    def test_thresholds(self):
+        async def test():
+            head = None
+            notifier = OffsetNotifier(lambda: head)
+            waiters = {threshold: asyncio.create_task(notifier.wait(threshold)) for threshold in [0, 1, 3]}
+            cancelled = asyncio.create_task(notifier.wait(2))
+            await asyncio.sleep(0)
+            self.assertEqual(len(notifier), 4)
+            notifier.set()  # nothing yet
+            head = 1
+            cancelled.cancel()
+            notifier.set()
+            await asyncio.sleep(0)
+            self.assertEqual((await waiters[0], await waiters[1]), (1, 1))
+            self.assertFalse(waiters[3].done())  # not woken up before its threshold
+            self.assertEqual(await notifier.wait(1), 1)  # reached already
+            head = 5
+            notifier.set()
+            self.assertEqual(await waiters[3], 5)
+            self.assertEqual(len(notifier), 0)
+
+        asyncio.run(test())
+
+    def test_concurrent_pollers(self):
+        async def test():
+            fac = FactorioServerDaemon('factorio')
+            stdout_callback = fac._monitor['stdout'].batch_callback
+            stdout_callback([b'a\n'])
+            # a poller that waits again right after waking up must not swallow the wakeup of the others
+            pollers = [asyncio.create_task(fac.get_message(1)) for _ in range(3)]
+            await asyncio.sleep(0)
+            stdout_callback([b'b\n'])
+            again = asyncio.create_task(fac.get_message(2))
+            await asyncio.sleep(0)
+            self.assertEqual([await poller for poller in pollers], [(1, [b'b\n'])] * 3)
+            self.assertFalse(again.done())
+            stdout_callback([b'c\n'])
+            self.assertEqual(await again, (2, [b'c\n']))
+
+        asyncio.run(test())
+
+
+class TestBroadcaster(TestCase):
+    @staticmethod
+    def items(start, stop):
+        return [(i, b'%d' % i) for i in range(start, stop)]
+
+    def broadcaster(self, **kwargs):
+        self.storage = []
+        return Broadcaster(
+            'messages', lambda start, end, limit: [i for i in self.storage if start <= i[0] < end][:limit], **kwargs
+        )
+
+    def publish(self, broadcaster, items):
+        self.storage += items
+        broadcaster.publish(items)
+
+    def test_drop_oldest(self):
+        async def test():
+            broadcaster = self.broadcaster(queue_size=3, policy='drop-oldest')
+            slow, fast = broadcaster.subscribe('slow'), broadcaster.subscribe('fast')
+            self.publish(broadcaster, self.items(0, 2))
+            self.assertEqual(await fast.get(10), (self.items(0, 2), 0))
+            self.publish(broadcaster, self.items(2, 5))
+            self.assertEqual(await fast.get(10), (self.items(2, 5), 0))
+            stat = slow.stat()
+            self.assertEqual((stat.queued, stat.lag, stat.dropped), (3, 3, 2))
+            self.assertEqual(await slow.get(2), (self.items(2, 4), 2))
+            self.assertEqual(await slow.get(2), (self.items(4, 5), 0))
+            self.assertEqual((slow.stat().lag, slow.stat().delivered), (0, 3))
+
+        asyncio.run(test())
+
+    def test_coalesce(self):
+        async def test():
+            broadcaster = self.broadcaster(queue_size=3)
+            subscription = broadcaster.subscribe('slow')
+            for i in range(10):
+                self.publish(broadcaster, self.items(i, i + 1))
+            self.assertEqual(subscription.stat().queued, 2)  # the older ones are collapsed into a range
+            self.assertEqual(await subscription.get(4), (self.items(0, 4), 0))
+            self.assertEqual(await subscription.get(4), (self.items(4, 8), 0))
+            self.assertEqual(await subscription.get(4), (self.items(8, 10), 0))
+            self.assertEqual(subscription.stat().dropped, 0)
+            waiter = asyncio.create_task(subscription.get(4))
+            await asyncio.sleep(0)
+            self.assertFalse(waiter.done())
+            self.publish(broadcaster, self.items(10, 11))
+            self.assertEqual(await waiter, (self.items(10, 11), 0))
+
+        asyncio.run(test())
+
+    def test_coalesce_rotated(self):
+        async def test():
+            broadcaster = self.broadcaster(queue_size=3)
+            subscription = broadcaster.subscribe('slow', accept=lambda item: item[0] != 6)
+            for i in range(10):
+                self.publish(broadcaster, self.items(i, i + 1))
+            del self.storage[:5]  # rotated out before the subscriber catches up
+            self.assertEqual(await subscription.get(2), (self.items(5, 6), 0))
+            self.assertEqual(await subscription.get(2), (self.items(7, 9), 5))  # once the range is read through
+            self.assertEqual(await subscription.get(2), (self.items(9, 10), 0))
+            self.assertEqual((subscription.stat().dropped, subscription.stat().delivered), (5, 4))
+
+        asyncio.run(test())
+
+    def test_disconnect(self):
+        async def test():
+            broadcaster = self.broadcaster(queue_size=3)
+            subscription = broadcaster.subscribe('slow', policy='disconnect')
+            self.publish(broadcaster, self.items(0, 2))
+            self.publish(broadcaster, self.items(2, 4))
+            self.publish(broadcaster, self.items(4, 5))
+            self.assertEqual((subscription.closed, subscription.gap, broadcaster.stats()), (True, 2, []))
+            self.assertEqual(await subscription.get(10), (self.items(0, 2), 0))
+            self.assertIsNone(await subscription.get(10))
+
+        asyncio.run(test())
+
+    def test_from_offset(self):
+        async def test():
+            broadcaster = self.broadcaster(queue_size=3)
+            self.publish(broadcaster, self.items(0, 5))
+            self.assertEqual(broadcaster.head, 4)
+            subscription = broadcaster.subscribe('late', 2, accept=lambda item: item[0] % 2 == 0)
+            self.publish(broadcaster, self.items(5, 7))
+            self.assertEqual(await subscription.get(10), ([(2, b'2'), (4, b'4')], 0))
+            self.assertEqual(await subscription.get(10), ([(6, b'6')], 0))
+            subscription.close()
+            self.assertEqual(broadcaster.stats(), [])
+
+        asyncio.run(test())
+
+    def test_daemon(self):
+        async def test():
+            fac = FactorioServerDaemon('factorio', subscriber_queue_size=2)
+            stdout_callback = fac._monitor['stdout'].batch_callback
+            stdout_callback([b'message 0\n', b'2024-01-01 00:00:00 [JOIN] alice joined the game\n'])
+            messages = fac.subscribe_messages('peer', 0)
+            events = fac.subscribe_events('peer', kinds={'CHAT'})
+            stdout_callback([b'2024-01-01 00:00:01 [CHAT] alice: hi\n'] + [b'message %d\n' % i for i in range(3, 8)])
+            self.assertEqual(await messages.get(3), (fac.message_buffer.since(0, 3), 0))
+            self.assertEqual(await messages.get(10), (fac.message_buffer.since(3), 0))
+            self.assertEqual(await events.get(10), ([GameEvent(2, '2024-01-01 00:00:01', 'CHAT', 'alice', 'hi')], 0))
+            self.assertEqual([(stat.stream, stat.lag) for stat in fac.get_subscriber_stats()],
+                             [('messages', 0), ('events', 0)])
+
+        asyncio.run(test())
+
+
+class TestCommandWriter(TestCase):
+    @staticmethod
+    async def cat(*code):
+        # a child echoing its stdin, after the code
+        return await asyncio.create_subprocess_exec(
+            sys.executable, '-c',
+            ';'.join(['import sys, time', *code, 'sys.stdout.buffer.write(sys.stdin.buffer.read())']),
+            stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE
+        )
+
+    def test_order(self):
+        async def test():
+            process = await self.cat('time.sleep(0.2)')
+            writer = CommandWriter(process.stdin)
+            commands = [b'/c print(%d)\n' % i * 10 for i in range(2000)]  # more than the pipe buffer
+            for cmd in commands:
+                self.assertTrue(writer.submit(cmd))
+            writer.write_eof()
+            with self.assertRaises(StdinClosedError):
+                writer.submit(b'/quit\n')
+            output, _ = await process.communicate()
+            self.assertEqual(output, b''.join(commands))
+            self.assertEqual((writer.stat.commands, writer.stat.pending), (2000, 0))
+            self.assertLess(writer.stat.writes, writer.stat.commands)  # coalesced
+            self.assertGreater(writer.stat.max_latency, 0)
+
+        asyncio.run(test())
+
+    def test_bounded(self):
+        async def test():
+            process = await self.cat('time.sleep(1)')
+            writer = CommandWriter(process.stdin, max_pending_bytes=1 << 16)
+            cmd = b'x' * 1023 + b'\n'
+            accepted = 0
+            while writer.submit(cmd):
+                accepted += 1
+            self.assertEqual(writer.stat.rejected, 1)
+            self.assertLessEqual(writer.stat.pending_bytes, 1 << 16)
+            self.assertTrue(writer.submit(b'/quit\n', force=True))
+            await writer.drain()
+            self.assertEqual((writer.stat.commands, writer.stat.pending), (accepted + 1, 0))
+            writer.write_eof()
+            output, _ = await process.communicate()
+            self.assertEqual(output, cmd * accepted + b'/quit\n')
+
+        asyncio.run(test())
+
+
+class TestCommandCapture(TestCase):
+    # runs the prints of the markers, and answers the other commands
+    FAKE_SERVER = '''if True:
+        import re, sys, time
+        print(" 1.000 Info AppManager.cpp:1: changing state from(CreatingGame) to(InGame)", flush=True)
+        for line in sys.stdin:
+            if line.startswith("/sleep"):
+                time.sleep(1)
+            m = re.fullmatch(r'/silent-command print\\("(.*)"\\)', line.strip())
+            print(m[1] if m else "output of " + line.strip(), flush=True)
+    '''
+
+    def test_capture_command(self):
+        async def test():
+            fac = FactorioServerDaemon(sys.executable, timeout=5)
+            self.assertEqual((await fac.capture_command('/c 1'))[0]['code'], NOT_AVAILABLE)
+            self.assertEqual((await fac.start(['-c', self.FAKE_SERVER]))['code'], SUCCESS)
+            self.assertEqual(await fac.capture_command('/c 1'), ({"code": SUCCESS, "message": None},
+                                                                 [b'output of /c 1\n']))
+            results = await asyncio.gather(*[fac.capture_command(f'/c {i}\n/c again {i}') for i in range(20)])
+            self.assertEqual(results, [({"code": SUCCESS, "message": None},
+                                        [b'output of /c %d\n' % i, b'output of /c again %d\n' % i])
+                                       for i in range(20)])
+            status, lines = await fac.capture_command('/c before\n/sleep', timeout=0.5)
+            self.assertEqual((status['code'], lines), (ABORTED, [b'output of /c before\n']))
+            self.assertEqual(fac.in_game_command('/c visible'), {"code": SUCCESS, "message": None})
+            await fac._monitor['stdout'].wait_for(b'output of /c visible')
+            # neither the markers nor the captured output are messages, even after the timeout
+            self.assertEqual([message for _, message in fac.message_buffer], [b'output of /c visible\n'])
+            await fac.stop()
+
+        asyncio.run(test())
+
+    def test_stopping(self):
+        async def test():
+            fac = FactorioServerDaemon(sys.executable, timeout=5, stop_strategy='quit')
+            self.assertEqual((await fac.start(['-c', self.FAKE_SERVER]))['code'], SUCCESS)
+            stopping = asyncio.create_task(fac.stop())
+            await asyncio.sleep(0)  # /quit is written and the stdin is closed
+            stopped = {"code": STOPPING, "message": "The server is stopping."}
+            self.assertEqual(fac.in_game_command('/c 1'), stopped)
+            self.assertEqual(await fac.capture_command('/c 1'), (stopped, []))
+            await stopping
+
+        asyncio.run(test())
+
+
+class TestMessageLog(TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+
+    def test_read(self):
+        log = MessageLog(self.dir.name)
+        self.assertEqual((log.start, log.next_offset, log.read(0)), (0, 0, []))
+        log.extend([(0, b'a\n'), (1, b'bb\n')])
+        log.extend([(2, b'')])
+        self.assertEqual(log.read(0), [(0, b'a\n'), (1, b'bb\n'), (2, b'')])
+        self.assertEqual(log.read(1, 2), [(1, b'bb\n')])
+        self.assertEqual(log.read(0, limit=2), [(0, b'a\n'), (1, b'bb\n')])
+        self.assertEqual(log.read(5), [])
+        with self.assertRaises(ValueError):
+            log.extend([(1, b'again\n')])
+        log.extend([(10, b'after a gap\n')])
+        self.assertEqual(log.read(2), [(2, b''), (10, b'after a gap\n')])
+        self.assertEqual(log.next_offset, 11)
+        log.close()
+
+    def test_reopen(self):
+        log = MessageLog(self.dir.name, segment_bytes=30)
+        log.extend([(i, b'message %d\n' % i) for i in range(10)])
+        log.close()
+        segments = sorted(os.listdir(self.dir.name))
+        self.assertGreater(len(segments), 1)
+        with open(os.path.join(self.dir.name, segments[-1]), 'ab') as f:
+            f.write(b'\x0a\x00\x00')  # an incomplete record, e.g. killed when writing
+        log = MessageLog(self.dir.name, segment_bytes=30)
+        self.assertEqual((log.start, log.next_offset), (0, 10))
+        self.assertEqual(log.read(0), [(i, b'message %d\n' % i) for i in range(10)])
+        log.extend([(10, b'message 10\n')])
+        self.assertEqual(log.read(9), [(9, b'message 9\n'), (10, b'message 10\n')])
+        log.close()
+
+    def test_retention(self):
+        log = MessageLog(self.dir.name, segment_bytes=50, retention_bytes=100)
+        self.assertEqual(log.read(0), [])
+        for i in range(100):
+            log.extend([(i, b'message %02d\n' % i)])  # 23 bytes with the header
+            if i == 1:
+                self.assertEqual(log.read(0, limit=1), [(0, b'message 00\n')])  # mapped, then removed
+        self.assertLessEqual(len(os.listdir(self.dir.name)), 3)
+        self.assertEqual(log.next_offset, 100)
+        self.assertGreater(log.start, 0)
+        self.assertEqual(log.read(0), [(i, b'message %02d\n' % i) for i in range(log.start, 100)])
+        # the oldest segments are removed from the disk, and the size is bounded
+        segments = sorted(os.listdir(self.dir.name))
+        self.assertEqual(int(segments[0].split('.')[0]), log.start)
+        self.assertLessEqual(sum(os.path.getsize(os.path.join(self.dir.name, name)) for name in segments), 100 + 50)
+        start = log.start
+        log.close()
+        log = MessageLog(self.dir.name, segment_bytes=50, retention_bytes=100)
+        self.assertEqual((log.start, log.next_offset), (start, 100))
+        log.close()
+
+
+class TestAsyncStreamMonitor(TestCase):
+    def test_wait_for(self):
+        async def test():
+            stream = asyncio.StreamReader()
+            monitor = AsyncStreamMonitor(stream)
+            waiters = [asyncio.create_task(monitor.wait_for(keyword)) for keyword in [
+                b'Saving', b'Saving finished', b'Saving finished', b'never',
+                re.compile(rb'to\(InGame\)'), re.compile(rb'player (\w+) joined', re.IGNORECASE),
+                re.compile(rb'(?P<x>\d+)\.(?P=x)'),  # not combinable
+            ]]
+            await asyncio.sleep(0)
+            for line in [b' 1.000 Info changing state from(CreatingGame) to(InGame)\n',
+                         b'2024-01-01 00:00:00 [JOIN] Player alice joined the game\n',
+                         b' 2.000 Info Saving finished\n',
+                         b' 3.000 Info 42.42\n']:
+                stream.feed_data(line)
+            stream.feed_eof()
+            await monitor.wait_eof()
+            await asyncio.sleep(0)
+            self.assertEqual([waiter.result() for waiter in waiters[:3]], [b' 2.000 Info Saving finished\n'] * 3)
+            self.assertFalse(waiters[3].done())
+            waiters[3].cancel()
+            await asyncio.sleep(0)
+            self.assertEqual(waiters[4].result()[0], b'to(InGame)')
+            self.assertEqual(waiters[5].result()[1], b'alice')
+            self.assertEqual(waiters[6].result()['x'], b'42')
+            self.assertFalse(monitor._keywords)
+
+        asyncio.run(test())
+
+    def test_capture(self):
+        async def test():
+            stream = asyncio.StreamReader()
+            monitor = AsyncStreamMonitor(stream)
+            with monitor.capture(b'begin-1', b'end-1') as first, monitor.capture(b'begin-2', b'end-2') as second:
+                for line in [b'before\n', b'begin-2\r\n', b'2a\n', b'2b\n', b'end-2\r\n',
+                             b'between\n', b'begin-1\n', b'1a\n']:
+                    stream.feed_data(line)
+                self.assertEqual(await second.done, [b'2a\n', b'2b\n'])
+                await asyncio.sleep(0)
+                self.assertEqual((first.started, first.done.done(), first.lines), (True, False, [b'1a\n']))
+            # left before the end, the rest of it is still dropped
+            self.assertEqual((monitor._capturing, first.abandoned), (first, True))
+            with monitor.capture(b'begin-3', b'end-3') as third:
+                third.discard()
+            stream.feed_data(b'1b\nend-1\nafter\n')
+            stream.feed_eof()
+            await monitor.wait_eof()
+            self.assertEqual((monitor._captures, monitor._capturing, first.lines), ({}, None, [b'1a\n']))
+            self.assertEqual(monitor.history.tail(), b'before\nbetween\nafter\n')
+
+        asyncio.run(test())
+
+    def test_str_pattern(self):
+        with self.assertRaises(TypeError):
+            asyncio.run(AsyncStreamMonitor().wait_for(re.compile('str')))
+
+    def test_chunked_read(self):
+        async def test():
+            stream = asyncio.StreamReader()
+            monitor = AsyncStreamMonitor(stream)
+            monitor.READ_SIZE = 7  # split the lines across the chunks
+            batches = []
+            monitor.batch_callback = batches.append
+            waiter = asyncio.create_task(monitor.wait_for(b'ready'))
+            await asyncio.sleep(0)
+            stream.feed_data(b'first line\r\nsecond\n' + b'x' * 20 + b'\nready\nno newline')
+            stream.feed_eof()
+            await monitor.wait_eof()
+            lines = [line for batch in batches for line in batch]
+            self.assertEqual(lines, [b'first line\r\n', b'second\n', b'x' * 20 + b'\n', b'ready\n', b'no newline'])
+            self.assertEqual(await waiter, b'ready\n')
+            stat = monitor.throughput.stat()
+            self.assertEqual((stat.lines, stat.bytes), (5, 56))
+            self.assertGreater(stat.bytes_per_sec, 0)
+
+        asyncio.run(test())
+
+
+class TestOutputHistory(TestCase):
+    def test_byte_budget(self):
+        history = OutputHistory(max_bytes=10)
+        for line in [b'aaaa\n', b'bbbb\n', b'cccc\n']:
+            history.append(line)
+        self.assertEqual((history.start, history.end, history.size, len(history)), (5, 15, 10, 2))
+        self.assertEqual(history.tail(), b'bbbb\ncccc\n')
+        self.assertEqual(history.tail(3), b'cc\n')
+        self.assertEqual(history.tail(100), b'bbbb\ncccc\n')
+        self.assertEqual(history.tail(0), b'')
+
+    def test_read(self):
+        history = OutputHistory(maxlen=3)
+        for line in [b'0123\n', b'45\n', b'6789\n', b'ab\n']:
+            history.append(line)
+        self.assertEqual(history.read(), (5, b'45\n6789\nab\n'))
+        self.assertEqual(history.read(0, 7), (5, b'45'))
+        self.assertEqual(history.read(10, 13), (10, b'89\n'))
+        self.assertEqual(history.read(16), (16, b''))
+        history.clear()
+        self.assertEqual((history.read(), history.size), ((16, b''), 0))
+
+    def test_compaction(self):
+        history = OutputHistory(max_bytes=5000)
+        history.COMPACT_MIN = 16
+        stream = b''
+        for i in range(2000):
+            line = b'%d\n' % i * (i % 3 + 1)
+            history.append(line) if i % 2 else history.extend([line])
+            stream += line
+            if i % 97 == 96:
+                self.assertLess(len(history._lines), 2 * len(history) + 18)  # the dropped lines are compacted
+                self.assertEqual(history.tail(), stream[history.start:])
+                for start, end in [(history.start, None), (history.end - 100, history.end - 3), (0, 10 ** 9)]:
+                    start = max(start, history.start)
+                    self.assertEqual(history.read(start, end), (start, stream[start:end]))
+        self.assertLessEqual(history.size, 5000)
+        self.assertEqual(history.tail(7), stream[-7:])
+
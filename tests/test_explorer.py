@@ -0,0 +1,415 @@
+import asyncio
+import os
+import sqlite3
+import tempfile
+import threading
+import zipfile
+from unittest import TestCase
+from unittest.mock import patch
+
+from facmgr.protobuf.facmgr_pb2 import SaveQuery
+from facmgr.server.grpc_methods import ServerManager
+from facmgr.server.save_explorer import SavesExplorer
+from facmgr.server.save_explorer.cache import MetadataCache
+from facmgr.server.save_explorer.index import SaveIndex
+from facmgr.server.save_explorer.parser import LazyMetadata, Deserializer
+from facmgr.server.save_explorer.watcher import SavesWatcher, file_key
+from .save_fixtures import make_save_zip
+
+
+class TestMetadataCache(TestCase):
+    @staticmethod
+    def metadata(name='a.zip'):
+        return LazyMetadata(name, invalid=True)
+
+    def test_lru(self):
+        cache = MetadataCache(max_entries=2)
+        cache.put(('a.zip', 1, 1, 1), self.metadata())
+        cache.put(('b.zip', 2, 1, 1), self.metadata())
+        self.assertIsNotNone(cache.get(('a.zip', 1, 1, 1)))  # b becomes the least recently used
+        cache.put(('c.zip', 3, 1, 1), self.metadata())
+        self.assertIsNone(cache.get(('b.zip', 2, 1, 1)))
+        self.assertIsNotNone(cache.get(('c.zip', 3, 1, 1)))
+        self.assertEqual((cache.stat.hits, cache.stat.misses, cache.stat.evictions, cache.stat.entries), (2, 1, 1, 2))
+
+    def test_same_mtime_and_size(self):
+        cache = MetadataCache()
+        a, b = self.metadata('a.zip'), self.metadata('b.zip')
+        cache.put(('a.zip', 1, 100, 10), a)
+        cache.put(('b.zip', 2, 100, 10), b)
+        self.assertIs(cache.get(('a.zip', 1, 100, 10)), a)
+        self.assertIs(cache.get(('b.zip', 2, 100, 10)), b)
+
+    def test_replace_and_discard(self):
+        cache = MetadataCache()
+        cache.put(('a.zip', 1, 100, 10), self.metadata())
+        cache.put(('a.zip', 1, 200, 10), self.metadata())
+        self.assertEqual(cache.stat.entries, 1)
+        self.assertIsNone(cache.get(('a.zip', 1, 100, 10)))
+        cache.discard('a.zip')
+        self.assertEqual((cache.stat.entries, cache.stat.bytes), (0, 0))
+
+    def test_byte_budget(self):
+        one = MetadataCache._estimate_size(self.metadata())
+        cache = MetadataCache(max_bytes=one * 3)
+        for i in range(5):
+            cache.put((f'{i}.zip', i, 1, 1), self.metadata())
+        self.assertEqual(cache.stat.entries, 3)
+        self.assertLessEqual(cache.stat.bytes, one * 3)
+
+
+class TestSavesWatcher(TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+
+    def path(self, name):
+        return os.path.join(self.tmpdir.name, name)
+
+    def write(self, name, data: bytes, mtime_ns):
+        with open(self.path(name), 'wb') as f:
+            f.write(data)
+        os.utime(self.path(name), ns=(mtime_ns, mtime_ns))
+
+    @staticmethod
+    async def wait_until(condition, timeout=5.):
+        async with asyncio.timeout(timeout):
+            while not condition():
+                await asyncio.sleep(0.01)
+
+    def check_events(self, use_inotify):
+        async def test():
+            changes = []
+            watcher = SavesWatcher(self.tmpdir.name, poll_interval=0.05, use_inotify=use_inotify,
+                                   on_change=lambda name, stat: changes.append((name, stat and file_key(stat))))
+            try:
+                await watcher.wait_ready()
+                self.assertEqual(watcher.polling, not use_inotify or os.name != 'posix')
+
+                def seen(name):
+                    stat = watcher.files.get(name)
+                    key = file_key(os.stat(self.path(name))) if os.path.exists(self.path(name)) else None
+                    return (stat and file_key(stat)) == key and changes and changes[-1] == (name, key)
+
+                self.write('a.zip', b'a', 10 ** 18)  # create
+                self.write('ignored.txt', b'a', 10 ** 18)
+                await self.wait_until(lambda: seen('a.zip'))
+                self.write('a.zip', b'aa', 10 ** 18 + 1)  # modify
+                await self.wait_until(lambda: seen('a.zip') and watcher.files['a.zip'].st_size == 2)
+                self.write('a.zip.tmp', b'aaa', 10 ** 18 + 2)
+                inode = os.stat(self.path('a.zip.tmp')).st_ino
+                os.replace(self.path('a.zip.tmp'), self.path('a.zip'))  # rename over
+                await self.wait_until(lambda: seen('a.zip') and watcher.files['a.zip'].st_ino == inode)
+                os.remove(self.path('a.zip'))  # delete
+                await self.wait_until(lambda: seen('a.zip') and 'a.zip' not in watcher.files)
+                self.assertEqual(changes[-1], ('a.zip', None))
+                self.assertTrue(all(name == 'a.zip' for name, _ in changes))
+            finally:
+                watcher.close()
+
+        asyncio.run(test())
+
+    def test_inotify(self):
+        self.check_events(use_inotify=True)
+
+    def test_polling(self):
+        self.check_events(use_inotify=False)
+
+    def test_events_off_loop(self):
+        async def test():
+            watcher = SavesWatcher(self.tmpdir.name)
+            checked_in = []
+            stat_all, scan = watcher._stat_all, watcher._scan
+            watcher._stat_all = lambda names: checked_in.append(threading.current_thread()) or stat_all(names)
+            watcher._scan = lambda: checked_in.append(threading.current_thread()) or scan()
+            try:
+                await watcher.wait_ready()
+                if watcher.polling:
+                    self.skipTest("inotify is unavailable")
+                self.write('a.zip', b'a', 10 ** 18)
+                await self.wait_until(lambda: 'a.zip' in watcher.files)
+                watcher._rescan = True  # as if the events overflowed
+                self.write('b.zip', b'b', 10 ** 18)
+                await self.wait_until(lambda: 'b.zip' in watcher.files)
+                os.remove(self.path('a.zip'))
+                await self.wait_until(lambda: watcher._update_task is not None or 'a.zip' not in watcher.files)
+                await watcher.sync()  # waits for the pending events
+                self.assertEqual(list(watcher.files), ['b.zip'])
+                self.assertGreaterEqual(len(checked_in), 3)
+                self.assertNotIn(threading.main_thread(), checked_in)
+            finally:
+                watcher.close()
+
+        asyncio.run(test())
+
+    def test_lookup_when_polling(self):
+        async def test():
+            watcher = SavesWatcher(self.tmpdir.name, poll_interval=60, use_inotify=False)
+            try:
+                self.write('a.zip', b'a', 10 ** 18)
+                await watcher.wait_ready()
+                self.write('a.zip', b'aa', 10 ** 18 + 1)  # not polled yet
+                self.assertEqual((await watcher.lookup('a.zip')).st_size, 2)
+                self.write('b.zip', b'b', 10 ** 18)
+                os.remove(self.path('a.zip'))
+                self.assertIsNone(await watcher.lookup('a.zip'))
+                await watcher.sync()
+                self.assertEqual(list(watcher.files), ['b.zip'])
+                self.assertIsNone(await watcher.lookup('../b.zip'))
+            finally:
+                watcher.close()
+
+        asyncio.run(test())
+
+
+class TestSaveIndex(TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.db_path = os.path.join(self.tmpdir.name, 'index.sqlite3')
+
+    def open_index(self):
+        index = SaveIndex(self.db_path)
+        self.addCleanup(index.close)
+        return index
+
+    def test_get_put(self):
+        index = self.open_index()
+        state = LazyMetadata('a.zip', invalid=True).dump()
+        self.assertIsNone(index.get('a.zip', (1, 2, 3)))
+        index.put('a.zip', (1, 2, 3), state)
+        self.assertEqual(index.get('a.zip', (1, 2, 3)), state)
+        self.assertIsNone(index.get('a.zip', (1, 2, 4)))  # the file is changed
+        index.put('a.zip', (1, 2, 4), {'metadata': {'ticks': (1, 2, 3), 'crc': b'\0\1'}})
+        self.assertEqual(self.open_index().get('a.zip', (1, 2, 4)), {'metadata': {'ticks': (1, 2, 3), 'crc': b'\0\1'}})
+        index.discard('a.zip')
+        self.assertIsNone(self.open_index().get('a.zip', (1, 2, 4)))
+
+    def test_prune(self):
+        index = self.open_index()
+        for name in ['a.zip', 'b.zip', 'c.zip']:
+            index.put(name, (1, 2, 3), {})
+        index.prune(['b.zip'])
+        reopened = self.open_index()
+        self.assertEqual([reopened.get(name, (1, 2, 3)) for name in ['a.zip', 'b.zip', 'c.zip']], [None, {}, None])
+
+    def test_schema_version(self):
+        self.open_index().put('a.zip', (1, 2, 3), {})
+        self.assertEqual(self.open_index().get('a.zip', (1, 2, 3)), {})
+        db = sqlite3.connect(self.db_path)
+        db.execute("PRAGMA user_version=1")  # e.g. written by another Python version
+        db.close()
+        self.assertIsNone(self.open_index().get('a.zip', (1, 2, 3)))
+
+    def test_cold_restart(self):
+        saves_dir = os.path.join(self.tmpdir.name, 'saves')
+        os.mkdir(saves_dir)
+        for i in range(3):
+            make_save_zip(os.path.join(saves_dir, f'save{i}.zip'), ticks=(i * 60,) * 3, body_size=1024, seed=i)
+
+        async def query():
+            explorer = SavesExplorer(saves_dir, index_path=self.db_path, scan_workers=1)
+            try:
+                _, rows = await explorer.query('play_time')
+                return [(name, metadata['ticks']) for name, _, metadata in rows]
+            finally:
+                explorer.close()
+
+        expected = [(f'save{i}.zip', (i * 60,) * 3) for i in range(3)]
+        self.assertEqual(asyncio.run(query()), expected)
+        with patch.object(Deserializer, 'load_save_zip', side_effect=AssertionError("the save is opened")):
+            self.assertEqual(asyncio.run(query()), expected)
+
+
+class TestSavesExplorer(TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        for i in range(3):
+            make_save_zip(os.path.join(self.tmpdir.name, f'save{i}.zip'), ticks=(i * 60,) * 3, body_size=1024,
+                          seed=i)
+
+    def run_explorer(self, func, **kwargs):
+        async def run():
+            explorer = SavesExplorer(self.tmpdir.name, scan_workers=1, **kwargs)
+            try:
+                return await func(explorer)
+            finally:
+                explorer.close()
+
+        return asyncio.run(run())
+
+    def test_cache_stat(self):
+        async def load_twice(explorer: SavesExplorer):
+            await explorer.load('save0.zip')
+            await explorer.load('save0.zip')
+            await explorer.query('play_time')
+            return explorer.cache_stat
+
+        stat = self.run_explorer(load_twice)
+        self.assertEqual((stat.hits, stat.misses, stat.entries), (2, 3, 3))
+
+    def test_query(self):
+        async def query(explorer: SavesExplorer):
+            return await explorer.query('play_time', descending=True, limit=2)
+
+        total, rows = self.run_explorer(query)
+        self.assertEqual(total, 3)
+        self.assertEqual([row[0] for row in rows], ['save2.zip', 'save1.zip'])
+
+    def test_single_flight(self):
+        async def load_concurrently(explorer: SavesExplorer):
+            calls = []
+            load_indexed = explorer._load_indexed
+
+            def counted(*args):
+                calls.append(args[0])
+                return load_indexed(*args)
+
+            explorer._load_indexed = counted
+            results = await asyncio.gather(*[explorer.load_lazy('save1.zip') for _ in range(5)])
+            return calls, results
+
+        calls, results = self.run_explorer(load_concurrently)
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(all(result is results[0] for result in results))
+
+    def test_load_copy(self):
+        async def load_more(explorer: SavesExplorer):
+            ticks_only = await explorer.load_lazy('save1.zip', ['ticks'])
+            full = await explorer.load_lazy('save1.zip')
+            _, rows = await explorer.query('name')  # the cached one is replaced
+            return ticks_only, full, {name: metadata for name, _, metadata in rows}['save1.zip']
+
+        ticks_only, full, cached = self.run_explorer(load_more)
+        self.assertIsNot(full, ticks_only)
+        self.assertIs(cached, full)
+        self.assertFalse(ticks_only.is_loaded(['mods']))  # the one handed out is not modified
+        self.assertEqual(list(ticks_only), ['version', 'scenario', 'base_mod', 'ticks', 'play_time', 'total_time'])
+
+    def test_scan_copy(self):
+        async def scan_all(explorer: SavesExplorer):
+            ticks_only = await explorer.load_lazy('save1.zip', ['ticks'])
+            scanned = {name: metadata async for name, _, metadata in explorer.scan()}  # in a thread, not a process
+            return ticks_only, scanned['save1.zip']
+
+        ticks_only, scanned = self.run_explorer(scan_all)
+        self.assertIsNot(scanned, ticks_only)
+        self.assertTrue(scanned.is_loaded())
+        self.assertFalse(ticks_only.is_loaded(['mods']))
+        self.assertNotIn('mods', list(ticks_only))  # the state is not shared
+
+    def test_cancel_waiter(self):
+        async def cancel_one(explorer: SavesExplorer):
+            first = asyncio.create_task(explorer.load('save2.zip'))
+            second = asyncio.create_task(explorer.load('save2.zip'))
+            await asyncio.sleep(0)
+            first.cancel()
+            return await second, first
+
+        metadata, first = self.run_explorer(cancel_one)
+        self.assertTrue(first.cancelled())
+        self.assertEqual(metadata['ticks'], (120, 120, 120))
+
+    def test_prewarm(self):
+        async def save_and_prewarm(explorer: SavesExplorer):
+            await explorer.query('name')
+            path = make_save_zip(os.path.join(self.tmpdir.name, 'save0.zip'), ticks=(600,) * 3, body_size=2048)
+            os.utime(path, ns=(0, 1))  # mtime changed, no matter how fast the file is rewritten
+            explorer.prewarm('save0.zip')
+            explorer.prewarm('missing.zip')
+            await asyncio.gather(*explorer._background_tasks)
+            hits = explorer.cache_stat.hits
+            _, rows = await explorer.query('name', limit=1)
+            return rows[0][2]['ticks'], explorer.cache_stat.hits - hits
+
+        ticks, hits = self.run_explorer(save_and_prewarm)
+        self.assertEqual(ticks, (600, 600, 600))
+        self.assertEqual(hits, 3)  # all the saves are cached
+
+
+class TestScanPool(TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        for i in range(6):
+            make_save_zip(os.path.join(self.tmpdir.name, f'save{i}.zip'), ticks=((i * 7 % 6) * 60,) * 3,
+                          body_size=1 << 16, seed=i)
+        with open(os.path.join(self.tmpdir.name, 'broken.zip'), 'wb') as f:
+            f.write(b'not a zip')
+        # a valid zip whose level.dat is cut in the middle of the header, the parse raises in the worker
+        level = make_save_zip(os.path.join(self.tmpdir.name, 'full.tmp'), zlib_level=False, body_size=0)
+        with zipfile.ZipFile(level) as zf:
+            data = zf.read('full/level.dat')
+        with zipfile.ZipFile(os.path.join(self.tmpdir.name, 'truncated.zip'), 'w') as zf:
+            zf.writestr('truncated/level.dat', data[:len(data) // 2])
+        os.remove(level)
+
+    def test_scan(self):
+        async def scan():
+            explorer = SavesExplorer(self.tmpdir.name, scan_workers=2)
+            try:
+                first = [(name, metadata.invalid, metadata.get('ticks')) async for name, _, metadata
+                         in explorer.scan(SavesExplorer.SUMMARY_KEYS)]
+                self.assertIsNotNone(explorer._pool)
+                hits = explorer.cache_stat.hits
+                second = [name async for name, _, _ in explorer.scan(SavesExplorer.SUMMARY_KEYS)]
+                self.assertEqual(explorer.cache_stat.hits - hits, 8)  # all served from the cache
+                total, rows = await explorer.query('play_time', descending=True)
+                processes = list(explorer._pool._processes.values())
+            finally:
+                explorer.close()
+            return first, second, [row[0] for row in rows], explorer, processes
+
+        first, second, ordered, explorer, processes = asyncio.run(scan())
+        self.assertEqual(sorted(name for name, _, _ in first), sorted(os.listdir(self.tmpdir.name)))
+        self.assertEqual(sorted(second), sorted(name for name, _, _ in first))
+        by_name = {name: (invalid, ticks) for name, invalid, ticks in first}
+        self.assertEqual(by_name['broken.zip'], (True, None))
+        self.assertEqual(by_name['truncated.zip'], (True, None))
+        self.assertEqual(by_name['save1.zip'], (False, (60, 60, 60)))
+        # the saves which cannot be parsed are the last ones, in the name order when descending
+        self.assertEqual(ordered, ['save5.zip', 'save4.zip', 'save3.zip', 'save2.zip', 'save1.zip', 'save0.zip',
+                                   'truncated.zip', 'broken.zip'])
+        # the pool is shut down on close()
+        self.assertRaises(RuntimeError, explorer._pool.submit, print)
+        for process in processes:
+            process.join(10)
+            self.assertFalse(process.is_alive())
+
+
+class TestQuerySaves(TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        for i, version in enumerate([(2, 0, 66, 0), (1, 1, 110, 0), (2, 0, 72, 0)]):
+            make_save_zip(os.path.join(self.tmpdir.name, f'save{i}.zip'), version, ticks=(i * 60,) * 3,
+                          body_size=1024, seed=i)
+        with open(os.path.join(self.tmpdir.name, 'broken.zip'), 'wb') as f:
+            f.write(b'not a zip')
+
+    def query(self, **kwargs):
+        async def run():
+            manager = ServerManager(self.tmpdir.name, 'factorio', 10, scan_workers=1)
+            try:
+                return await manager.QuerySaves(SaveQuery(**kwargs), None)
+            finally:
+                manager.saves.close()
+
+        result = asyncio.run(run())
+        return result.total, [(save.name, save.play_ticks if save.HasField('play_ticks') else None)
+                              for save in result.saves]
+
+    def test_sort_and_page(self):
+        self.assertEqual(self.query(sort_by=SaveQuery.PLAY_TIME, descending=True),
+                         (4, [('save2.zip', 120), ('save1.zip', 60), ('save0.zip', 0), ('broken.zip', None)]))
+        self.assertEqual(self.query(sort_by=SaveQuery.NAME, offset=1, limit=2),
+                         (4, [('save0.zip', 0), ('save1.zip', 60)]))
+        self.assertEqual(self.query(sort_by=SaveQuery.VERSION, descending=True, limit=1), (4, [('save2.zip', 120)]))
+
+    def test_filter(self):
+        self.assertEqual(self.query(version='2.0'), (2, [('save0.zip', 0), ('save2.zip', 120)]))
+        self.assertEqual(self.query(version='2.0', offset=1), (2, [('save2.zip', 120)]))
+        self.assertEqual(self.query(scenario='no such scenario'), (0, []))
+        self.assertEqual(self.query(mod_name='synthetic-mod-2')[0], 3)
+        self.assertEqual(self.query(mod_name='synthetic-mod-3'), (0, []))
@@ -0,0 +1,213 @@
+import io
+import marshal
+import os
+import tempfile
+import zipfile
+import zlib
+from unittest import TestCase
+from unittest.mock import patch
+
+from facmgr.server.save_explorer.parser import LazyMetadata, load_metadata, Deserializer, LevelSource
+from .save_fixtures import make_save_zip, Serializer
+
+
+class TestDeserializer(TestCase):
+    VALUES = [7, True, 5, 300, 70000, 1 << 40, 1.5, 2.25, 'abc', 'x' * 300, 'é', b'\x01\x02']
+
+    @staticmethod
+    def serialize() -> bytes:
+        s = Serializer()
+        s.write_u8(7)
+        s.write_bool(True)
+        s.write_optim('<H', 5)
+        s.write_optim('<H', 300)
+        s.write_optim('<I', 70000)
+        s.write_fmt('<Q', 1 << 40)
+        s.write_fmt('<f', 1.5)
+        s.write_fmt('<d', 2.25)
+        for value in ['abc', 'x' * 300, 'é']:
+            s.write_str(value)
+        s.write(b'\x01\x02')
+        return s.getvalue()
+
+    @staticmethod
+    def deserialize(ds: Deserializer) -> list:
+        return [ds.read_u8(), ds.read_bool(), ds.read_u16(optim=True), ds.read_u16(optim=True),
+                ds.read_u32(optim=True), ds.read_u64(), ds.read_fp32(), ds.read_fp64(),
+                ds.read_str(), ds.read_str(), ds.read_str(), ds.read(2)]
+
+    def test_round_trip(self):
+        data = self.serialize()
+        ds = Deserializer(data)
+        self.assertEqual(self.deserialize(ds), self.VALUES)
+        self.assertEqual(ds.pos, len(data))
+        # extended from a source in small steps
+        Deserializer.MIN_FILL, min_fill = 1, Deserializer.MIN_FILL
+        self.addCleanup(setattr, Deserializer, 'MIN_FILL', min_fill)
+        with Deserializer(source=io.BytesIO(data)) as ds:
+            buffer = ds.data
+            self.assertEqual(self.deserialize(ds), self.VALUES)
+            self.assertIs(ds.data, buffer)  # extended in place
+            self.assertEqual(len(ds.data), len(data))
+
+    def test_skip_and_seek(self):
+        ds = Deserializer(self.serialize())
+        ds.seek(31)  # after the numbers
+        ds.skip_str()
+        ds.skip_str()
+        self.assertEqual(ds.read_str(), 'é')
+        ds.assert_byte_seq(b'\x01\x02')
+        self.assertRaises(EOFError, ds.read_u8)
+
+    def test_truncated(self):
+        data = self.serialize()
+        for cut in range(len(data)):
+            for ds in [Deserializer(data[:cut]), Deserializer(source=io.BytesIO(data[:cut]))]:
+                with self.subTest(cut=cut, source=ds.source is not None), self.assertRaises(EOFError):
+                    self.deserialize(ds)
+
+    def test_truncated_save(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        path = make_save_zip(os.path.join(tmpdir.name, 'full.zip'), zlib_level=False, body_size=0)
+        with zipfile.ZipFile(path) as zf:
+            level = zf.read('full/level.dat')
+        truncated = os.path.join(os.path.dirname(path), 'truncated.zip')
+        with zipfile.ZipFile(truncated, 'w') as zf:
+            zf.writestr('truncated/level.dat', level[:len(level) // 2])
+        self.assertRaises(EOFError, load_metadata, truncated)
+
+
+class TestLevelSource(TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.path = make_save_zip(os.path.join(self.tmpdir.name, 'chunks.zip'), mods=255, startup_settings=5000,
+                                  body_size=1 << 16)
+        with zipfile.ZipFile(self.path) as zf:
+            self.compressed = zf.getinfo('chunks/level.dat0').file_size
+            self.level = zlib.decompress(zf.read('chunks/level.dat0'))
+
+    def test_chunks(self):
+        with patch.object(LevelSource, 'CHUNK_SIZE', 64), Deserializer.load_save_zip(self.path) as ds:
+            source = ds.source
+            parts = [source.read(1000)]
+            self.assertLess(source.compressed_bytes, self.compressed / 10)  # decompressed on demand
+            while part := source.read(1000):
+                parts.append(part)
+            self.assertEqual(b''.join(parts), self.level)
+            self.assertEqual(source.compressed_bytes, self.compressed)
+
+    def test_parse_in_chunks(self):
+        full = load_metadata(self.path)
+        with patch.object(LevelSource, 'CHUNK_SIZE', 64), patch.object(Deserializer, 'MIN_FILL', 64):
+            metadata = load_metadata(self.path)
+        self.assertEqual(metadata, full)
+        self.assertEqual(len(metadata['mods_startup_settings']), 5000)
+
+    def test_close_on_error(self):
+        opened = []
+
+        def open_failed(zf, *args, **kwargs):
+            opened.append(zf)
+            raise zipfile.BadZipFile("Bad magic number for file header")
+
+        with patch.object(zipfile.ZipFile, 'open', autospec=True, side_effect=open_failed):
+            self.assertRaises(zipfile.BadZipFile, Deserializer.load_save_zip, self.path)
+        self.assertIsNone(opened[0].fp)
+
+
+class TestLoadMetadata(TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+
+    def path(self, name):
+        return os.path.join(self.tmpdir.name, name)
+
+    def test_layouts(self):
+        for version, zlib_level in [((2, 0, 66, 0), True), ((1, 1, 110, 0), True), ((1, 1, 110, 0), False)]:
+            with self.subTest(version=version, zlib_level=zlib_level):
+                metadata = load_metadata(make_save_zip(
+                    self.path('layout.zip'), version, mods=5, startup_settings=8, map_settings=3,
+                    ticks=(216000, 215999, 216001), map_seed=42, zlib_level=zlib_level
+                ))
+                self.assertEqual(metadata['version'], '.'.join(map(str, version[:3])) + '-0')
+                self.assertEqual(metadata['scenario'], 'base/freeplay')
+                self.assertEqual([mod['name'] for mod in metadata['mods']][:2], ['base', 'synthetic-mod-1'])
+                self.assertEqual(metadata['mods'][1]['version'], '1.1.3')
+                self.assertEqual(len(metadata['mods_startup_settings']), 8)
+                self.assertEqual(metadata['mods_startup_settings'][3], ['synthetic-mod-setting-3', 'uint64', 3000])
+                self.assertEqual(metadata['ticks'], (216000, 215999, 216001))
+                self.assertEqual(metadata['play_time'], '1:0:0')
+                self.assertEqual(len(metadata['map_settings']), 3)
+                self.assertEqual(metadata['map_seed'], 42)
+                self.assertEqual('game_finish' in metadata, version[0] >= 2)
+
+    def test_long_header(self):
+        # far beyond the fixed 16 KiB compressed head read by the old parser
+        metadata = LazyMetadata(make_save_zip(self.path('modded.zip'), mods=255, startup_settings=5000)).load()
+        self.assertEqual(len(metadata['mods']), 255)
+        self.assertEqual(len(metadata['mods_startup_settings']), 5000)
+        self.assertGreater(metadata.read_bytes['compressed'], 16384)
+        self.assertNotIn('read_bytes', metadata.to_dict())
+
+    def test_short_read(self):
+        metadata = LazyMetadata(make_save_zip(self.path('vanilla.zip'), mods=1, startup_settings=0)).load()
+        self.assertLessEqual(metadata.read_bytes['compressed'], 8192)
+
+    def test_bad_zip(self):
+        with open(self.path('bad.zip'), 'wb') as f:
+            f.write(b'not a zip file')
+        self.assertEqual(load_metadata(self.path('bad.zip')), {})
+
+
+class TestLazyMetadata(TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+
+    def make_save(self, version):
+        return make_save_zip(os.path.join(self.tmpdir.name, 'lazy.zip'), version, mods=100, startup_settings=3000)
+
+    def test_partial(self):
+        for version in [(2, 0, 66, 0), (1, 1, 110, 0)]:
+            with self.subTest(version=version):
+                path = self.make_save(version)
+                full = load_metadata(path)
+                metadata = LazyMetadata(path)
+                self.assertEqual(metadata['play_time'], full['play_time'])
+                self.assertTrue(metadata.is_loaded(['ticks', 'version']))
+                self.assertFalse(metadata.is_loaded(['mods']))
+                # the later sections are parsed from the cached offsets, in any order
+                self.assertEqual(metadata['map_seed'], full['map_seed'])
+                self.assertEqual(metadata['mods'], full['mods'])
+                self.assertEqual(metadata['unknowns'], full['unknowns'])
+                self.assertEqual(metadata.to_dict().keys(), full.keys())
+                self.assertEqual(metadata.to_dict(), full)
+
+    def test_skip_sections(self):
+        path = self.make_save((2, 0, 66, 0))
+        ticks_only = LazyMetadata(path).load(['ticks'])
+        self.assertNotIn('mods_startup_settings', ticks_only._metadata)
+        self.assertIn('map_settings', ticks_only._offsets)
+        # only the parsed keys are listed, without reading the savefile
+        self.assertEqual(list(ticks_only), ['version', 'scenario', 'base_mod', 'ticks', 'play_time', 'total_time'])
+        self.assertEqual(len(ticks_only), 6)
+        self.assertFalse(ticks_only.is_loaded(['mods']))
+
+    def test_dump(self):
+        path = self.make_save((2, 0, 66, 0))
+        metadata = LazyMetadata(path).load(['ticks'])
+        restored = LazyMetadata(path, marshal.loads(marshal.dumps(metadata.dump())))
+        self.assertTrue(restored.is_loaded(['ticks']))
+        self.assertEqual(restored['map_seed'], 123456789)
+
+    def test_bad_zip(self):
+        path = os.path.join(self.tmpdir.name, 'bad.zip')
+        with open(path, 'wb') as f:
+            f.write(b'not a zip file')
+        metadata = LazyMetadata(path)
+        self.assertIsNone(metadata.get('ticks'))
+        self.assertTrue(metadata.invalid)
+        self.assertEqual(metadata.to_dict(), {})
@@ -0,0 +1,188 @@
+import asyncio
+import random
+import time
+from unittest import TestCase
+
+from facmgr.protobuf.error_code import SUCCESS, NOT_AVAILABLE
+from facmgr.server.daemon import FactorioServerDaemon
+from facmgr.server.daemon.rcon import RconClient, RconError, _header, _packet, _read_packet, _MAX_BODY
+
+
+class FakeRconServer:
+    """
+    Answers 'echo <command>' after a random delay, so the responses are out of order, or 'x' * n to '/long <n>'.
+    An empty command is answered right after the previous one like the server does, and the responses longer than
+    a packet are split.
+    """
+
+    def __init__(self, password='secret'):
+        self.password = password
+        self.connections = 0
+        self.writers: list[asyncio.StreamWriter] = []
+        self.server = None
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._handle, '127.0.0.1', 0)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        self.writers.append(writer)
+        try:
+            request_id, _, password = await _read_packet(reader)
+            writer.write(_packet(request_id, 0, ''))
+            writer.write(_packet(request_id if password.decode() == self.password else -1, 2, ''))
+            responses = []
+            while True:
+                request_id, _, body = await _read_packet(reader)
+                if not (command := body.decode()):
+                    responses.append((request_id, ''))
+                    if len(responses) == 1:  # the previous one is already sent
+                        self._respond(writer, responses)
+                    continue
+                body = 'x' * int(command[6:]) if command.startswith('/long ') else 'echo ' + command
+                responses = [(request_id, body)]
+                asyncio.get_running_loop().call_later(random.random() / 100, self._respond, writer, responses)
+        except (OSError, asyncio.IncompleteReadError):
+            writer.close()
+
+    @staticmethod
+    def _respond(writer: asyncio.StreamWriter, responses: list[tuple[int, str]]):
+        if not writer.is_closing():
+            for request_id, body in responses:
+                for i in range(0, len(body), _MAX_BODY):
+                    writer.write(_packet(request_id, 0, body[i:i + _MAX_BODY]))
+                if not body:
+                    writer.write(_packet(request_id, 0, ''))
+        responses.clear()
+
+    def drop_connections(self):
+        for writer in self.writers:
+            writer.close()
+        self.writers.clear()
+
+    async def close(self):
+        self.drop_connections()
+        self.server.close()
+        await asyncio.sleep(0.01)  # let the handlers exit
+
+
+class TestRconClient(TestCase):
+    def run_with_server(self, test, **kwargs):
+        async def run():
+            server = FakeRconServer()
+            port = await server.start()
+            client = RconClient('127.0.0.1', port, kwargs.get('password', 'secret'), pool_size=2, timeout=2)
+            try:
+                await test(server, client)
+            finally:
+                client.close()
+                await server.close()
+
+        asyncio.run(run())
+
+    def test_packet(self):
+        self.assertEqual(_packet(1, 2, '/c 1'), _header.pack(14, 1, 2) + b'/c 1\0\0')
+
+    def test_execute(self):
+        async def test(server, client):
+            self.assertEqual(await client.execute('/c 1'), 'echo /c 1')
+            self.assertEqual(await client.execute_batch(['/a', '/b', '/c']), ['echo /a', 'echo /b', 'echo /c'])
+            self.assertEqual((client.stat.connections, client.stat.commands, client.stat.pending), (1, 4, 0))
+
+        self.run_with_server(test)
+
+    def test_pipelined(self):
+        async def test(server, client):
+            commands = [f'/c {i}' for i in range(1000)]
+            start = time.perf_counter()
+            for _ in range(2):  # another connection is opened when the first one is busy
+                responses = await asyncio.gather(*[client.execute(command) for command in commands])
+                self.assertEqual(responses, ['echo ' + command for command in commands])
+            elapsed = time.perf_counter() - start
+            self.assertEqual(server.connections, 2)  # the pool is used but bounded
+            self.assertLess(elapsed, 1)  # the responses come after 10ms at most, so they must be pipelined
+
+        self.run_with_server(test)
+
+    def test_split_response(self):
+        async def test(server, client):
+            self.assertEqual(await client.execute_batch(['/long 10000', '/c 1', '/long 4096']),
+                             ['x' * 10000, 'echo /c 1', 'x' * 4096])
+
+        self.run_with_server(test)
+
+    def test_malformed_packet(self):
+        async def test(server, client):
+            self.assertEqual(await client.execute('/c 1'), 'echo /c 1')
+            pending = asyncio.create_task(client.execute('/c 2'))
+            await asyncio.sleep(0)
+            server.writers[0].write(_header.pack(-1, 1, 0))
+            with self.assertRaisesRegex(RconError, 'lost'):
+                await pending
+            self.assertEqual(await client.execute('/c 3'), 'echo /c 3')  # reconnected
+
+        self.run_with_server(test)
+
+    def test_wrong_password(self):
+        async def test(server, client):
+            with self.assertRaisesRegex(RconError, 'refused'):
+                await client.execute('/c 1')
+            with self.assertRaisesRegex(RconError, 'retrying'):  # backoff
+                await client.execute('/c 1')
+            self.assertEqual(server.connections, 1)
+
+        self.run_with_server(test, password='wrong')
+
+    def test_reconnect(self):
+        async def test(server, client):
+            self.assertEqual(await client.execute('/c 1'), 'echo /c 1')
+            pending = asyncio.create_task(client.execute('/c 2'))
+            await asyncio.sleep(0)
+            server.drop_connections()
+            with self.assertRaises(RconError):
+                await pending
+            self.assertEqual(await client.execute('/c 3'), 'echo /c 3')
+            self.assertEqual(server.connections, 2)
+
+        self.run_with_server(test)
+
+    def test_unavailable(self):
+        async def test():
+            client = RconClient('127.0.0.1', 1, '', timeout=1)
+            with self.assertRaisesRegex(RconError, 'cannot connect'):
+                await client.execute('/c 1')
+            self.assertEqual(client.stat.errors, 1)
+            client.close()
+
+        asyncio.run(test())
+
+
+class TestDaemonRcon(TestCase):
+    def test_run_command(self):
+        async def test():
+            server = FakeRconServer()
+            port = await server.start()
+            fac = FactorioServerDaemon('factorio', rcon_address=f'127.0.0.1:{port}', rcon_password='secret')
+            try:
+                self.assertEqual(await fac.run_command('/c 1\n/c 2'),
+                                 {"code": SUCCESS, "message": "echo /c 1\necho /c 2"})
+                self.assertEqual(await fac.capture_command('/c 1'),
+                                 ({"code": SUCCESS, "message": None}, [b'echo /c 1']))
+                self.assertEqual(fac.get_rcon_stat().commands, 3)
+                await server.close()
+                self.assertEqual((await fac.run_command('/c 1'))['code'], NOT_AVAILABLE)
+            finally:
+                fac.close()
+                await server.close()
+
+        asyncio.run(test())
+
+    def test_generated_password(self):
+        fac = FactorioServerDaemon('factorio', rcon_address='127.0.0.1:27015')
+        other = FactorioServerDaemon('factorio', rcon_address='127.0.0.1:27015')
+        self.assertGreaterEqual(len(fac.rcon_password), 32)
+        self.assertEqual(fac.rcon.password, fac.rcon_password)
+        self.assertNotEqual(fac.rcon_password, other.rcon_password)
+        fac.close()
+        other.close()